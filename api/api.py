@@ -1,16 +1,47 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, has_request_context
+from flask.helpers import get_debug_flag
 from flask_cors import CORS
 import uuid
 import json
 import os
 from datetime import datetime, timedelta
-import asyncio
-from firecrawl import AsyncFirecrawlApp, ScrapeOptions
+import atexit
+import concurrent.futures
+import contextvars
+import csv
+import hashlib
+import io
+import itertools
+from firecrawl import ScrapeOptions
 import threading
 import time
 import requests
 import re
+import sys
 from dotenv import load_dotenv
+from werkzeug.serving import is_running_from_reloader
+
+# `flask run` imports this module as api.api, with only the repository root on sys.path
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.artifact_dedupe import add_artifact, collapse_duplicates, fingerprint, find_duplicate, similarity
+from services.crawl_cache import CrawlCache, normalize_url
+from services.firecrawl_runner import FirecrawlRunner
+from services.job_registry import JobRegistry
+from services.lead_scoring import NEXT_ACTIONS, LeadIndex, encode_personas, score_persona, score_personas
+from services.page_extractor import PageExtractor
+from services.page_store import PageStore
+from services.persona_library import PersonaLibrary
+from services.persona_report import REPORT_FORMATS, build_report_model, join_report, render_body, render_header
+from services.prewarm_scheduler import PrewarmScheduler
+from services.rate_limiter import RateLimiter
+from services.research_store import ResearchStore
+from services.taxonomy_classifier import TaxonomyClassifier
+from services.search_index import SEARCH_FIELDS, SearchIndex
+from services.scheduler import PRIORITY_CLASSES, PriorityScheduler, current_priority
+from services.section_index import SectionIndex
+from services.usage_ledger import ROLLUP_FIELDS, UsageLedger, current_endpoint
 
 # Load environment variables
 load_dotenv()
@@ -44,8 +75,288 @@ if not FIRECRAWL_API_KEY:
 if not OPENAI_API_KEY:
     pass
 
-# In-memory job tracking (simple for prototype)
-crawl_jobs = {}
+# All Firecrawl SDK calls run on one background event loop sharing a pooled client
+FIRECRAWL_MAX_CONNECTIONS = int(os.getenv('FIRECRAWL_MAX_CONNECTIONS', 20))
+firecrawl_runner = FirecrawlRunner(FIRECRAWL_API_KEY, FIRECRAWL_MAX_CONNECTIONS)
+atexit.register(firecrawl_runner.stop)
+
+# CPU-bound page extraction runs in worker processes, off the request-serving threads
+PAGE_EXTRACT_WORKERS = int(os.getenv('PAGE_EXTRACT_WORKERS', 2))
+page_extractor = PageExtractor(PAGE_EXTRACT_WORKERS)
+atexit.register(page_extractor.stop)
+
+# Crawl settings; together with the normalized URL they key the crawl cache
+CRAWL_OPTIONS = {
+    "limit": 2,
+    "max_depth": 1,
+    # HTML is only needed for sites where Firecrawl cannot produce markdown
+    "formats": os.getenv('CRAWL_FORMATS', 'markdown').split(','),
+    "only_main_content": True
+}
+
+# Repeat ingests of the same site reuse crawls younger than this (matches Firecrawl maxAge)
+CRAWL_CACHE_TTL_SECONDS = int(os.getenv('CRAWL_CACHE_TTL_SECONDS', 14400))
+crawl_cache = CrawlCache(os.path.join(DATA_DIR, "cache", "crawl"), CRAWL_CACHE_TTL_SECONDS)
+
+# Every upstream call (and store hit) is appended to the usage ledger by a background writer
+usage_ledger = UsageLedger(os.path.join(DATA_DIR, "usage"))
+atexit.register(usage_ledger.flush)
+
+# Estimated USD per 1K prompt / completion tokens, matched by model name prefix
+MODEL_PRICES_PER_1K = {
+    "gpt-4": (0.03, 0.06),
+    "sonar": (0.001, 0.001)
+}
+
+# Company research is served from the store while fresh, and while stale with one background refresh
+RESEARCH_FRESH_SECONDS = int(os.getenv('RESEARCH_FRESH_SECONDS', 24 * 3600))
+RESEARCH_STALE_SECONDS = int(os.getenv('RESEARCH_STALE_SECONDS', 7 * 24 * 3600))
+research_store = ResearchStore(
+    os.path.join(DATA_DIR, "cache", "research"),
+    RESEARCH_FRESH_SECONDS,
+    RESEARCH_STALE_SECONDS,
+    submit_background=lambda refresh: scrape_executor.submit(
+        run_for_endpoint, "research_refresh", refresh, priority="background", caller="research-refresh"
+    )
+)
+
+# Market analysis and generated personas are stored the same way
+GENERATION_FRESH_SECONDS = int(os.getenv('GENERATION_FRESH_SECONDS', 24 * 3600))
+GENERATION_STALE_SECONDS = int(os.getenv('GENERATION_STALE_SECONDS', 7 * 24 * 3600))
+generation_store = ResearchStore(
+    os.path.join(DATA_DIR, "cache", "generated"),
+    GENERATION_FRESH_SECONDS,
+    GENERATION_STALE_SECONDS,
+    submit_background=lambda refresh: scrape_executor.submit(
+        run_for_endpoint, "generation_refresh", refresh, priority="background", caller="generation-refresh"
+    )
+)
+
+# Research, market analysis and personas for watchlisted accounts are refreshed in this daily local-time window
+PREWARM_WINDOW = os.getenv('PREWARM_WINDOW', '02:00-05:00')
+PREWARM_ENABLED = os.getenv('PREWARM_ENABLED', 'true').lower() == 'true'
+prewarm_scheduler = PrewarmScheduler(
+    os.path.join(DATA_DIR, "prewarm_watchlist.json"),
+    PREWARM_WINDOW,
+    {
+        "research": lambda company_name, industry: get_perplexity_research(
+            company_name, industry, timeout=SCRAPE_RESEARCH_DEADLINE_SECONDS, refresh=True, source="prewarm"
+        ),
+        "market_analysis": lambda company_name, industry: get_market_analysis(
+            company_name, industry, timeout=SCRAPE_RESEARCH_DEADLINE_SECONDS, refresh=True, source="prewarm"
+        ),
+        "personas": lambda company_name, industry: get_buyer_personas(
+            company_name, industry, timeout=SCRAPE_RESEARCH_DEADLINE_SECONDS, refresh=True, source="prewarm"
+        )
+    },
+    submit=lambda task: scrape_executor.submit(run_for_endpoint, "prewarm", task, priority="background", caller="prewarm")
+)
+
+# Crawled pages are stored once, in full, as compressed chunks; JSON records keep a preview
+PAGE_CHUNK_SIZE = int(os.getenv('PAGE_CHUNK_SIZE', 8000))
+PAGE_PREVIEW_CHARS = int(os.getenv('PAGE_PREVIEW_CHARS', 500))
+PROMPT_SCRAPED_CONTENT_CHARS = int(os.getenv('PROMPT_SCRAPED_CONTENT_CHARS', 12000))
+page_store = PageStore(os.path.join(DATA_DIR, "pages"), SCRAPED_DIR, PAGE_CHUNK_SIZE)
+
+# Core personas are parsed once, with modifiers pre-merged, and reloaded when the file changes
+persona_library = PersonaLibrary(os.path.join(DATA_DIR, "core_personas.json"))
+
+# Company stage and industry category keywords and weights, reloaded when the file changes
+taxonomy_classifier = TaxonomyClassifier(os.path.join(DATA_DIR, "classification_taxonomy.json"))
+
+# Scores of every persona of every tracked company, rebuilt when companies or the persona library change
+lead_index = LeadIndex()
+
+# Headed sections of generated markdown (research, market analysis, ...) per company
+section_index = SectionIndex(os.path.join(DATA_DIR, "sections"))
+# Sections of the company research reused in the prospect expansion prompt, and their size budget
+PROSPECT_RESEARCH_SECTIONS = [
+    name.strip() for name in os.getenv('PROSPECT_RESEARCH_SECTIONS', 'Pain Points,Recent Developments,Competitive Landscape').split(',')
+    if name.strip()
+]
+PROMPT_SECTION_CHARS = int(os.getenv('PROMPT_SECTION_CHARS', 3000))
+
+# SimHash bits in which a generated entry may differ from a stored one and still be collapsed into it
+DUPLICATE_MAX_DISTANCE = int(os.getenv('DUPLICATE_MAX_DISTANCE', 3))
+
+# Full-text index over companies, crawled pages, research and generated content, updated as they are written
+search_index = SearchIndex(os.path.join(DATA_DIR, "search", "search_index.sqlite3"))
+
+# Retention of completed job results held in memory
+JOB_RESULT_TTL_SECONDS = int(os.getenv('JOB_RESULT_TTL_SECONDS', 3600))
+JOB_RESULT_MAX_BYTES = int(os.getenv('JOB_RESULT_MAX_BYTES', 64 * 1024 * 1024))
+JOB_RECORD_TTL_SECONDS = int(os.getenv('JOB_RECORD_TTL_SECONDS', 7 * 24 * 3600))
+
+# In-memory job tracking; results past their retention are spilled to the scrape store
+crawl_jobs = JobRegistry(SCRAPED_DIR, JOB_RESULT_TTL_SECONDS, JOB_RESULT_MAX_BYTES, JOB_RECORD_TTL_SECONDS)
+
+# Upper bound on scrape jobs running at once, shared by single and batch ingests
+SCRAPE_MAX_CONCURRENCY = int(os.getenv('SCRAPE_MAX_CONCURRENCY', 4))
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 1000))
+
+# Every scrape job runs on this pool; jobs beyond the cap wait as pending and start by
+# priority class (interactive, batch, background), sharing workers fairly between callers
+SCRAPE_INTERACTIVE_RESERVED_WORKERS = int(os.getenv('SCRAPE_INTERACTIVE_RESERVED_WORKERS', 1))
+SCRAPE_MAX_JOBS_PER_CALLER = int(os.getenv('SCRAPE_MAX_JOBS_PER_CALLER', 0))
+scrape_executor = PriorityScheduler(
+    SCRAPE_MAX_CONCURRENCY,
+    reserved_workers=SCRAPE_INTERACTIVE_RESERVED_WORKERS,
+    max_per_caller=SCRAPE_MAX_JOBS_PER_CALLER,
+    name="scrape"
+)
+
+# Upstream request budgets shared by every workload; part of each is held back for interactive requests
+rate_limiter = RateLimiter({
+    "perplexity": float(os.getenv('PERPLEXITY_REQUESTS_PER_MINUTE', 50)),
+    "openai": float(os.getenv('OPENAI_REQUESTS_PER_MINUTE', 60)),
+    "firecrawl": float(os.getenv('FIRECRAWL_REQUESTS_PER_MINUTE', 100))
+}, interactive_reserve=float(os.getenv('RATE_LIMIT_INTERACTIVE_RESERVE', 0.2)))
+
+# Futures of jobs that have not finished yet, so queued jobs can be cancelled
+job_futures = {}
+
+# Scrape pipeline stages, in the order their results are published
+SCRAPE_STAGES = ["crawl", "perplexity_research", "fake_customer_account"]
+
+# Hard deadlines per scrape stage; an expired stage no longer holds the job's worker slot
+SCRAPE_CRAWL_DEADLINE_SECONDS = int(os.getenv('SCRAPE_CRAWL_DEADLINE_SECONDS', 300))
+SCRAPE_RESEARCH_DEADLINE_SECONDS = int(os.getenv('SCRAPE_RESEARCH_DEADLINE_SECONDS', 60))
+SCRAPE_GENERATION_DEADLINE_SECONDS = int(os.getenv('SCRAPE_GENERATION_DEADLINE_SECONDS', 60))
+SCRAPE_POLL_INTERVAL_SECONDS = int(os.getenv('SCRAPE_POLL_INTERVAL_SECONDS', 2))
+
+STAGE_DEADLINES = {
+    "crawl": SCRAPE_CRAWL_DEADLINE_SECONDS,
+    "perplexity_research": SCRAPE_RESEARCH_DEADLINE_SECONDS,
+    "fake_customer_account": SCRAPE_GENERATION_DEADLINE_SECONDS
+}
+
+# A submission matching a queued, running or just-completed job attaches to it instead of starting another
+SCRAPE_DEDUPE_WINDOW_SECONDS = int(os.getenv('SCRAPE_DEDUPE_WINDOW_SECONDS', 60))
+
+# Serializes read-modify-write of companies.json between scrape jobs
+companies_lock = threading.Lock()
+
+# Set to ask a running job to stop at its next checkpoint
+job_cancel_events = {}
+
+class JobCancelled(Exception):
+    """Raised inside a scrape job once its cancellation has been requested"""
+
+class StageTimeout(Exception):
+    """Raised when a scrape stage runs past its deadline"""
+
+# Notified whenever a job changes so event streams can push the update
+job_updates = crawl_jobs.updates
+
+def new_stage_state():
+    """Initial status and timing record for a pipeline stage"""
+    return {
+        "status": "pending",
+        "started_at": None,
+        "deadline_at": None,
+        "completed_at": None,
+        "duration_ms": None,
+        "error": None
+    }
+
+def update_job(job_id, **fields):
+    """Apply changes to a job and wake up anyone streaming its events"""
+    with job_updates:
+        job = crawl_jobs[job_id]
+        job.update(fields)
+        job["version"] = job.get("version", 0) + 1
+        job_updates.notify_all()
+
+def update_job_stage(job_id, stage, **fields):
+    """Apply changes to one stage of a job and wake up event streams"""
+    with job_updates:
+        job = crawl_jobs[job_id]
+        job["stages"][stage].update(fields)
+        job["version"] = job.get("version", 0) + 1
+        job_updates.notify_all()
+
+def publish_partial_result(job_id, key, value):
+    """Publish one piece of a job's result before the whole job has finished"""
+    with job_updates:
+        job = crawl_jobs[job_id]
+        if job.get("partial_result") is None:
+            # The job has already finished or been abandoned
+            return
+        job["partial_result"][key] = value
+        job["version"] = job.get("version", 0) + 1
+        job_updates.notify_all()
+
+def run_stage(job_id, stage, func, *args):
+    """Run one pipeline stage, recording its status and timing on the job.
+    
+    Stages whose result is an API response dict are marked failed when the
+    response reports failure; the result is still published so the caller
+    can see the error message.
+    """
+    started = time.time()
+    with job_updates:
+        if crawl_jobs[job_id]["stages"][stage]["status"] != "pending":
+            # Skipped, cancelled or timed out while waiting for its inputs
+            return None
+        update_job_stage(
+            job_id, stage,
+            status="running",
+            started_at=datetime.now().isoformat(),
+            deadline_at=datetime.fromtimestamp(started + STAGE_DEADLINES[stage]).isoformat()
+        )
+    try:
+        result = func(*args)
+    except Exception as e:
+        with job_updates:
+            if crawl_jobs[job_id]["stages"][stage]["status"] == "running":
+                update_job_stage(
+                    job_id, stage,
+                    status="cancelled" if isinstance(e, JobCancelled) else "timed_out" if isinstance(e, StageTimeout) else "failed",
+                    completed_at=datetime.now().isoformat(),
+                    duration_ms=int((time.time() - started) * 1000),
+                    error=str(e)
+                )
+        raise
+    
+    failed = isinstance(result, dict) and not result.get("success", True)
+    with job_updates:
+        if crawl_jobs[job_id]["stages"][stage]["status"] != "running":
+            # The job stopped waiting for this stage; drop its late result
+            return None
+        if stage in (crawl_jobs[job_id].get("partial_result") or {}):
+            publish_partial_result(job_id, stage, result)
+        update_job_stage(
+            job_id, stage,
+            status="failed" if failed else "completed",
+            completed_at=datetime.now().isoformat(),
+            duration_ms=int((time.time() - started) * 1000),
+            error=result.get("content") if failed else None
+        )
+    return result
+
+def stage_expired(job_id, stage, now):
+    """Whether a running stage has passed its deadline"""
+    state = crawl_jobs[job_id]["stages"][stage]
+    if state["status"] != "running" or not state.get("deadline_at"):
+        return False
+    return now > datetime.fromisoformat(state["deadline_at"])
+
+def abandon_stage(job_id, stage, status, error):
+    """Stop waiting for a stage, recording why; a late result from it is discarded"""
+    with job_updates:
+        state = crawl_jobs[job_id]["stages"][stage]
+        if state["status"] not in ("pending", "running"):
+            return
+        duration_ms = None
+        if state.get("started_at"):
+            duration_ms = int((datetime.now() - datetime.fromisoformat(state["started_at"])).total_seconds() * 1000)
+        update_job_stage(
+            job_id, stage,
+            status=status,
+            completed_at=datetime.now().isoformat(),
+            duration_ms=duration_ms,
+            error=error
+        )
 
 def load_companies():
     """Load companies data from file"""
@@ -54,10 +365,37 @@ def load_companies():
             return json.load(f)
     return []
 
+def reindex_search():
+    """Index everything already stored: companies, their pages and their latest generated content"""
+    companies = load_companies()
+    index_company_records(companies)
+    for company in companies:
+        manifest = page_store.load_manifest(company['name'])
+        if manifest:
+            index_company_pages(company['name'], manifest.get('pages', []))
+        scraped_data = company.get('scraped_data') or {}
+        index_generated_content(company['name'], "research", scraped_data.get('perplexity_research'))
+        index_generated_content(company['name'], "fake_customer_account", scraped_data.get('fake_customer_account'))
+        for field, kind in GENERATED_CONTENT_FIELDS.items():
+            entries = company.get(field) or []
+            if entries and isinstance(entries[-1], dict):
+                index_generated_content(company['name'], kind, dict(entries[-1], success=True))
+    return search_index.stats()
+
 def save_companies(companies):
     """Save companies data to file"""
-    with open(COMPANIES_FILE, 'w') as f:
-        json.dump(companies, f, indent=2)
+    write_json_atomic(COMPANIES_FILE, companies)
+    try:
+        index_company_records(companies)
+    except Exception as e:
+        print(f"Error indexing companies for search: {e}")
+
+def write_json_atomic(file_path, data):
+    """Write JSON via a temp file and rename, so readers never see a half-written file"""
+    tmp_path = f"{file_path}.tmp-{threading.get_ident()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, file_path)
 
 def save_scraped_data(company_name, data):
     """Save scraped data for a company"""
@@ -65,8 +403,229 @@ def save_scraped_data(company_name, data):
     os.makedirs(company_dir, exist_ok=True)
     
     file_path = os.path.join(company_dir, "scraped_data.json")
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2)
+    write_json_atomic(file_path, data)
+
+def load_scraped_data(company_name):
+    """Load the last saved scraped data for a company"""
+    file_path = os.path.join(SCRAPED_DIR, company_name.lower().replace(' ', '_'), "scraped_data.json")
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading scraped data: {e}")
+    return None
+
+def content_hash(*parts):
+    """Stable fingerprint of one or more strings"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+LLM_ENDPOINTS = {
+    "perplexity": "https://api.perplexity.ai/chat/completions",
+    "openai": "https://api.openai.com/v1/chat/completions"
+}
+
+def post_chat_completion(provider, data, timeout=30, prompt_name=None, company_name=None):
+    """Send a chat completion request once the provider's shared rate-limit budget allows it.
+    
+    Background and batch work wait behind the interactive reserve; see current_priority.
+    Every call is recorded in the usage ledger.
+    """
+    if not rate_limiter.acquire(provider, current_priority.get(), timeout):
+        raise Exception(f"{provider} rate limit budget exhausted")
+    
+    api_key = PERPLEXITY_API_KEY if provider == "perplexity" else OPENAI_API_KEY
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    started = time.time()
+    response = None
+    try:
+        response = requests.post(LLM_ENDPOINTS[provider], headers=headers, json=data, timeout=timeout)
+        return response
+    finally:
+        usage = {}
+        model = data.get("model")
+        if response is not None and response.status_code == 200:
+            try:
+                result = response.json()
+                usage = result.get('usage') or {}
+                model = result.get('model') or model
+            except ValueError:
+                pass
+        record_usage(
+            provider, model, prompt_name, company_name,
+            usage=usage,
+            latency_ms=int((time.time() - started) * 1000),
+            success=response is not None and response.status_code == 200,
+            cache_status="miss"
+        )
+
+def usage_endpoint():
+    """What an upstream call is made for: the Flask endpoint, or the background work running it"""
+    if has_request_context() and request.endpoint:
+        return request.endpoint
+    return current_endpoint.get() or "background"
+
+def run_for_endpoint(endpoint, func, *args):
+    """Run func with its upstream calls attributed to endpoint in the usage ledger"""
+    token = current_endpoint.set(endpoint)
+    try:
+        return func(*args)
+    finally:
+        current_endpoint.reset(token)
+
+# Prompt name -> (file mtime, short hash of its text), so ledger writes only stat the prompt file
+prompt_hashes = {}
+
+def prompt_hash(prompt_name):
+    """Short hash of a prompt's current text, re-read only when the file changes"""
+    try:
+        mtime = os.stat(os.path.join(PROMPTS_DIR, f"{prompt_name}.txt")).st_mtime_ns
+    except OSError:
+        return None
+    cached = prompt_hashes.get(prompt_name)
+    if cached is None or cached[0] != mtime:
+        prompt_template = load_prompt(prompt_name)
+        cached = (mtime, content_hash(prompt_template)[:16] if prompt_template else None)
+        prompt_hashes[prompt_name] = cached
+    return cached[1]
+
+def record_usage(provider, model, prompt_name, company_name, usage=None, latency_ms=None, success=True, cache_status="miss", **extra):
+    """Append one upstream call or store hit to the usage ledger"""
+    usage = usage or {}
+    prompt_tokens = usage.get('prompt_tokens') or 0
+    completion_tokens = usage.get('completion_tokens') or 0
+    
+    prices = next(
+        (price for prefix, price in sorted(MODEL_PRICES_PER_1K.items(), key=lambda p: -len(p[0]))
+         if model and model.startswith(prefix)),
+        (0.0, 0.0)
+    )
+    
+    usage_ledger.record(
+        provider=provider,
+        model=model,
+        endpoint=usage_endpoint(),
+        prompt_name=prompt_name,
+        prompt_hash=prompt_hash(prompt_name) if prompt_name else None,
+        company=company_name,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=usage.get('total_tokens') or prompt_tokens + completion_tokens,
+        cost_usd=round((prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000, 6) if cache_status == "miss" else 0.0,
+        latency_ms=latency_ms,
+        success=success,
+        cache_status=cache_status,
+        **extra
+    )
+
+# Cache statuses of a result served from a store rather than generated
+STORE_HIT_STATUSES = ("fresh", "stale", "pinned")
+
+def record_store_hit(provider, prompt_name, company_name, result, started):
+    """Record a result served from a research or generation store without an upstream call"""
+    cache_status = (result.get("cache") or {}).get("status")
+    if cache_status in STORE_HIT_STATUSES:
+        record_usage(
+            provider, result.get("model"), prompt_name, company_name,
+            latency_ms=int((time.time() - started) * 1000),
+            cache_status=cache_status
+        )
+    return result
+
+def index_generated_content(company_name, kind, result):
+    """Index a successful generated result as the company's latest of kind, by section and for search"""
+    if isinstance(result, dict) and result.get("success") and result.get("content"):
+        try:
+            section_index.update(company_name, kind, result["content"], {"model": result.get("model")})
+        except Exception as e:
+            print(f"Error indexing {kind} sections for {company_name}: {e}")
+        try:
+            search_index.upsert(
+                f"{kind}:{company_name.lower()}", company_name, kind, result["content"],
+                title=f"{company_name} {kind.replace('_', ' ')}"
+            )
+        except Exception as e:
+            print(f"Error indexing {kind} for search for {company_name}: {e}")
+    return result
+
+# Company record arrays of generated content -> the kind they are indexed as
+GENERATED_CONTENT_FIELDS = {
+    "market_analysis": "market_analysis",
+    "personas": "personas",
+    "fake_customer_accounts": "fake_customer_account",
+    "prospect_expansions": "prospect_expansion"
+}
+
+def store_generated_entry(company, field, entry, result, reuse=False):
+    """Add a generated entry to a company's field, collapsing it into a near-identical stored entry.
+    
+    The result reports the entry it duplicates; with reuse (opt-in per request)
+    its content is replaced by the stored entry's, so callers keep working from
+    one copy.
+    """
+    stored, distance = add_artifact(company.setdefault(field, []), entry, DUPLICATE_MAX_DISTANCE)
+    if distance is not None:
+        result["duplicate_of"] = stored.get("id")
+        result["duplicate_count"] = stored["duplicate_count"]
+        result["similarity"] = similarity(distance)
+        if reuse:
+            result["content"] = stored["content"]
+            result["reused"] = True
+    return stored
+
+def is_new_generation(entries, result):
+    """Whether a result should be stored: it was generated now, or it is not stored yet"""
+    if (result.get("cache") or {}).get("status") not in STORE_HIT_STATUSES:
+        return True
+    return find_duplicate(entries or [], fingerprint(result['content']), 0) is None
+
+def collapse_company_duplicates(companies):
+    """Collapse near-identical generated entries of every company; returns the entries removed per field"""
+    removed = {field: 0 for field in GENERATED_CONTENT_FIELDS}
+    for company in companies:
+        for field in GENERATED_CONTENT_FIELDS:
+            if isinstance(company.get(field), list):
+                company[field], count = collapse_duplicates(company[field], DUPLICATE_MAX_DISTANCE)
+                removed[field] += count
+    return removed
+
+def index_company_records(companies):
+    """Index company names, industries and URLs for search; only changed companies are re-indexed"""
+    indexed = search_index.content_hashes("company")
+    current = set()
+    for company in companies:
+        doc_id = f"company:{company['name'].lower()}"
+        current.add(doc_id)
+        industry = company.get('industry') or ''
+        url = (company.get('scraped_data') or {}).get('url') or company.get('url')
+        body = " ".join(part for part in (company['name'], industry, url) if part)
+        key = content_hash(body)
+        if indexed.get(doc_id) != key:
+            search_index.upsert(doc_id, company['name'], "company", body, title=company['name'],
+                                industry=industry, url=url, content_hash=key)
+    search_index.delete(doc_id for doc_id in indexed if doc_id not in current)
+
+def index_company_pages(company_name, pages):
+    """Index a company's stored pages for search, reading only pages whose content changed"""
+    indexed = search_index.content_hashes("page", company_name)
+    current = set()
+    for page in pages:
+        doc_id = f"page:{company_name.lower()}:{page['url']}"
+        current.add(doc_id)
+        if indexed.get(doc_id) == page["content_hash"]:
+            continue
+        text = page_store.read_chunks(page["content_hash"])
+        if text is not None:
+            search_index.upsert(doc_id, company_name, "page", text, title=page["url"],
+                                url=page["url"], content_hash=page["content_hash"])
+    search_index.delete(doc_id for doc_id in indexed if doc_id not in current)
 
 def load_prompt(prompt_name):
     """Load a prompt from the prompts directory"""
@@ -84,7 +643,78 @@ def save_prompt(prompt_name, content):
     with open(prompt_path, 'w') as f:
         f.write(content)
 
-def get_perplexity_research(company_name, industry=None):
+def get_perplexity_research(company_name, industry=None, timeout=30, refresh=False, source="request"):
+    """Get company research, served from the research store while it is fresh (or stale, refreshing it).
+    
+    The result's "cache" entry reports how it was served and its age.
+    refresh fetches new research unless the company is pinned.
+    """
+    started = time.time()
+    key = content_hash(load_prompt("sales_research_prompt"), company_name, industry)
+    result = research_store.get(
+        company_name, key,
+        lambda: fetch_perplexity_research(company_name, industry, timeout),
+        refresh=refresh,
+        timeout=timeout,
+        source=source
+    )
+    record_store_hit("perplexity", "sales_research_prompt", company_name, result, started)
+    return index_generated_content(company_name, "research", result)
+
+def get_market_analysis(company_name, industry, timeout=30, refresh=False, source="request"):
+    """Get market analysis, served from the generation store like get_perplexity_research"""
+    started = time.time()
+    key = content_hash("market_analysis", load_prompt("market_analysis_prompt"), company_name, industry)
+    result = generation_store.get(
+        company_name, key,
+        lambda: generate_market_analysis(company_name, industry, timeout),
+        refresh=refresh,
+        timeout=timeout,
+        source=source
+    )
+    record_store_hit("perplexity", "market_analysis_prompt", company_name, result, started)
+    return index_generated_content(company_name, "market_analysis", result)
+
+def get_buyer_personas(company_name, industry, scraped_content=None, ai_research=None, timeout=30, refresh=False, source="request"):
+    """Get generated buyer personas, served from the generation store for the same inputs"""
+    started = time.time()
+    if not scraped_content:
+        scraped_content = page_store.read_company_text(company_name, PROMPT_SCRAPED_CONTENT_CHARS)
+    ai_research_content = ai_research.get('content', '') if isinstance(ai_research, dict) else str(ai_research or '')
+    
+    key = content_hash(
+        "buyer_personas", load_prompt("persona_prompt"), company_name, industry,
+        scraped_content, ai_research_content
+    )
+    result = generation_store.get(
+        company_name, key,
+        lambda: generate_buyer_personas(company_name, industry, scraped_content, ai_research, timeout),
+        refresh=refresh,
+        timeout=timeout,
+        source=source
+    )
+    record_store_hit("openai", "persona_prompt", company_name, result, started)
+    return index_generated_content(company_name, "personas", result)
+
+def get_persona_enrichment(company_name, industry, company_stage, persona_roles, scraped_content=None, ai_research=None, refresh=False):
+    """Get company-specific persona additions, served from the generation store for the same inputs"""
+    started = time.time()
+    if not scraped_content:
+        scraped_content = page_store.read_company_text(company_name, PROMPT_SCRAPED_CONTENT_CHARS)
+    ai_research_content = ai_research.get('content', '') if isinstance(ai_research, dict) else str(ai_research or '')
+    
+    key = content_hash(
+        "persona_enrichment", load_prompt("persona_enrich_prompt"), company_name, industry, company_stage,
+        json.dumps(persona_roles, sort_keys=True), scraped_content, ai_research_content
+    )
+    result = generation_store.get(
+        company_name, key,
+        lambda: generate_persona_enrichment(company_name, industry, company_stage, persona_roles, scraped_content, ai_research),
+        refresh=refresh
+    )
+    return record_store_hit("openai", "persona_enrich_prompt", company_name, result, started)
+
+def fetch_perplexity_research(company_name, industry=None, timeout=30):
     """Get company research from Perplexity API"""
     if not PERPLEXITY_API_KEY:
         return {
@@ -107,14 +737,6 @@ def get_perplexity_research(company_name, industry=None):
         else:
             prompt = prompt.replace("[INSERT INDUSTRY HERE]", "Unknown Industry")
         
-        # Perplexity API endpoint
-        url = "https://api.perplexity.ai/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "model": "sonar",
             "messages": [
@@ -128,7 +750,7 @@ def get_perplexity_research(company_name, industry=None):
             "top_p": 0.9
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = post_chat_completion("perplexity", data, timeout=timeout, prompt_name="sales_research_prompt", company_name=company_name)
         
         if response.status_code == 200:
             result = response.json()
@@ -156,7 +778,7 @@ def get_perplexity_research(company_name, industry=None):
             "usage": {}
         }
 
-def generate_buyer_personas(company_name, industry, scraped_content=None, ai_research=None):
+def generate_buyer_personas(company_name, industry, scraped_content=None, ai_research=None, timeout=30):
     """Generate buyer personas using OpenAI GPT API - simplified to return formatted text"""
     if not OPENAI_API_KEY:
         return {
@@ -180,20 +802,16 @@ def generate_buyer_personas(company_name, industry, scraped_content=None, ai_res
             else:
                 ai_research_content = str(ai_research)
         
+        # Fall back to the stored crawl, reading only the chunks the prompt has room for
+        if not scraped_content:
+            scraped_content = page_store.read_company_text(company_name, PROMPT_SCRAPED_CONTENT_CHARS)
+        
         # Replace placeholders with actual values, using defaults if not available
         prompt = prompt_template.replace("[COMPANY_NAME]", company_name)
-        prompt = prompt_template.replace("[INDUSTRY]", industry or "Unknown Industry")
-        prompt = prompt_template.replace("[WEBSITE]", "Company website")  # Default since we don't have website in this context
-        prompt = prompt_template.replace("[SCRAPED_CONTENT]", scraped_content or "No scraped content available")
-        prompt = prompt_template.replace("[AI_RESEARCH]", ai_research_content or "No AI research available")
-        
-        # OpenAI API endpoint
-        url = "https://api.openai.com/v1/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        prompt = prompt.replace("[INDUSTRY]", industry or "Unknown Industry")
+        prompt = prompt.replace("[WEBSITE]", "Company website")  # Default since we don't have website in this context
+        prompt = prompt.replace("[SCRAPED_CONTENT]", scraped_content or "No scraped content available")
+        prompt = prompt.replace("[AI_RESEARCH]", ai_research_content or "No AI research available")
         
         data = {
             "model": "gpt-4",
@@ -207,7 +825,7 @@ def generate_buyer_personas(company_name, industry, scraped_content=None, ai_res
             "temperature": 0.1
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = post_chat_completion("openai", data, timeout=timeout, prompt_name="persona_prompt", company_name=company_name)
         
         if response.status_code == 200:
             result = response.json()
@@ -237,7 +855,83 @@ def generate_buyer_personas(company_name, industry, scraped_content=None, ai_res
             "usage": {}
         }
 
-def generate_fake_customer_account(company_name, industry, ai_research=None):
+def generate_persona_enrichment(company_name, industry, company_stage, persona_roles, scraped_content=None, ai_research=None):
+    """Ask GPT-4 only for the company-specific additions to rule-engine personas.
+    
+    persona_roles maps persona key to role title. The generic persona material is
+    not sent; the parsed additions are returned under "insights", keyed by persona key.
+    """
+    if not OPENAI_API_KEY:
+        return {
+            "success": False,
+            "content": "OpenAI API key not configured. Please set OPENAI_API_KEY in your .env file.",
+            "model": "unknown",
+            "usage": {}
+        }
+    
+    try:
+        prompt_template = load_prompt("persona_enrich_prompt")
+        if not prompt_template:
+            raise Exception("Persona enrichment prompt not found")
+        
+        ai_research_content = ai_research.get('content', '') if isinstance(ai_research, dict) else str(ai_research or '')
+        
+        prompt = prompt_template.replace("[COMPANY_NAME]", company_name)
+        prompt = prompt.replace("[INDUSTRY]", industry or "Unknown Industry")
+        prompt = prompt.replace("[COMPANY_STAGE]", company_stage)
+        prompt = prompt.replace("[PERSONA_ROLES]", "; ".join(f"{key}: {role}" for key, role in persona_roles.items()))
+        prompt = prompt.replace("[SCRAPED_CONTENT]", scraped_content or "No scraped content available")
+        prompt = prompt.replace("[AI_RESEARCH]", ai_research_content or "No AI research available")
+        
+        data = {
+            "model": "gpt-4",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": 1500,
+            "temperature": 0.1
+        }
+        
+        response = post_chat_completion("openai", data, timeout=30, prompt_name="persona_enrich_prompt", company_name=company_name)
+        
+        if response.status_code == 200:
+            result = response.json()
+            content = result['choices'][0]['message']['content']
+            
+            # Keep the raw text if the model did not answer with the requested JSON
+            match = re.search(r"\{.*\}", content, re.DOTALL)
+            try:
+                insights = json.loads(match.group(0)) if match else None
+            except json.JSONDecodeError:
+                insights = None
+            
+            return {
+                "success": True,
+                "content": content,
+                "insights": {key: value for key, value in insights.items() if key in persona_roles} if isinstance(insights, dict) else {},
+                "model": result['model'],
+                "usage": result.get('usage', {})
+            }
+        else:
+            return {
+                "success": False,
+                "content": f"API request failed with status {response.status_code}",
+                "model": "unknown",
+                "usage": {}
+            }
+            
+    except Exception as e:
+        return {
+            "success": False,
+            "content": f"Error: {str(e)}",
+            "model": "unknown",
+            "usage": {}
+        }
+
+def generate_fake_customer_account(company_name, industry, ai_research=None, timeout=30):
     """Generate a fake customer account using OpenAI GPT API and the fake user prompt"""
     if not OPENAI_API_KEY:
         return {
@@ -263,16 +957,8 @@ def generate_fake_customer_account(company_name, industry, ai_research=None):
         
         # Replace placeholders with actual values
         prompt = prompt_template.replace("[COMPANY_NAME]", company_name)
-        prompt = prompt_template.replace("[INDUSTRY]", industry or "Unknown Industry")
-        prompt = prompt_template.replace("[AI_RESEARCH]", ai_research_content or "No AI research available")
-        
-        # OpenAI API endpoint
-        url = "https://api.openai.com/v1/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        prompt = prompt.replace("[INDUSTRY]", industry or "Unknown Industry")
+        prompt = prompt.replace("[AI_RESEARCH]", ai_research_content or "No AI research available")
         
         data = {
             "model": "gpt-4",
@@ -286,7 +972,7 @@ def generate_fake_customer_account(company_name, industry, ai_research=None):
             "temperature": 0.7  # Slightly higher creativity for realistic fake accounts
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = post_chat_completion("openai", data, timeout=timeout, prompt_name="fake_user_prompt", company_name=company_name)
         
         if response.status_code == 200:
             result = response.json()
@@ -341,6 +1027,10 @@ def generate_prospect_expansion(company_name, industry, existing_customer_accoun
             else:
                 customer_account_content = str(existing_customer_account)
         
+        # Fall back to the company's latest indexed fake customer account
+        if not customer_account_content or customer_account_content.strip() == "":
+            customer_account_content = section_index.get_content(company_name, "fake_customer_account")
+        
         # Ensure we have content to work with
         if not customer_account_content or customer_account_content.strip() == "":
             return {
@@ -352,16 +1042,14 @@ def generate_prospect_expansion(company_name, industry, existing_customer_accoun
         
         # Replace placeholders with actual values
         prompt = prompt_template.replace("[EXISTING_CUSTOMER_ACCOUNT]", customer_account_content or "No customer account available")
-        prompt = prompt_template.replace("[COMPANY_NAME]", company_name)
-        prompt = prompt_template.replace("[INDUSTRY]", industry or "Unknown Industry")
-        
-        # OpenAI API endpoint
-        url = "https://api.openai.com/v1/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        prompt = prompt.replace("[COMPANY_NAME]", company_name)
+        prompt = prompt.replace("[INDUSTRY]", industry or "Unknown Industry")
+        if "[RESEARCH_SECTIONS]" in prompt:
+            # Only the relevant sections of the stored research, not the whole report
+            research_sections = section_index.section_text(
+                company_name, PROSPECT_RESEARCH_SECTIONS, ["research"], PROMPT_SECTION_CHARS
+            )
+            prompt = prompt.replace("[RESEARCH_SECTIONS]", research_sections or "No research available")
         
         data = {
             "model": "gpt-4",
@@ -375,7 +1063,7 @@ def generate_prospect_expansion(company_name, industry, existing_customer_accoun
             "temperature": 0.7  # Slightly higher creativity for realistic prospects
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = post_chat_completion("openai", data, timeout=30, prompt_name="prospect_expansion_prompt", company_name=company_name)
         
         if response.status_code == 200:
             result = response.json()
@@ -406,7 +1094,7 @@ def generate_prospect_expansion(company_name, industry, existing_customer_accoun
             "usage": {}
         }
 
-def generate_market_analysis(company_name, industry):
+def generate_market_analysis(company_name, industry, timeout=30):
     """Generate market analysis using Perplexity API"""
     if not PERPLEXITY_API_KEY:
         return {
@@ -426,14 +1114,6 @@ def generate_market_analysis(company_name, industry):
         prompt = prompt_template.replace("[COMPANY_NAME]", company_name or "Unknown Company")
         prompt = prompt.replace("[INDUSTRY]", industry or "Unknown Industry")
         
-        # Perplexity API endpoint
-        url = "https://api.perplexity.ai/chat/completions"
-        
-        headers = {
-            "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "model": "sonar",
             "messages": [
@@ -447,7 +1127,7 @@ def generate_market_analysis(company_name, industry):
             "top_p": 0.9
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = post_chat_completion("perplexity", data, timeout=timeout, prompt_name="market_analysis_prompt", company_name=company_name)
         
         if response.status_code == 200:
             result = response.json()
@@ -476,201 +1156,430 @@ def generate_market_analysis(company_name, industry):
             "usage": {}
         }
 
-def run_scrape_sync(job_id, url, company_name, industry):
-    """Run the actual scraping job in a separate thread"""
+def crawl_company_site(job_id, url, on_progress=None, cancel_event=None, force_refresh=False, previous_pages=None):
+    """Crawl the company website and return (firecrawl job id, processed content).
+    
+    A crawl of the same normalized URL and options younger than the cache TTL
+    is reused without contacting Firecrawl, unless force_refresh is set.
+    """
+    started = time.time()
+    company_name = crawl_jobs[job_id]["company_name"]
+    if force_refresh:
+        crawl_cache.record_bypass()
+    else:
+        cached = crawl_cache.get(url, CRAWL_OPTIONS)
+        if cached:
+            update_job_stage(job_id, "crawl", cache="hit")
+            if on_progress:
+                on_progress(cached["processed_content"])
+            record_usage("firecrawl", None, None, company_name, latency_ms=int((time.time() - started) * 1000), cache_status="hit")
+            return cached["firecrawl_job_id"], cached["processed_content"]
+    
+    update_job_stage(job_id, "crawl", cache="bypass" if force_refresh else "miss")
     try:
-        crawl_jobs[job_id]["status"] = "running"
-        
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # Initialize Firecrawl
-        app = AsyncFirecrawlApp(api_key=FIRECRAWL_API_KEY)
-        
-        # Step 1: Start both Firecrawl and Perplexity concurrently
-        import concurrent.futures
-        
-        def run_firecrawl():
-            """Run Firecrawl scraping"""
+        crawl_job_id, processed_content = crawl_with_firecrawl(job_id, url, on_progress, cancel_event, force_refresh, previous_pages)
+    except Exception:
+        record_usage(
+            "firecrawl", None, None, company_name,
+            latency_ms=int((time.time() - started) * 1000),
+            success=False,
+            cache_status="bypass" if force_refresh else "miss"
+        )
+        raise
+    record_usage(
+        "firecrawl", None, None, company_name,
+        latency_ms=int((time.time() - started) * 1000),
+        cache_status="bypass" if force_refresh else "miss",
+        pages=len({entry["url"] for entry in processed_content})
+    )
+    crawl_cache.put(url, CRAWL_OPTIONS, {
+        "firecrawl_job_id": crawl_job_id,
+        "processed_content": processed_content
+    })
+    return crawl_job_id, processed_content
+
+def crawl_with_firecrawl(job_id, url, on_progress=None, cancel_event=None, force_refresh=False, previous_pages=None):
+    """Crawl the company website with Firecrawl and return (firecrawl job id, processed content).
+    
+    While the crawl is polled, pages extracted so far are passed to on_progress.
+    The Firecrawl crawl is cancelled if the job is cancelled or the crawl stage
+    runs past its deadline.
+    """
+    cancel_event = cancel_event or threading.Event()
+    deadline = time.time() + SCRAPE_CRAWL_DEADLINE_SECONDS
+    known_pages = dict(previous_pages or {})
+    
+    if not rate_limiter.acquire("firecrawl", current_priority.get(), SCRAPE_CRAWL_DEADLINE_SECONDS):
+        raise StageTimeout("Firecrawl rate limit budget exhausted before the crawl deadline")
+    crawl_response = firecrawl_runner.run(lambda firecrawl_app: firecrawl_app.async_crawl_url(
+        url=url,
+        limit=CRAWL_OPTIONS["limit"],
+        max_depth=CRAWL_OPTIONS["max_depth"],
+        scrape_options=ScrapeOptions(
+            formats=CRAWL_OPTIONS["formats"],
+            onlyMainContent=CRAWL_OPTIONS["only_main_content"],
+            parsePDF=False,
+            # A forced refresh must not be served from Firecrawl's own cache either
+            maxAge=0 if force_refresh else CRAWL_CACHE_TTL_SECONDS * 1000
+        )
+    ), timeout=SCRAPE_CRAWL_DEADLINE_SECONDS)
+    
+    if not crawl_response:
+        raise Exception("Firecrawl failed to start")
+    
+    # Check if the response is already completed (immediate completion)
+    if hasattr(crawl_response, 'status') and crawl_response.status == 'completed':
+        status_response = crawl_response
+        crawl_job_id = f"immediate-{job_id}"
+    else:
+        # Extract job ID from the response for background job
+        crawl_job_id = None
+        
+        # Check if response is a dict (cURL response) or object (SDK response)
+        if isinstance(crawl_response, dict):
+            # Handle dict response (cURL style)
+            if 'id' in crawl_response:
+                crawl_job_id = crawl_response['id']
+            elif 'job_id' in crawl_response:
+                crawl_job_id = crawl_response['job_id']
+        else:
+            # Handle SDK response object
+            if hasattr(crawl_response, 'id'):
+                crawl_job_id = crawl_response.id
+            elif hasattr(crawl_response, 'job_id'):
+                crawl_job_id = crawl_response.job_id
+            elif hasattr(crawl_response, 'success') and crawl_response.success:
+                # Try to get from response data
+                if hasattr(crawl_response, 'data') and hasattr(crawl_response.data, 'id'):
+                    crawl_job_id = crawl_response.data.id
+        
+        if not crawl_job_id:
+            raise Exception(f"Could not extract job ID from response")
+        
+        # Poll for completion and get results (only for background jobs)
+        while True:
+            if cancel_event.is_set() or time.time() > deadline:
+                # Stop the crawl upstream so it does not keep consuming credits
+                try:
+                    firecrawl_runner.run(lambda firecrawl_app: firecrawl_app.cancel_crawl(crawl_job_id), timeout=10)
+                except Exception as e:
+                    print(f"Error cancelling Firecrawl crawl {crawl_job_id}: {str(e)}")
+                if cancel_event.is_set():
+                    raise JobCancelled("Job cancelled")
+                raise StageTimeout(f"Crawl timed out after {SCRAPE_CRAWL_DEADLINE_SECONDS} seconds")
+            
+            status = None
             try:
-                crawl_response = loop.run_until_complete(app.crawl_url(
-                    url=url,
-                    limit=2,
-                    max_depth=1,
-                    scrape_options=ScrapeOptions(
-                        formats=['markdown', 'html'],
-                        onlyMainContent=True,
-                        parsePDF=False,
-                        maxAge=14400000
-                    )
-                ))
-                return crawl_response
+                if not rate_limiter.acquire("firecrawl", current_priority.get(), max(deadline - time.time(), 0)):
+                    continue
+                status_response = firecrawl_runner.run(
+                    lambda firecrawl_app: firecrawl_app.check_crawl_status(crawl_job_id),
+                    timeout=max(deadline - time.time(), 1)
+                )
+                
+                # Handle both dict and object responses
+                if isinstance(status_response, dict):
+                    status = status_response.get('status')
+                else:
+                    status = getattr(status_response, 'status', None)
+                
+                if on_progress:
+                    partial_content = process_crawl_data(status_response, known_pages)
+                    # Pages extracted on this poll are not extracted again on the next
+                    known_pages.update(index_pages(partial_content))
+                    on_progress(partial_content)
             except Exception as e:
+                # Transient polling errors are retried until the deadline
+                print(f"Error checking Firecrawl crawl {crawl_job_id}: {str(e)}")
+            
+            if status == 'completed':
+                break
+            elif status == 'failed':
+                error_msg = "Unknown error"
+                if isinstance(status_response, dict):
+                    error_msg = status_response.get('error', error_msg)
+                else:
+                    error_msg = getattr(status_response, 'error', error_msg)
+                raise Exception(f"Crawl failed: {error_msg}")
+            
+            # Wait before the next check, waking early on cancellation
+            cancel_event.wait(SCRAPE_POLL_INTERVAL_SECONDS)
+    
+    processed_content = process_crawl_data(status_response, known_pages)
+    if on_progress:
+        on_progress(processed_content)
+    
+    return crawl_job_id, processed_content
+
+def crawl_field(obj, name):
+    """Read a field from a Firecrawl dict or SDK object"""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+def page_content_hash(item):
+    """Fingerprint of everything a crawled page contributes to processed content"""
+    metadata = crawl_field(item, 'metadata') or {}
+    return content_hash(
+        crawl_field(item, 'markdown'),
+        crawl_field(item, 'html'),
+        crawl_field(metadata, 'title'),
+        crawl_field(metadata, 'description')
+    )
+
+def index_pages(processed_content):
+    """Group processed content by page URL, keeping each page's content hash"""
+    pages = {}
+    for entry in processed_content:
+        if not entry.get("content_hash"):
+            continue
+        page = pages.setdefault(entry["url"], {"content_hash": entry["content_hash"], "items": []})
+        page["items"].append(entry)
+    return pages
+
+def process_crawl_data(status_response, previous_pages=None):
+    """Turn the pages of a Firecrawl status response into processed content items.
+    
+    Pages whose content hash matches previous_pages (from the last scrape) are
+    not reprocessed; their previous items are reused. Changed pages go through
+    the page extractor (boilerplate removal, HTML-to-markdown, normalization).
+    """
+    previous_pages = previous_pages or {}
+    
+    # Extract data from status response - handle both dict and object
+    data = None
+    if isinstance(status_response, dict):
+        data = status_response.get('data', [])
+    else:
+        data = getattr(status_response, 'data', [])
+    
+    # Reuse unchanged pages from the previous scrape; extract the rest in the worker pool
+    # Each page is either its reused items or the index of a changed page
+    page_order = []
+    changed_pages = []
+    for item in data or []:
+        page_hash = page_content_hash(item)
+        page_url = crawl_field(item, 'url') or ''
+        previous = previous_pages.get(page_url)
+        if previous and previous["content_hash"] == page_hash:
+            page_order.append(previous["items"])
+            continue
+        
+        metadata = crawl_field(item, 'metadata') or {}
+        changed_pages.append({
+            "url": page_url,
+            "content_hash": page_hash,
+            "markdown": crawl_field(item, 'markdown'),
+            "html": crawl_field(item, 'html'),
+            "title": crawl_field(metadata, 'title'),
+            "description": crawl_field(metadata, 'description')
+        })
+        page_order.append(len(changed_pages) - 1)
+    
+    extracted = page_extractor.extract(changed_pages)
+    
+    processed_content = []
+    for page in page_order:
+        if isinstance(page, list):
+            processed_content.extend(page)
+            continue
+        
+        # Keep the full page; it is moved into the chunked page store when the job is saved
+        raw, fields = changed_pages[page], extracted[page]
+        for item_type in ("markdown", "title", "description"):
+            if fields[item_type]:
+                processed_content.append({
+                    "type": item_type,
+                    "url": raw["url"],
+                    "content": fields[item_type],
+                    "content_hash": raw["content_hash"]
+                })
+    
+    return processed_content
+
+def store_pages(company_name, processed_content):
+    """Move full page content into the chunked page store, keeping a short preview inline.
+    
+    Also rewrites the company's page manifest to list the pages of this scrape.
+    """
+    stored_content = []
+    manifest_pages = []
+    for entry in processed_content:
+        if entry["type"] in ("markdown", "html") and entry.get("content_hash"):
+            if "chunk_count" not in entry:
+                layout = page_store.store_page(entry["content_hash"], entry["content"])
+                entry = dict(
+                    entry,
+                    content=entry["content"][:PAGE_PREVIEW_CHARS],
+                    length=layout["length"],
+                    chunk_count=layout["chunk_count"],
+                    chunk_size=layout["chunk_size"],
+                    truncated=layout["length"] > PAGE_PREVIEW_CHARS
+                )
+            if page_store.has_page(entry["content_hash"]):
+                manifest_pages.append({
+                    "url": entry["url"],
+                    "type": entry["type"],
+                    "content_hash": entry["content_hash"],
+                    "length": entry["length"],
+                    "chunk_count": entry["chunk_count"],
+                    "chunk_size": entry["chunk_size"]
+                })
+        stored_content.append(entry)
+    
+    page_store.save_manifest(company_name, manifest_pages)
+    try:
+        index_company_pages(company_name, manifest_pages)
+    except Exception as e:
+        print(f"Error indexing pages for search: {e}")
+    return stored_content
+
+def stage_output_hash(output):
+    """Fingerprint of a stage's outcome: whether it succeeded, and what it produced"""
+    if not isinstance(output, dict) or not output.get("success"):
+        return "failed"
+    return content_hash(output.get("content"))
+
+def run_scrape_sync(job_id, url, company_name, industry, force_refresh=False):
+    """Run the actual scraping job in a separate thread.
+    
+    The job is a small graph of stages, each started as soon as its own inputs
+    are ready: the Firecrawl crawl and Perplexity research start immediately,
+    and fake customer generation starts the moment research lands, overlapping
+    with the crawl. The result is assembled once every stage has finished.
+    
+    On a re-scrape, unchanged pages and stages whose inputs hash the same as
+    last time are reused instead of recomputed, unless force_refresh is set.
+    """
+    cancel_event = job_cancel_events.get(job_id) or threading.Event()
+    # One worker per stage so a stage waiting on its inputs never starves another
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+    try:
+        update_job(job_id, status="running")
+        
+        # What the last scrape of this company produced, for incremental reuse
+        previous = None if force_refresh else load_scraped_data(company_name)
+        previous_pages = index_pages(previous.get("processed_content", [])) if previous else {}
+        input_hashes = {
+            "perplexity_research": content_hash(load_prompt("sales_research_prompt"), company_name, industry)
+        }
+        
+        def reusable_output(stage):
+            """The previous output of a stage if it succeeded with identical inputs"""
+            if not previous or previous.get("input_hashes", {}).get(stage) != input_hashes[stage]:
                 return None
+            output = previous.get(stage)
+            if isinstance(output, dict) and output.get("success"):
+                return output
+            return None
+        
+        def reuse_output(stage, output):
+            """Stand-in for a stage whose inputs are unchanged"""
+            update_job_stage(job_id, stage, reused=True)
+            return output
+        
+        def publish_pages(processed_content):
+            """Publish crawled pages as soon as they are extracted"""
+            publish_partial_result(job_id, "processed_content", processed_content)
+        
+        def run_crawl():
+            """Run the Firecrawl crawl"""
+            return run_stage(
+                job_id, "crawl",
+                crawl_company_site, job_id, url, publish_pages, cancel_event, force_refresh, previous_pages
+            )
         
         def run_perplexity():
             """Run Perplexity research"""
             try:
-                return get_perplexity_research(company_name, industry)
+                reused = reusable_output("perplexity_research")
+                if reused:
+                    return run_stage(job_id, "perplexity_research", reuse_output, "perplexity_research", reused)
+                return run_stage(
+                    job_id, "perplexity_research",
+                    get_perplexity_research, company_name, industry, SCRAPE_RESEARCH_DEADLINE_SECONDS, force_refresh
+                )
             except Exception as e:
                 return None
         
-        # Run both tasks concurrently
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            firecrawl_future = executor.submit(run_firecrawl)
-            perplexity_future = executor.submit(run_perplexity)
-            
-            # Wait for both to complete
-            crawl_response = firecrawl_future.result()
+        def run_fake_customer():
+            """Generate the fake customer account as soon as research is available"""
             perplexity_research = perplexity_future.result()
+            input_hashes["fake_customer_account"] = content_hash(
+                load_prompt("fake_user_prompt"), company_name, industry,
+                (perplexity_research or {}).get("content")
+            )
+            reused = reusable_output("fake_customer_account")
+            if reused:
+                return run_stage(job_id, "fake_customer_account", reuse_output, "fake_customer_account", reused)
+            return run_stage(
+                job_id, "fake_customer_account",
+                generate_fake_customer_account, company_name, industry, perplexity_research,
+                SCRAPE_GENERATION_DEADLINE_SECONDS
+            )
         
-        # Step 2: Process Firecrawl results
-        if not crawl_response:
-            raise Exception("Firecrawl failed to start")
-        
-        # Check if the response is already completed (immediate completion)
-        if hasattr(crawl_response, 'status') and crawl_response.status == 'completed':
-            status_response = crawl_response
-            crawl_job_id = f"immediate-{job_id}"
-        else:
-            # Extract job ID from the response for background job
-            crawl_job_id = None
+        futures = {}
+        # Stages inherit the job's priority class for rate limiting
+        futures["crawl"] = executor.submit(contextvars.copy_context().run, run_crawl)
+        futures["perplexity_research"] = perplexity_future = executor.submit(contextvars.copy_context().run, run_perplexity)
+        futures["fake_customer_account"] = executor.submit(contextvars.copy_context().run, run_fake_customer)
+        
+        # Assemble once all stages have finished, been cancelled or run out of time
+        results = {}
+        pending = dict(futures)
+        while pending:
+            done, _ = concurrent.futures.wait(pending.values(), timeout=0.5)
             
-            # Check if response is a dict (cURL response) or object (SDK response)
-            if isinstance(crawl_response, dict):
-                # Handle dict response (cURL style)
-                if 'id' in crawl_response:
-                    crawl_job_id = crawl_response['id']
-                elif 'job_id' in crawl_response:
-                    crawl_job_id = crawl_response['job_id']
-            else:
-                # Handle SDK response object
-                if hasattr(crawl_response, 'id'):
-                    crawl_job_id = crawl_response.id
-                elif hasattr(crawl_response, 'job_id'):
-                    crawl_job_id = crawl_response.job_id
-                elif hasattr(crawl_response, 'success') and crawl_response.success:
-                    # Try to get from response data
-                    if hasattr(crawl_response, 'data') and hasattr(crawl_response.data, 'id'):
-                        crawl_job_id = crawl_response.data.id
+            if cancel_event.is_set():
+                raise JobCancelled("Job cancelled")
             
-            if not crawl_job_id:
-                raise Exception(f"Could not extract job ID from response")
-            
-            # Step 3: Poll for completion and get results (only for background jobs)
-            max_attempts = 30  # 30 attempts with 10 second delays = 5 minutes max
-            for attempt in range(max_attempts):
-                try:
-                    status_response = loop.run_until_complete(app.check_crawl_status(crawl_job_id))
-                    
-                    # Handle both dict and object responses
-                    status = None
-                    if isinstance(status_response, dict):
-                        status = status_response.get('status')
-                    else:
-                        status = getattr(status_response, 'status', None)
-                    
-                    if status:
-                        if status == 'completed':
-                            break
-                        elif status == 'failed':
-                            error_msg = "Unknown error"
-                            if isinstance(status_response, dict):
-                                error_msg = status_response.get('error', error_msg)
-                            else:
-                                error_msg = getattr(status_response, 'error', error_msg)
-                            raise Exception(f"Crawl failed: {error_msg}")
-                        else:
-                            time.sleep(10)  # Wait 10 seconds before next check
-                    else:
-                        time.sleep(10)
-                except Exception as e:
-                    time.sleep(10)
-            else:
-                raise Exception("Crawl timed out after 5 minutes")
-        
-        # Step 4: Process the results from the status response
-        processed_content = []
-        
-        # Extract data from status response - handle both dict and object
-        data = None
-        if isinstance(status_response, dict):
-            data = status_response.get('data', [])
-        else:
-            data = getattr(status_response, 'data', [])
-        
-        if data:
-            for item in data:
-                # Handle both dict and object items
-                if isinstance(item, dict):
-                    # Dict item
-                    if 'markdown' in item and item['markdown']:
-                        processed_content.append({
-                            "type": "markdown",
-                            "url": item.get('url', ''),
-                            "content": item['markdown'][:5000] if len(item['markdown']) > 5000 else item['markdown']
-                        })
-                    elif 'html' in item and item['html']:
-                        processed_content.append({
-                            "type": "html",
-                            "url": item.get('url', ''),
-                            "content": item['html'][:2000] if len(item['html']) > 2000 else item['html']
-                        })
-                    
-                    # Extract metadata
-                    if 'metadata' in item and item['metadata']:
-                        metadata = item['metadata']
-                        if 'title' in metadata and metadata['title']:
-                            processed_content.append({
-                                "type": "title",
-                                "url": item.get('url', ''),
-                                "content": metadata['title']
-                            })
-                        
-                        if 'description' in metadata and metadata['description']:
-                            processed_content.append({
-                                "type": "description",
-                                "url": item.get('url', ''),
-                                "content": metadata['description']
-                            })
-                else:
-                    # Object item
-                    if hasattr(item, 'markdown') and item.markdown:
-                        processed_content.append({
-                            "type": "markdown",
-                            "url": getattr(item, 'url', ''),
-                            "content": item.markdown[:5000] if len(item.markdown) > 5000 else item.markdown
-                        })
-                    
-                    elif hasattr(item, 'html') and item.html:
-                        processed_content.append({
-                            "type": "html",
-                            "url": getattr(item, 'url', ''),
-                            "content": item.html[:2000] if len(item.html) > 2000 else item.html
-                        })
-                    
-                    # Extract metadata from object
-                    if hasattr(item, 'metadata') and item.metadata:
-                        metadata = item.metadata
-                        if hasattr(metadata, 'title') and metadata.title:
-                            processed_content.append({
-                                "type": "title",
-                                "url": getattr(item, 'url', ''),
-                                "content": metadata.title
-                            })
-                        
-                        if hasattr(metadata, 'description') and metadata.description:
-                            processed_content.append({
-                                "type": "description",
-                                "url": getattr(item, 'url', ''),
-                                "content": metadata.description
-                            })
-        
-        # Step 5: Perplexity research is already completed from concurrent execution
-        
-        # Step 6: Generate fake customer account using the fake user prompt
-        fake_customer_account = generate_fake_customer_account(company_name, industry, perplexity_research)
+            for stage, future in list(pending.items()):
+                if future in done:
+                    results[stage] = future.result()
+                    del pending[stage]
+                elif stage_expired(job_id, stage, datetime.now()):
+                    abandon_stage(job_id, stage, "timed_out", f"Stage exceeded its {STAGE_DEADLINES[stage]} second deadline")
+                    results[stage] = None
+                    del pending[stage]
+                    if stage == "crawl":
+                        raise StageTimeout(f"Crawl timed out after {SCRAPE_CRAWL_DEADLINE_SECONDS} seconds")
+                    if stage == "perplexity_research":
+                        # Fake customer generation depends on research
+                        abandon_stage(job_id, "fake_customer_account", "skipped", "Perplexity research timed out")
+                        results["fake_customer_account"] = None
+                        pending.pop("fake_customer_account", None)
+        
+        crawl_job_id, processed_content = results["crawl"]
+        perplexity_research = results["perplexity_research"]
+        fake_customer_account = results["fake_customer_account"]
+        # An abandoned stage thread may still write to input_hashes; store this snapshot
+        input_hashes = dict(input_hashes)
+        index_generated_content(company_name, "fake_customer_account", fake_customer_account)
+        
+        # Store full pages in the chunked page store
+        processed_content = store_pages(company_name, processed_content)
+        
+        # Report what was reused from the previous scrape
+        page_hashes = {entry["url"]: entry.get("content_hash") for entry in processed_content}
+        reused_pages = [
+            page_url for page_url, page_hash in page_hashes.items()
+            if page_url in previous_pages and previous_pages[page_url]["content_hash"] == page_hash
+        ]
+        # Stage outcomes count too: a stage that failed last time and succeeded now is a change
+        stage_outputs = {"perplexity_research": perplexity_research, "fake_customer_account": fake_customer_account}
+        fingerprint = content_hash(
+            url, industry,
+            *sorted(f"{page_url}:{page_hash}" for page_url, page_hash in page_hashes.items()),
+            *sorted(f"{stage}:{value}" for stage, value in input_hashes.items()),
+            *(f"{stage}:{stage_output_hash(output)}" for stage, output in sorted(stage_outputs.items()))
+        )
+        unchanged = bool(previous) and previous.get("fingerprint") == fingerprint
+        update_job(job_id, reused={
+            "pages_reused": len(reused_pages),
+            "pages_changed": len(page_hashes) - len(reused_pages),
+            "stages": [stage for stage, state in crawl_jobs[job_id]["stages"].items() if state.get("reused")],
+            "unchanged": unchanged
+        })
         
         # Process and store results
         scraped_data = {
@@ -684,41 +1593,163 @@ def run_scrape_sync(job_id, url, company_name, industry):
             "content_count": len(processed_content),
             "perplexity_research": perplexity_research,
             "fake_customer_account": fake_customer_account,  # Include fake customer account in scraped data
+            "input_hashes": input_hashes,
+            "fingerprint": fingerprint,
             "status": "completed"
         }        
-        # Save to file
-        save_scraped_data(company_name, scraped_data)
         
-        # Update job status
-        crawl_jobs[job_id]["status"] = "completed"
-        crawl_jobs[job_id]["result"] = scraped_data
+        # Update job status; the full result replaces the partial one
+        crawl_jobs.store_result(job_id, scraped_data)
+        update_job(job_id, status="completed", partial_result=None)
         
-        # Update companies data
-        companies = load_companies()
-        existing_company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
+        if unchanged:
+            # Nothing new to store; leave both files untouched
+            return
         
-        if existing_company:
-            existing_company['scraped_data'] = scraped_data
-            existing_company['industry'] = industry  # Update industry if it changed
-            existing_company['updated_at'] = datetime.now().isoformat()
-        else:
-            companies.append({
-                "name": company_name,
-                "industry": industry,  # Include industry when creating new company
-                "scraped_data": scraped_data,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            })
+        # Save to file
+        save_scraped_data(company_name, scraped_data)
         
-        save_companies(companies)
+        # Update companies data; concurrent jobs must not overwrite each other's update
+        with companies_lock:
+            companies = load_companies()
+            existing_company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
+            
+            if existing_company:
+                existing_company['scraped_data'] = scraped_data
+                existing_company['industry'] = industry  # Update industry if it changed
+                existing_company['updated_at'] = datetime.now().isoformat()
+            else:
+                companies.append({
+                    "name": company_name,
+                    "industry": industry,  # Include industry when creating new company
+                    "scraped_data": scraped_data,
+                    "created_at": datetime.now().isoformat(),
+                    "updated_at": datetime.now().isoformat()
+                })
+            
+            save_companies(companies)
         
-        loop.close()
+    except JobCancelled:
+        for stage in SCRAPE_STAGES:
+            abandon_stage(job_id, stage, "cancelled", "Job cancelled")
+        update_job(job_id, status="cancelled")
         
     except Exception as e:
         if hasattr(e, '__traceback__'):
             import traceback
-        crawl_jobs[job_id]["status"] = "failed"
-        crawl_jobs[job_id]["error"] = str(e)
+        # Stages still in flight fail with the job; "cancelled" is kept for user cancels
+        for stage in SCRAPE_STAGES:
+            abandon_stage(job_id, stage, "failed", str(e))
+        update_job(job_id, status="failed", error=str(e))
+    
+    finally:
+        # Do not wait for abandoned stages; they stop at their own timeouts
+        executor.shutdown(wait=False, cancel_futures=True)
+        cancel_event.set()
+
+def scrape_dedupe_key(url, company_name, industry):
+    """Submissions with the same key would produce the same result"""
+    return content_hash(normalize_url(url), company_name.strip().lower(), (industry or '').strip().lower())
+
+def submit_scrape_job(url, company_name, industry, batch_id=None, force_refresh=False, priority="interactive", caller="anonymous"):
+    """Register a scraping job and queue it on the shared scrape pool.
+    
+    If an equivalent job is queued, running or completed within the dedupe
+    window, the new job id is attached to it instead of doing the work again.
+    A forced refresh only attaches to another forced refresh still in flight.
+    Queued jobs start by priority class, sharing workers fairly between callers.
+    """
+    # Generate job ID
+    job_id = str(uuid.uuid4())
+    
+    # Apply result retention before taking on more work
+    crawl_jobs.evict()
+    
+    dedupe_key = scrape_dedupe_key(url, company_name, industry)
+    with job_updates:
+        existing_id = crawl_jobs.find_flight(dedupe_key, SCRAPE_DEDUPE_WINDOW_SECONDS, include_completed=not force_refresh)
+        if existing_id and (crawl_jobs[existing_id]["force_refresh"] or not force_refresh):
+            crawl_jobs.attach(job_id, existing_id)
+            existing = crawl_jobs[existing_id]
+            existing["attached_job_ids"].append(job_id)
+            # A queued job attached to by more urgent work moves up to its class
+            future = job_futures.get(existing_id)
+            if future and scrape_executor.promote(future, priority):
+                existing["priority"] = priority
+            return job_id
+        
+        crawl_jobs.start_flight(dedupe_key, job_id)
+        register_scrape_job(job_id, url, company_name, industry, batch_id, force_refresh)
+        crawl_jobs[job_id]["priority"] = priority
+    
+    job_cancel_events[job_id] = threading.Event()
+    future = scrape_executor.submit(
+        run_for_endpoint, "scrape_job", run_scrape_sync, job_id, url, company_name, industry, force_refresh,
+        priority=priority, caller=caller
+    )
+    job_futures[job_id] = future
+    future.add_done_callback(lambda f: (job_futures.pop(job_id, None), job_cancel_events.pop(job_id, None)))
+    
+    return job_id
+
+def register_scrape_job(job_id, url, company_name, industry, batch_id=None, force_refresh=False, status="pending"):
+    """Create the registry record of a scraping job"""
+    crawl_jobs[job_id] = {
+        "url": url,
+        "company_name": company_name,
+        "industry": industry,  # Store industry in job data
+        "batch_id": batch_id,
+        "force_refresh": force_refresh,
+        "status": status,
+        "created_at": datetime.now().isoformat(),
+        "stages": {stage: dict(new_stage_state(), status=status) for stage in SCRAPE_STAGES},
+        "partial_result": {
+            "processed_content": [],
+            "perplexity_research": None,
+            "fake_customer_account": None
+        },
+        "version": 0,
+        "result": None,
+        "error": None,
+        "attached_job_ids": []
+    }
+
+def request_caller():
+    """Fair-share identity of the caller: its API key (hashed) or its address"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return f"key:{content_hash(api_key)[:12]}"
+    return f"addr:{request.remote_addr}"
+
+def cancel_job(job_id):
+    """Cancel a queued job outright, or ask a running one to stop; returns True if the job was still active.
+    
+    Cancelling an attached job id only detaches it; the job it shares keeps running.
+    """
+    primary_id = crawl_jobs.resolve(job_id)
+    if primary_id != job_id:
+        with job_updates:
+            job = crawl_jobs.get(primary_id)
+            if not job or job["status"] not in ("pending", "running"):
+                return False
+            crawl_jobs.detach(job_id)
+            job["attached_job_ids"].remove(job_id)
+            register_scrape_job(job_id, job["url"], job["company_name"], job["industry"], status="cancelled")
+            crawl_jobs[job_id]["partial_result"] = None
+            job_updates.notify_all()
+        return True
+    
+    future = job_futures.get(job_id)
+    if future and future.cancel():
+        update_job(job_id, status="cancelled", partial_result=None)
+        return True
+    
+    cancel_event = job_cancel_events.get(job_id)
+    if cancel_event and not cancel_event.is_set():
+        cancel_event.set()
+        update_job(job_id, cancel_requested=True)
+        return True
+    return False
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -730,19 +1761,12 @@ def test_firecrawl():
     """Test Firecrawl API connectivity"""
     try:
         # Test with a simple scrape
-        
-        # Create new event loop for this request
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         try:
             # Try to scrape a simple page
-            result = loop.run_until_complete(app.scrape_url(
+            result = firecrawl_runner.run(lambda firecrawl_app: firecrawl_app.scrape_url(
                 'https://httpbin.org/html',
                 formats=['markdown']
-            ))
-            
-            loop.close()
+            ), timeout=60)
             
             # Extract only essential info for display
             result_summary = {
@@ -759,7 +1783,6 @@ def test_firecrawl():
             })
             
         except Exception as e:
-            loop.close()
             return jsonify({
                 "status": "error",
                 "message": "Firecrawl API test failed",
@@ -798,22 +1821,23 @@ def ingest_manual_pitch():
         }
         
         # Load existing companies and add/update
-        companies = load_companies()
-        existing_company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
-        
-        if existing_company:
-            existing_company['pitch'] = pitch_data
-            existing_company['updated_at'] = datetime.now().isoformat()
-        else:
-            companies.append({
-                "name": company_name,
-                "industry": industry,
-                "pitch": pitch_data,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            })
-        
-        save_companies(companies)
+        with companies_lock:
+            companies = load_companies()
+            existing_company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
+            
+            if existing_company:
+                existing_company['pitch'] = pitch_data
+                existing_company['updated_at'] = datetime.now().isoformat()
+            else:
+                companies.append({
+                    "name": company_name,
+                    "industry": industry,
+                    "pitch": pitch_data,
+                    "created_at": datetime.now().isoformat(),
+                    "updated_at": datetime.now().isoformat()
+                })
+            
+            save_companies(companies)
         
         return jsonify({
             "message": "Pitch ingested successfully",
@@ -833,69 +1857,250 @@ def start_scrape():
         if not data or 'url' not in data:
             return jsonify({"error": "URL is required"}), 400
         
-        url = data['url']
-        company_name = data.get('company_name', 'Unknown Company')
-        industry = data.get('industry', 'Unknown Industry')  # Extract industry from request
+        url = data['url']
+        company_name = data.get('company_name', 'Unknown Company')
+        industry = data.get('industry', 'Unknown Industry')  # Extract industry from request
+        
+        # Validate URL format
+        if not url.startswith(('http://', 'https://')):
+            return jsonify({"error": "Invalid URL format. Must start with http:// or https://"}), 400
+        
+        priority = data.get('priority', 'interactive')
+        if priority not in PRIORITY_CLASSES:
+            return jsonify({"error": f"priority must be one of {', '.join(PRIORITY_CLASSES)}"}), 400
+        
+        # Queue the scraping job, passing industry
+        job_id = submit_scrape_job(
+            url, company_name, industry,
+            force_refresh=bool(data.get('force_refresh', False)),
+            priority=priority,
+            caller=request_caller()
+        )
+        
+        attached_to = crawl_jobs.resolve(job_id)
+        
+        return jsonify({
+            "message": "Scraping job started" if attached_to == job_id else "Attached to an identical scraping job",
+            "job_id": job_id,
+            "attached_to": attached_to if attached_to != job_id else None,
+            "status": crawl_jobs[job_id]["status"],
+            "company_name": company_name,
+            "industry": industry  # Include industry in response
+        }), 202
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/pitch/ingest/scrape/<job_id>', methods=['DELETE'])
+def cancel_scrape(job_id):
+    """Cancel a scraping job; running jobs stop at their next checkpoint"""
+    if job_id not in crawl_jobs:
+        return jsonify({"error": "Job not found"}), 404
+    
+    job = crawl_jobs[job_id]
+    if job["status"] not in ("pending", "running") or not cancel_job(job_id):
+        return jsonify({"error": "Job already finished", "status": job["status"]}), 409
+    
+    return jsonify({
+        "message": "Cancellation requested",
+        "job_id": job_id,
+        "status": crawl_jobs[job_id]["status"]
+    }), 202
+
+@app.route('/api/pitch/ingest/batch', methods=['POST'])
+def start_batch_scrape():
+    """Start scraping jobs for a list of {url, company_name, industry} items"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('items'), list) or not data['items']:
+            return jsonify({"error": "A non-empty list of items is required"}), 400
         
-        # Validate URL format
-        if not url.startswith(('http://', 'https://')):
-            return jsonify({"error": "Invalid URL format. Must start with http:// or https://"}), 400
+        if len(data['items']) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"A batch may contain at most {BATCH_MAX_ITEMS} items"}), 400
         
-        # Generate job ID
-        job_id = str(uuid.uuid4())
+        priority = data.get('priority', 'batch')
+        if priority not in PRIORITY_CLASSES:
+            return jsonify({"error": f"priority must be one of {', '.join(PRIORITY_CLASSES)}"}), 400
+        caller = request_caller()
         
-        # Store job info including industry
-        crawl_jobs[job_id] = {
-            "url": url,
-            "company_name": company_name,
-            "industry": industry,  # Store industry in job data
-            "status": "pending",
+        batch_id = str(uuid.uuid4())
+        batch = {
+            "job_ids": [],
             "created_at": datetime.now().isoformat(),
-            "result": None,
-            "error": None
+            "cancelled": False
         }
+        crawl_jobs.add_batch(batch_id, batch)
         
-        # Start scraping in a separate thread, passing industry
-        thread = threading.Thread(target=run_scrape_sync, args=(job_id, url, company_name, industry))
-        thread.daemon = True
-        thread.start()
+        rejected = []
+        for index, item in enumerate(data['items']):
+            url = item.get('url', '') if isinstance(item, dict) else ''
+            
+            # Validate URL format
+            if not url.startswith(('http://', 'https://')):
+                rejected.append({
+                    "index": index,
+                    "url": url,
+                    "error": "Invalid URL format. Must start with http:// or https://"
+                })
+                continue
+            
+            job_id = submit_scrape_job(
+                url,
+                item.get('company_name', 'Unknown Company'),
+                item.get('industry', 'Unknown Industry'),
+                batch_id=batch_id,
+                force_refresh=bool(item.get('force_refresh', data.get('force_refresh', False))),
+                priority=priority,
+                caller=caller
+            )
+            batch["job_ids"].append(job_id)
         
         return jsonify({
-            "message": "Scraping job started",
-            "job_id": job_id,
-            "status": "pending",
-            "company_name": company_name,
-            "industry": industry  # Include industry in response
+            "message": "Batch scraping started",
+            "batch_id": batch_id,
+            "accepted": len(batch["job_ids"]),
+            "rejected": rejected,
+            "job_ids": batch["job_ids"]
         }), 202
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/pitch/ingest/scrape/<job_id>/status', methods=['GET'])
-def get_scrape_status(job_id):
-    """Get the status of a scraping job"""
-    if job_id not in crawl_jobs:
-        return jsonify({"error": "Job not found"}), 404
+@app.route('/api/pitch/ingest/batch/<batch_id>/status', methods=['GET'])
+def get_batch_status(batch_id):
+    """Get aggregate and per-item progress of a batch"""
+    batch = crawl_jobs.get_batch(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
     
-    job = crawl_jobs[job_id]
+    counts = {"pending": 0, "running": 0, "completed": 0, "failed": 0, "cancelled": 0, "expired": 0}
+    items = []
+    for job_id in list(batch["job_ids"]):
+        job = crawl_jobs.get(job_id)
+        if not job:
+            # The job record passed JOB_RECORD_TTL_SECONDS and was dropped
+            counts["expired"] += 1
+            items.append({"job_id": job_id, "status": "expired"})
+            continue
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+        items.append({
+            "job_id": job_id,
+            "url": job["url"],
+            "company_name": job["company_name"],
+            "status": job["status"],
+            "stages": {stage: state["status"] for stage, state in job["stages"].items()},
+            "error": job.get("error")
+        })
+    
+    finished = counts["completed"] + counts["failed"] + counts["cancelled"] + counts["expired"]
+    if batch["cancelled"]:
+        status = "cancelled"
+    elif finished == len(items):
+        status = "completed"
+    else:
+        status = "running"
+    
+    return jsonify({
+        "batch_id": batch_id,
+        "status": status,
+        "created_at": batch["created_at"],
+        "total": len(items),
+        "finished": finished,
+        "counts": counts,
+        "items": items
+    })
+
+@app.route('/api/pitch/ingest/batch/<batch_id>', methods=['DELETE'])
+def cancel_batch(batch_id):
+    """Cancel every job of a batch that is still queued or running"""
+    batch = crawl_jobs.get_batch(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+    
+    batch["cancelled"] = True
+    cancelled = [job_id for job_id in batch["job_ids"] if cancel_job(job_id)]
+    
+    return jsonify({
+        "message": "Batch cancelled",
+        "batch_id": batch_id,
+        "cancelled_jobs": len(cancelled)
+    })
+
+def build_job_status(job_id, job):
+    """Build the status payload for a scraping job"""
     response_data = {
         "job_id": job_id,
+        "attached_to": crawl_jobs.resolve(job_id) if crawl_jobs.resolve(job_id) != job_id else None,
         "status": job["status"],
         "company_name": job["company_name"],
         "industry": job.get("industry", "Unknown Industry"),  # Include industry in status
         "created_at": job["created_at"],
-        "url": job["url"]
+        "url": job["url"],
+        "priority": job.get("priority"),
+        "stages": job.get("stages", {})
     }
     
+    # Add what a re-scrape reused from the previous one
+    if job.get("reused"):
+        response_data["reused"] = job["reused"]
+    
     # Add error information if available
     if job.get("error"):
         response_data["error"] = job["error"]
     
-    # Add result information if completed
-    if job["status"] == "completed" and job.get("result"):
-        response_data["result"] = job["result"]
+    # Add result information if completed, otherwise whatever stages have published so far
+    if job["status"] == "completed":
+        result = crawl_jobs.load_result(job_id)
+        if result:
+            response_data["result"] = result
+    elif job.get("partial_result"):
+        response_data["partial_result"] = job["partial_result"]
+    
+    return response_data
+
+@app.route('/api/pitch/ingest/scrape/<job_id>/status', methods=['GET'])
+def get_scrape_status(job_id):
+    """Get the status of a scraping job"""
+    if job_id not in crawl_jobs:
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(build_job_status(job_id, crawl_jobs[job_id]))
+
+@app.route('/api/pitch/ingest/scrape/<job_id>/events', methods=['GET'])
+def stream_scrape_events(job_id):
+    """Stream job status updates as Server-Sent Events until the job finishes"""
+    if job_id not in crawl_jobs:
+        return jsonify({"error": "Job not found"}), 404
+    
+    def generate():
+        last_version = -1
+        while True:
+            with job_updates:
+                job = crawl_jobs[job_id]
+                if job.get("version", 0) == last_version:
+                    job_updates.wait(timeout=15)
+                if job.get("version", 0) == last_version:
+                    payload = None
+                else:
+                    last_version = job.get("version", 0)
+                    payload = build_job_status(job_id, job)
+            
+            if payload is None:
+                # Keep idle connections open through proxies
+                yield ": keep-alive\n\n"
+                continue
+            
+            yield f"event: update\ndata: {json.dumps(payload)}\n\n"
+            if payload["status"] not in ("pending", "running"):
+                yield f"event: end\ndata: {json.dumps({'status': payload['status']})}\n\n"
+                return
     
-    return jsonify(response_data)
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.route('/api/pitch/ingest/scrape/<job_id>/result', methods=['GET'])
 def get_scrape_result(job_id):
@@ -908,7 +2113,111 @@ def get_scrape_result(job_id):
     if job["status"] != "completed":
         return jsonify({"error": "Job not completed", "status": job["status"]}), 400
     
-    return jsonify(job["result"])
+    result = crawl_jobs.load_result(job_id)
+    if result is None:
+        return jsonify({"error": "Job result no longer available"}), 410
+    
+    return jsonify(result)
+
+@app.route('/api/cache/crawl/stats', methods=['GET'])
+def get_crawl_cache_stats():
+    """Get hit/miss statistics for the crawl cache"""
+    return jsonify(crawl_cache.stats())
+
+@app.route('/api/scheduler/stats', methods=['GET'])
+def get_scheduler_stats():
+    """Queue depth per priority class and shared rate-limit budgets"""
+    return jsonify({
+        "scrape": scrape_executor.stats(),
+        "rate_limits": rate_limiter.stats()
+    })
+
+@app.route('/api/cache/research/stats', methods=['GET'])
+def get_research_cache_stats():
+    """How research requests were served by the research store"""
+    return jsonify(research_store.stats())
+
+@app.route('/api/cache/generated/stats', methods=['GET'])
+def get_generation_cache_stats():
+    """How market analysis and persona requests were served by the generation store"""
+    return jsonify(generation_store.stats())
+
+@app.route('/api/prewarm/watchlist', methods=['GET'])
+def get_prewarm_watchlist():
+    """List the accounts refreshed during the off-peak window"""
+    return jsonify(prewarm_scheduler.list_watchlist())
+
+@app.route('/api/prewarm/watchlist', methods=['POST'])
+def add_to_prewarm_watchlist():
+    """Add {company_name, industry} items (or a single item) to the watchlist"""
+    try:
+        data = request.get_json() or {}
+        items = data.get('items', [data])
+        
+        added = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get('company_name'):
+                return jsonify({"error": "Each item needs a company_name"}), 400
+            added.append(prewarm_scheduler.add(item['company_name'], item.get('industry')))
+        
+        return jsonify({"added": added, "watchlist": len(prewarm_scheduler.list_watchlist())})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/prewarm/watchlist/<company_name>', methods=['DELETE'])
+def remove_from_prewarm_watchlist(company_name):
+    """Remove a company from the watchlist"""
+    if not prewarm_scheduler.remove(company_name):
+        return jsonify({"error": "Company not on watchlist"}), 404
+    return jsonify({"message": "Company removed from watchlist", "company_name": company_name})
+
+@app.route('/api/prewarm/run', methods=['POST'])
+def run_prewarm():
+    """Pre-warm the watchlist now instead of waiting for the window"""
+    try:
+        run = prewarm_scheduler.run_now()
+        return jsonify({"message": "Pre-warm started", "submitted": run["submitted"]}), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/prewarm/status', methods=['GET'])
+def get_prewarm_status():
+    """Window, watchlist size and progress of the last pre-warm run"""
+    return jsonify(prewarm_scheduler.status())
+
+@app.route('/api/usage/rollup', methods=['GET'])
+def get_usage_rollup():
+    """Token, cost and latency totals from the usage ledger, grouped by ?group_by= (day, endpoint, company, ...)"""
+    try:
+        group_by = request.args.get('group_by', 'day')
+        if group_by not in ROLLUP_FIELDS:
+            return jsonify({"error": f"group_by must be one of {', '.join(ROLLUP_FIELDS)}"}), 400
+        
+        filters = {field: request.args[field] for field in ROLLUP_FIELDS if field in request.args and field != group_by}
+        rows = usage_ledger.rollup(
+            group_by,
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            filters=filters
+        )
+        return jsonify({"group_by": group_by, "filters": filters, "rows": rows})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/usage/stats', methods=['GET'])
+def get_usage_stats():
+    """Usage ledger writer gauges"""
+    return jsonify(usage_ledger.stats())
+
+@app.route('/api/personas/library/stats', methods=['GET'])
+def get_persona_library_stats():
+    """Core persona library load state"""
+    return jsonify(persona_library.stats())
+
+@app.route('/api/jobs/stats', methods=['GET'])
+def get_job_stats():
+    """Get memory gauges for the scrape job registry"""
+    return jsonify(crawl_jobs.stats())
 
 @app.route('/api/pitch/companies', methods=['GET'])
 def get_companies():
@@ -916,6 +2225,25 @@ def get_companies():
     companies = load_companies()
     return jsonify(companies)
 
+@app.route('/api/pitch/companies/dedupe', methods=['POST'])
+def dedupe_companies():
+    """Collapse near-identical generated entries stored before write-time deduplication"""
+    try:
+        with companies_lock:
+            companies = load_companies()
+            size_before = os.path.getsize(COMPANIES_FILE) if os.path.exists(COMPANIES_FILE) else 0
+            removed = collapse_company_duplicates(companies)
+            save_companies(companies)
+            size_after = os.path.getsize(COMPANIES_FILE)
+        return jsonify({
+            "removed": removed,
+            "total_removed": sum(removed.values()),
+            "bytes_before": size_before,
+            "bytes_after": size_after
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/pitch/companies/<company_name>', methods=['GET'])
 def get_company(company_name):
     """Get specific company data"""
@@ -927,6 +2255,56 @@ def get_company(company_name):
     
     return jsonify(company)
 
+@app.route('/api/pitch/companies/<company_name>/pages', methods=['GET'])
+def get_company_pages(company_name):
+    """List the crawled pages stored for a company"""
+    manifest = page_store.load_manifest(company_name)
+    if not manifest:
+        return jsonify({"error": "No stored pages for company"}), 404
+    
+    return jsonify(manifest)
+
+@app.route('/api/pitch/companies/<company_name>/pages/<content_hash>', methods=['GET'])
+def get_company_page(company_name, content_hash):
+    """Get a stored page, or a range of its chunks with ?start=&end="""
+    manifest = page_store.load_manifest(company_name)
+    page = next((p for p in (manifest or {}).get("pages", []) if p["content_hash"] == content_hash), None)
+    
+    if not page:
+        return jsonify({"error": "Page not found"}), 404
+    
+    start = request.args.get('start', 0, type=int)
+    end = request.args.get('end', page["chunk_count"], type=int)
+    content = page_store.read_chunks(content_hash, start, end)
+    if content is None:
+        return jsonify({"error": "Page content not available"}), 404
+    
+    return jsonify({
+        **page,
+        "start": start,
+        "end": min(end, page["chunk_count"]),
+        "content": content
+    })
+
+@app.route('/api/pitch/companies/<company_name>/sections', methods=['GET'])
+def get_company_sections(company_name):
+    """List the indexed sections of a company's generated content, per kind"""
+    sections = section_index.list_sections(company_name)
+    if not sections:
+        return jsonify({"error": "No indexed sections for company"}), 404
+    
+    return jsonify({"company_name": company_name, "sections": sections})
+
+@app.route('/api/pitch/companies/<company_name>/sections/<section_name>', methods=['GET'])
+def get_company_section(company_name, section_name):
+    """Get a named section (e.g. pain-points) of a company's generated content, optionally of one ?kind="""
+    kind = request.args.get('kind')
+    sections = section_index.get_sections(company_name, section_name, [kind] if kind else None)
+    if not sections:
+        return jsonify({"error": "Section not found"}), 404
+    
+    return jsonify({"company_name": company_name, "section": section_name, "matches": sections})
+
 @app.route('/api/test/perplexity', methods=['GET'])
 def test_perplexity():
     """Test Perplexity API connectivity"""
@@ -934,7 +2312,7 @@ def test_perplexity():
         # Test with a simple company name and industry
         test_company = "Microsoft"
         test_industry = "Technology"
-        result = get_perplexity_research(test_company, test_industry)
+        result = fetch_perplexity_research(test_company, test_industry)
         
         if result.get("success"):
             return jsonify({
@@ -1065,11 +2443,22 @@ def research_company(company_name):
         data = request.get_json() or {}
         industry = data.get('industry', 'Unknown Industry')
         
-        research = get_perplexity_research(company_name, industry)
+        research = get_perplexity_research(company_name, industry, refresh=bool(data.get('refresh', False)))
         return jsonify(research)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/research/company/<company_name>/pin', methods=['POST'])
+def pin_company_research(company_name):
+    """Pin a company's research so it is always served as stored, or unpin it with {"pinned": false}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        pinned = bool(data.get('pinned', True))
+        research_store.pin(company_name, pinned)
+        return jsonify({"company_name": company_name, "pinned": pinned})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/market/analyze', methods=['POST'])
 def analyze_market():
     """Generate market analysis for a company"""
@@ -1089,22 +2478,23 @@ def analyze_market():
                 company_name = companies[0]['name']
                 industry = companies[0].get('industry', 'Unknown Industry')
         
-        # Generate market analysis
-        result = generate_market_analysis(company_name, industry)
+        # Generate market analysis, or serve the stored one
+        result = get_market_analysis(company_name, industry, refresh=bool(data.get('refresh', False)))
         
         if result['success']:
             # Save market analysis to company data
-            companies = load_companies()
-            company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
-            
-            if company:
-                if 'market_analysis' not in company:
-                    company['market_analysis'] = []
-                company['market_analysis'].append({
-                    "content": result['content'],
-                    "created_at": datetime.now().isoformat()
-                })
-                save_companies(companies)
+            with companies_lock:
+                companies = load_companies()
+                company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
+                
+                # A stored analysis already saved to the company is not added again
+                if company and is_new_generation(company.get('market_analysis'), result):
+                    store_generated_entry(company, 'market_analysis', {
+                        "id": str(uuid.uuid4()),
+                        "content": result['content'],
+                        "created_at": datetime.now().isoformat()
+                    }, result, reuse=bool(data.get('reuse', False)))
+                    save_companies(companies)
         
         return jsonify(result)
         
@@ -1132,35 +2522,203 @@ def generate_personas():
                 company_name = companies[0]['name']
                 industry = companies[0].get('industry', 'Unknown Industry')
         
-        # Generate personas using GPT with the persona prompt
-        result = generate_buyer_personas(company_name, industry, scraped_content, ai_research)
+        # Generate personas using GPT with the persona prompt, or serve the stored ones
+        result = get_buyer_personas(
+            company_name, industry, scraped_content, ai_research,
+            refresh=bool(data.get('refresh', False))
+        )
         
         if result['success']:
             # Save personas to company data
-            companies = load_companies()
-            company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
-            
-            if company:
-                if 'personas' not in company:
-                    company['personas'] = []
-                # Store the generated content as a persona entry
-                company['personas'].append({
-                    "id": str(uuid.uuid4()),
-                    "type": "ai_generated",
-                    "content": result['content'],
-                    "company_name": company_name,
-                    "industry": industry,
-                    "created_at": datetime.now().isoformat(),
-                    "model": result.get('model', 'unknown'),
-                    "usage": result.get('usage', {})
-                })
-                save_companies(companies)
+            with companies_lock:
+                companies = load_companies()
+                company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
+                
+                # Stored personas already saved to the company are not added again
+                if company and is_new_generation(company.get('personas'), result):
+                    # Store the generated content as a persona entry, or count it against a near-identical one
+                    store_generated_entry(company, 'personas', {
+                        "id": str(uuid.uuid4()),
+                        "type": "ai_generated",
+                        "content": result['content'],
+                        "company_name": company_name,
+                        "industry": industry,
+                        "created_at": datetime.now().isoformat(),
+                        "model": result.get('model', 'unknown'),
+                        "usage": result.get('usage', {})
+                    }, result, reuse=bool(data.get('reuse', False)))
+                    save_companies(companies)
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/personas/customize', methods=['POST'])
+def customize_personas():
+    """Customize the core persona library for a company with the local rule engine (no LLM call).
+    
+    Returns the report ("format": text, markdown or json) and the CRM-ready payload. With "llm_enrich": true,
+    GPT-4 is asked only for company-specific additions, which are attached to
+    each persona as "company_insights".
+    """
+    try:
+        data = request.get_json() or {}
+        company_name = data.get('company_name')
+        if not company_name:
+            return jsonify({"error": "company_name is required"}), 400
+        industry = data.get('industry') or 'Unknown Industry'
+        scraped_content = data.get('scraped_content')
+        ai_research = data.get('ai_research')
+        ai_research_content = ai_research.get('content', '') if isinstance(ai_research, dict) else ai_research
+        output_format = data.get('format', 'text')
+        if output_format not in REPORT_FORMATS:
+            return jsonify({"error": f"format must be one of {', '.join(REPORT_FORMATS)}"}), 400
+        
+        result = customize_personas_for_company(
+            company_name, industry, data.get('company_stage'), scraped_content, ai_research_content, output_format
+        )
+        if not result['success']:
+            return jsonify(result), 500
+        
+        if data.get('llm_enrich'):
+            persona_roles = {persona['persona_key']: persona['base_role'] for persona in result['personas']}
+            enrichment = get_persona_enrichment(
+                company_name, industry, result['company_stage'], persona_roles,
+                scraped_content, ai_research, refresh=bool(data.get('refresh', False))
+            )
+            insights = enrichment.get('insights', {}) if enrichment['success'] else {}
+            for persona in result['personas']:
+                if persona['persona_key'] in insights:
+                    persona['company_insights'] = insights[persona['persona_key']]
+            # JSON reports carry the insights on the personas only
+            if output_format != 'json':
+                result['content'] += format_persona_insights(result['personas'])
+            result['enrichment'] = {
+                key: enrichment.get(key) for key in ("success", "model", "usage", "cache")
+            }
+            if not enrichment['success']:
+                result['enrichment']['error'] = enrichment['content']
         
+        result['crm'] = export_crm_ready_data(result['personas'], company_name, industry, result['company_stage'])
         return jsonify(result)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/personas/export', methods=['POST'])
+def export_personas():
+    """Stream rule-engine personas (or their opportunities, or reports) for many companies as NDJSON or CSV.
+    
+    Body: {"companies": "all" | [{company_name, industry, company_stage?}], "format": "ndjson" | "csv",
+    "rows": "personas" | "opportunities" | "reports", "report_format": "text" | "markdown" | "json"}.
+    "all" exports every tracked company.
+    """
+    try:
+        data = request.get_json() or {}
+        output_format = data.get('format', 'ndjson')
+        row_type = data.get('rows', 'personas')
+        if output_format not in ("ndjson", "csv"):
+            return jsonify({"error": "format must be ndjson or csv"}), 400
+        if row_type not in ("personas", "opportunities", "reports"):
+            return jsonify({"error": "rows must be personas, opportunities or reports"}), 400
+        report_format = data.get('report_format', 'text')
+        if report_format not in REPORT_FORMATS:
+            return jsonify({"error": f"report_format must be one of {', '.join(REPORT_FORMATS)}"}), 400
+        
+        core_data = load_core_personas()
+        if not core_data:
+            return jsonify({"error": "Core personas not found"}), 500
+        
+        companies = data.get('companies', 'all')
+        if companies == 'all':
+            specs = tracked_company_specs()
+        elif isinstance(companies, list) and all(isinstance(c, dict) and c.get('company_name') for c in companies):
+            specs = companies
+        else:
+            return jsonify({"error": "companies must be \"all\" or a list of {company_name, industry}"}), 400
+        
+        fields = {
+            "personas": PERSONA_EXPORT_FIELDS,
+            "opportunities": OPPORTUNITY_EXPORT_FIELDS,
+            "reports": REPORT_EXPORT_FIELDS
+        }[row_type]
+        filename = f"{row_type}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{'csv' if output_format == 'csv' else 'ndjson'}"
+        return Response(
+            stream_with_context(stream_export_rows(persona_export_rows(specs, core_data, row_type, report_format), fields, output_format)),
+            mimetype='text/csv' if output_format == 'csv' else 'application/x-ndjson',
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/leads/top', methods=['GET'])
+def get_top_leads():
+    """Best-ranked personas across every tracked company (?k=, optional company_stage, industry_category, persona_key filters)"""
+    try:
+        k = request.args.get('k', 20, type=int)
+        if k < 1:
+            return jsonify({"error": "k must be a positive integer"}), 400
+        
+        matrix = get_lead_matrix()
+        mask = None
+        for field in ("company_stage", "industry_category", "persona_key"):
+            if request.args.get(field):
+                field_mask = matrix.mask(field, request.args[field])
+                mask = field_mask if mask is None else mask & field_mask
+        
+        return jsonify({
+            "k": k,
+            "total_leads": len(matrix.rows),
+            "leads": matrix.top(k, mask)
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """Full-text search over companies, pages, research and generated content (?q=, kind, company, fields, limit, offset)"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+        limit = request.args.get('limit', 20, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if limit < 1 or limit > 100 or offset < 0:
+            return jsonify({"error": "limit must be between 1 and 100 and offset not negative"}), 400
+        fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+        unknown = [field for field in fields if field not in SEARCH_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}; use {', '.join(SEARCH_FIELDS)}"}), 400
+        
+        return jsonify(search_index.search(
+            query, limit=limit, offset=offset,
+            kind=request.args.get('kind'), company=request.args.get('company'), fields=fields
+        ))
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/search/stats', methods=['GET'])
+def search_stats():
+    """Indexed document counts per kind"""
+    try:
+        return jsonify(search_index.stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/search/reindex', methods=['POST'])
+def search_reindex():
+    """Index companies, pages and generated content stored before the search index existed"""
+    try:
+        return jsonify(reindex_search())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/fake-customer/generate', methods=['POST'])
 def generate_fake_customer():
     """Generate a fake customer account for a company"""
@@ -1183,27 +2741,27 @@ def generate_fake_customer():
         
         # Generate fake customer account using the fake user prompt
         result = generate_fake_customer_account(company_name, industry, ai_research)
+        index_generated_content(company_name, "fake_customer_account", result)
         
         if result['success']:
             # Save fake customer account to company data
-            companies = load_companies()
-            company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
-            
-            if company:
-                if 'fake_customer_accounts' not in company:
-                    company['fake_customer_accounts'] = []
-                # Store the generated content as a fake customer account entry
-                company['fake_customer_accounts'].append({
-                    "id": str(uuid.uuid4()),
-                    "type": "ai_generated",
-                    "content": result['content'],
-                    "company_name": company_name,
-                    "industry": industry,
-                    "created_at": datetime.now().isoformat(),
-                    "model": result.get('model', 'unknown'),
-                    "usage": result.get('usage', {})
-                })
-                save_companies(companies)
+            with companies_lock:
+                companies = load_companies()
+                company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
+                
+                if company:
+                    # Store the generated content as a fake customer account entry, or count it against a near-identical one
+                    store_generated_entry(company, 'fake_customer_accounts', {
+                        "id": str(uuid.uuid4()),
+                        "type": "ai_generated",
+                        "content": result['content'],
+                        "company_name": company_name,
+                        "industry": industry,
+                        "created_at": datetime.now().isoformat(),
+                        "model": result.get('model', 'unknown'),
+                        "usage": result.get('usage', {})
+                    }, result, reuse=bool(data.get('reuse', False)))
+                    save_companies(companies)
         
         return jsonify(result)
         
@@ -1232,28 +2790,28 @@ def generate_prospect_expansion_endpoint():
         
         # Generate prospect expansion opportunities
         result = generate_prospect_expansion(company_name, industry, existing_customer_account)
+        index_generated_content(company_name, "prospect_expansion", result)
         
         if result.get('success'):
             # Save prospect expansion to company data
-            companies = load_companies()
-            company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
-            
-            if company:
-                if 'prospect_expansions' not in company:
-                    company['prospect_expansions'] = []
-                # Store the generated content as a prospect expansion entry
-                company['prospect_expansions'].append({
-                    "id": str(uuid.uuid4()),
-                    "type": "ai_generated",
-                    "content": result['content'],
-                    "company_name": company_name,
-                    "industry": industry,
-                    "existing_customer_account": existing_customer_account,
-                    "created_at": datetime.now().isoformat(),
-                    "model": result.get('model', 'unknown'),
-                    "usage": result.get('usage', {})
-                })
-                save_companies(companies)
+            with companies_lock:
+                companies = load_companies()
+                company = next((c for c in companies if c['name'].lower() == company_name.lower()), None)
+                
+                if company:
+                    # Store the generated content as a prospect expansion entry, or count it against a near-identical one
+                    store_generated_entry(company, 'prospect_expansions', {
+                        "id": str(uuid.uuid4()),
+                        "type": "ai_generated",
+                        "content": result['content'],
+                        "company_name": company_name,
+                        "industry": industry,
+                        "existing_customer_account": existing_customer_account,
+                        "created_at": datetime.now().isoformat(),
+                        "model": result.get('model', 'unknown'),
+                        "usage": result.get('usage', {})
+                    }, result, reuse=bool(data.get('reuse', False)))
+                    save_companies(companies)
         
         return jsonify(result)
         
@@ -1279,33 +2837,28 @@ def get_personas(company_name):
         return jsonify({"error": str(e)}), 500
 
 def load_core_personas():
-    """Load the core persona library"""
-    try:
-        core_personas_path = os.path.join(DATA_DIR, "core_personas.json")
-        if os.path.exists(core_personas_path):
-            with open(core_personas_path, 'r') as f:
-                return json.load(f)
-        return None
-    except Exception as e:
-        print(f"Error loading core personas: {str(e)}")
-        return None
+    """Get the current core persona library snapshot (None if it could not be loaded)"""
+    return persona_library.get()
 
-def customize_personas_for_company(company_name, industry, company_stage=None, scraped_content=None, ai_research=None):
+def customize_personas_for_company(company_name, industry, company_stage=None, scraped_content=None, ai_research=None, output_format="text"):
     """Customize core personas for a specific company based on context"""
     try:
         print(f"Customizing personas for {company_name} in {industry}")
         
-        # Load core personas
+        # One library snapshot serves the whole report
         core_data = load_core_personas()
         if not core_data:
             raise Exception("Core personas not found")
         
         # Determine company stage if not provided
+        classification = {}
         if not company_stage:
-            company_stage = determine_company_stage(company_name, industry, scraped_content, ai_research)
+            classification["company_stage"] = classify_company_stage(company_name, scraped_content, ai_research)
+            company_stage = classification["company_stage"]["label"]
         
         # Determine industry category
-        industry_category = determine_industry_category(industry)
+        classification["industry_category"] = classify_industry(industry)
+        industry_category = classification["industry_category"]["label"]
         
         print(f"Company stage: {company_stage}, Industry category: {industry_category}")
         
@@ -1315,9 +2868,9 @@ def customize_personas_for_company(company_name, industry, company_stage=None, s
         # Customize each persona
         customized_personas = []
         for persona_key in relevant_personas:
-            base_persona = core_data["personas"][persona_key]
             customized = customize_single_persona(
-                base_persona, 
+                core_data,
+                persona_key,
                 company_name, 
                 industry, 
                 company_stage, 
@@ -1327,8 +2880,16 @@ def customize_personas_for_company(company_name, industry, company_stage=None, s
             )
             customized_personas.append(customized)
         
-        # Format the output
-        output = format_customized_personas(customized_personas, company_name, industry, company_stage)
+        # Format the output; everything below the header depends only on the combination and persona set
+        report_key = ("report", output_format, *core_data.combination(industry_category, company_stage), tuple(relevant_personas))
+        output = join_report(
+            format_persona_report_header(company_name, industry, company_stage, output_format),
+            core_data.memoize(
+                report_key,
+                lambda: format_persona_report_body(customized_personas, industry_category, company_stage, core_data, output_format)
+            ),
+            output_format
+        )
         
         return {
             "success": True,
@@ -1336,6 +2897,7 @@ def customize_personas_for_company(company_name, industry, company_stage=None, s
             "personas": customized_personas,
             "company_stage": company_stage,
             "industry_category": industry_category,
+            "classification": classification,
             "confidence_score": 0.95
         }
         
@@ -1348,35 +2910,28 @@ def customize_personas_for_company(company_name, industry, company_stage=None, s
             "usage": {}
         }
 
+def classify_company_stage(company_name, scraped_content=None, ai_research=None):
+    """Weighted keyword vote for company stage over scraped content and AI research.
+    
+    Without scraped_content the company's stored pages are read chunk by chunk.
+    Returns the label, its confidence (share of votes), the votes and the matched keywords.
+    """
+    if isinstance(ai_research, dict):
+        ai_research = ai_research.get('content', '')
+    pages = page_store.iter_company_chunks(company_name) if scraped_content is None else [scraped_content]
+    return taxonomy_classifier.classify("company_stage", itertools.chain(pages, [" ", ai_research]))
+
+def classify_industry(industry):
+    """Weighted keyword vote for industry category over the industry name"""
+    return taxonomy_classifier.classify("industry_category", [industry])
+
 def determine_company_stage(company_name, industry, scraped_content=None, ai_research=None):
     """Determine company stage based on available information"""
-    # Simple heuristic - could be enhanced with AI analysis
-    if scraped_content and ai_research:
-        content = f"{scraped_content} {ai_research}".lower()
-        if any(word in content for word in ["startup", "seed", "series a", "early stage"]):
-            return "startup"
-        elif any(word in content for word in ["growth", "series b", "series c", "scaling"]):
-            return "growth"
-        elif any(word in content for word in ["enterprise", "public", "fortune", "global"]):
-            return "enterprise"
-    
-    # Default based on industry
-    if industry.lower() in ["predictive procurement software", "enterprise software"]:
-        return "growth"  # Most enterprise software companies are growth stage
-    return "growth"
+    return classify_company_stage(company_name, scraped_content, ai_research)["label"]
 
 def determine_industry_category(industry):
     """Determine industry category for persona customization"""
-    industry_lower = industry.lower()
-    if any(word in industry_lower for word in ["software", "saas", "tech"]):
-        return "saas"
-    elif any(word in industry_lower for word in ["manufacturing", "industrial"]):
-        return "manufacturing"
-    elif any(word in industry_lower for word in ["healthcare", "medical"]):
-        return "healthcare"
-    elif any(word in industry_lower for word in ["financial", "banking", "insurance"]):
-        return "financial_services"
-    return "saas"  # Default
+    return classify_industry(industry)["label"]
 
 def select_relevant_personas(industry, company_stage):
     """Select which personas are most relevant for this company"""
@@ -1397,32 +2952,14 @@ def select_relevant_personas(industry, company_stage):
     
     return base_personas
 
-def customize_single_persona(base_persona, company_name, industry, company_stage, industry_category, scraped_content=None, ai_research=None):
+def customize_single_persona(core_data, persona_key, company_name, industry, company_stage, industry_category, scraped_content=None, ai_research=None):
     """Customize a single persona with company-specific context"""
-    core_data = load_core_personas()
-    
-    # Start with base persona
-    customized = base_persona.copy()
-    
-    # Add industry-specific modifiers
-    if industry_category in core_data["industry_modifiers"]:
-        industry_mod = core_data["industry_modifiers"][industry_category]
-        customized["priorities"] = base_persona["core_priorities"] + industry_mod["priority_additions"]
-        customized["pain_points"] = base_persona["core_pain_points"] + industry_mod["pain_point_additions"]
-        customized["decision_criteria"] = base_persona["core_decision_criteria"] + industry_mod["decision_criteria_additions"]
-    else:
-        customized["priorities"] = base_persona["core_priorities"]
-        customized["pain_points"] = base_persona["core_pain_points"]
-        customized["decision_criteria"] = base_persona["core_decision_criteria"]
-    
-    # Add stage-specific modifiers
-    if company_stage in core_data["company_stage_modifiers"]:
-        stage_mod = core_data["company_stage_modifiers"][company_stage]
-        customized["priorities"].extend(stage_mod["priority_additions"])
-        customized["pain_points"].extend(stage_mod["pain_point_additions"])
-        customized["decision_criteria"].extend(stage_mod["decision_criteria_additions"])
+    # The customized body (base persona plus industry and stage modifiers) is memoized per
+    # combination and read-only; only the company-specific fields are stamped per request
+    customized = dict(core_data.persona_body(persona_key, industry_category, company_stage))
     
     # Add company-specific context
+    customized["persona_key"] = persona_key
     customized["company_name"] = company_name
     customized["industry"] = industry
     customized["company_stage"] = company_stage
@@ -1431,108 +2968,39 @@ def customize_single_persona(base_persona, company_name, industry, company_stage
     
     return customized
 
-def format_customized_personas(personas, company_name, industry, company_stage):
-    """Format customized personas into clean, focused raw text"""
-    output = f"STRATEGIC PERSONA ANALYSIS FOR {company_name.upper()}\n"
-    output += f"Industry: {industry} | Stage: {company_stage.title()}\n\n"
-    
-    # Add strategic context
-    core_data = load_core_personas()
-    if core_data:
-        industry_context = core_data["industry_modifiers"].get(determine_industry_category(industry), {}).get("land_expand_context", "")
-        stage_context = core_data["company_stage_modifiers"].get(company_stage, {}).get("land_expand_context", "")
-        
-        if industry_context or stage_context:
-            output += "STRATEGIC CONTEXT:\n"
-            if industry_context:
-                output += f"• Industry Focus: {industry_context}\n"
-            if stage_context:
-                output += f"• Stage Strategy: {stage_context}\n"
-            output += "\n"
-    
-    # Add land-and-expand roadmap
-    output += "LAND-AND-EXPAND ROADMAP:\n"
-    output += "Based on market research and company analysis, here's your strategic approach:\n\n"
-    
-    for i, persona in enumerate(personas):
-        output += f"PERSONA {i+1}: {persona['base_role']}\n"
-        output += f"Department: {persona['department']}\n"
-        output += f"Land & Expand Strategy: {persona['land_expand_strategy']}\n\n"
-        
-        output += f"WHY THIS PERSONA MATTERS:\n"
-        output += f"• {persona['sales_approach']}\n"
-        output += f"• {persona['expansion_opportunities']}\n\n"
-        
-        output += f"CHAMPION INDICATORS:\n"
-        for indicator in persona.get('champion_indicators', []):
-            output += f"• {indicator}\n"
-        output += "\n"
-        
-        output += f"EXPANSION PATHS:\n"
-        for path in persona.get('expansion_paths', []):
-            output += f"• {path}\n"
-        output += "\n"
-        
-        output += f"CUSTOMIZED INSIGHTS:\n"
-        output += f"Priorities:\n"
-        # Only show core priorities, not generic ones
-        core_priorities = [p for p in persona.get('priorities', []) if p not in ['Cloud security', 'API integration', 'Scalability', 'Data privacy', 'Process standardization', 'Market expansion', 'Operational efficiency']]
-        for priority in core_priorities[:5]:  # Limit to 5 most relevant
-            output += f"• {priority}\n"
-        output += f"\nPain Points:\n"
-        # Only show core pain points, not generic ones
-        core_pain_points = [p for p in persona.get('pain_points', []) if p not in ['Data privacy concerns', 'Vendor lock-in risks', 'Integration complexity', 'Growing pains', 'Process inefficiencies', 'Scaling challenges']]
-        for pain in core_pain_points[:5]:  # Limit to 5 most relevant
-            output += f"• {pain}\n"
-        output += f"\nDecision Criteria:\n"
-        # Only show core decision criteria, not generic ones
-        core_decision_criteria = [c for c in persona.get('decision_criteria', []) if c not in ['Cloud compliance', 'API ecosystem', 'Data sovereignty', 'Scalability', 'Ease of expansion', 'Process improvement']]
-        for criteria in core_decision_criteria[:5]:  # Limit to 5 most relevant
-            output += f"• {criteria}\n"
+def format_customized_personas(personas, company_name, industry, company_stage, core_data=None, output_format="text"):
+    """Format customized personas into a report (text, markdown or json)"""
+    return join_report(
+        format_persona_report_header(company_name, industry, company_stage, output_format),
+        format_persona_report_body(personas, determine_industry_category(industry), company_stage, core_data or load_core_personas(), output_format),
+        output_format
+    )
+
+def format_persona_report_header(company_name, industry, company_stage, output_format="text"):
+    """The company-specific part of a persona report"""
+    return render_header(company_name, industry, company_stage, output_format)
+
+def format_persona_report_body(personas, industry_category, company_stage, core_data, output_format="text"):
+    """The part of a persona report that does not depend on the company"""
+    industry_context, stage_context = core_data.land_expand_context(industry_category, company_stage) if core_data else ("", "")
+    return render_body(build_report_model(personas, industry_context, stage_context), output_format)
+
+def format_persona_insights(personas):
+    """Format LLM company-specific additions as a report section ("" if there are none)"""
+    seen = set()
+    output = ""
+    for persona in personas:
+        insights = persona.get('company_insights')
+        if not isinstance(insights, dict) or persona['persona_key'] in seen:
+            continue
+        seen.add(persona['persona_key'])
+        output += f"{persona['base_role']}:\n"
+        for item in (insights.get('priorities') or []) + (insights.get('pain_points') or []):
+            output += f"• {item}\n"
+        if insights.get('pitch'):
+            output += f"Pitch: {insights['pitch']}\n"
         output += "\n"
-        
-        output += f"SALES APPROACH:\n"
-        output += f"{persona['sales_approach']}\n\n"
-        
-        output += f"EXPANSION OPPORTUNITIES:\n"
-        output += f"{persona['expansion_opportunities']}\n\n"
-        
-        output += f"INFLUENCE & AUTHORITY:\n"
-        output += f"• Influence Level: {persona['influence_level']}\n"
-        output += f"• Budget Authority: {persona['budget_authority']}\n"
-        output += f"• Technical Expertise: {persona['technical_expertise']}\n\n"
-        
-        output += "-" * 60 + "\n\n"
-    
-    # Add strategic recommendations
-    output += "STRATEGIC RECOMMENDATIONS:\n"
-    output += "Based on this analysis:\n\n"
-    
-    # Identify primary champion
-    primary_champion = next((p for p in personas if p['influence_level'] == 'high' and p['budget_authority'] == 'high'), None)
-    if primary_champion:
-        output += f"1. PRIMARY CHAMPION: {primary_champion['base_role']}\n"
-        output += f"   Start here - they have the influence and budget to drive adoption.\n\n"
-    
-    # Identify operational champions
-    operational_champions = [p for p in personas if 'operations' in p['department'].lower()]
-    if operational_champions:
-        output += f"2. OPERATIONAL CHAMPIONS: {', '.join([p['base_role'] for p in operational_champions])}\n"
-        output += f"   These personas feel the daily pain and can demonstrate immediate value.\n\n"
-    
-    # Identify expansion targets
-    expansion_targets = [p for p in personas if p['influence_level'] == 'medium' and p['budget_authority'] == 'medium']
-    if expansion_targets:
-        output += f"3. EXPANSION TARGETS: {', '.join([p['base_role'] for p in expansion_targets])}\n"
-        output += f"   Once you have champions, expand to these personas for broader adoption.\n\n"
-    
-    output += "NEXT STEPS:\n"
-    output += "1. Identify your current champion or primary contact\n"
-    output += "2. Use the customized insights to tailor your pitch\n"
-    output += "3. Focus on the expansion paths to grow your footprint\n"
-    output += "4. Leverage industry and stage context for positioning\n\n"
-    
-    return output
+    return f"COMPANY-SPECIFIC INSIGHTS:\n\n{output}" if output else ""
 
 def export_crm_ready_data(personas, company_name, industry, company_stage):
     """Export personas in CRM-ready format for future integration"""
@@ -1550,7 +3018,10 @@ def export_crm_ready_data(personas, company_name, industry, company_stage):
         "expansion_paths": []
     }
     
-    for persona in personas:
+    # Score every persona in one vectorized pass
+    scores = score_personas(encode_personas(personas))
+    
+    for i, persona in enumerate(personas):
         # CRM-ready persona record
         crm_persona = {
             "id": persona["id"],
@@ -1569,10 +3040,10 @@ def export_crm_ready_data(personas, company_name, industry, company_stage):
             "expansion_opportunities": persona["expansion_opportunities"],
             "crm_fields": {
                 "lead_source": "ai_analysis",
-                "lead_score": calculate_lead_score(persona),
-                "next_action": determine_next_action(persona),
-                "expansion_potential": calculate_expansion_potential(persona),
-                "champion_likelihood": calculate_champion_likelihood(persona)
+                "lead_score": int(scores["lead_score"][i]),
+                "next_action": NEXT_ACTIONS[scores["next_action"][i]],
+                "expansion_potential": int(scores["expansion_potential"][i]),
+                "champion_likelihood": int(scores["champion_likelihood"][i])
             }
         }
         crm_data["personas"].append(crm_persona)
@@ -1605,91 +3076,259 @@ def export_crm_ready_data(personas, company_name, industry, company_stage):
     
     return crm_data
 
-def calculate_lead_score(persona):
-    """Calculate lead score based on persona characteristics"""
-    score = 0
+# Export columns: the per-company columns first, then columns shared by every company with the same persona combination
+PERSONA_EXPORT_FIELDS = (
+    ("company_name", "industry", "company_stage", "industry_category", "persona_id"),
+    ("persona_key", "title", "department", "influence_level", "budget_authority", "technical_expertise",
+     "lead_score", "next_action", "expansion_potential", "champion_likelihood", "land_expand_strategy",
+     "champion_indicators", "expansion_paths", "priorities", "pain_points", "decision_criteria", "sales_approach")
+)
+OPPORTUNITY_EXPORT_FIELDS = (
+    ("company_name", "industry", "company_stage", "persona_id"),
+    ("persona_key", "title", "opportunity_type", "priority", "detail")
+)
+REPORT_EXPORT_FIELDS = (
+    ("company_name", "industry", "company_stage", "industry_category", "report"),
+    ()
+)
+
+def company_stage_inputs(company):
+    """Scraped text and research text from a stored company record, for determine_company_stage.
     
-    # Influence level scoring
-    if persona["influence_level"] == "high":
-        score += 30
-    elif persona["influence_level"] == "medium":
-        score += 20
-    else:
-        score += 10
+    The scraped text is None when the company has stored pages, so they are
+    classified in full, chunk by chunk, as in /api/personas/customize; the
+    record's page previews are only used for companies scraped before pages
+    were stored.
+    """
+    scraped_data = company.get('scraped_data') or {}
+    scraped_text = None
+    if not page_store.load_manifest(company['name']):
+        scraped_text = " ".join(
+            entry.get('content') or '' for entry in scraped_data.get('processed_content') or []
+            if isinstance(entry, dict)
+        )
+    research = scraped_data.get('perplexity_research')
+    research_text = research.get('content', '') if isinstance(research, dict) else str(research or '')
+    return scraped_text, research_text
+
+def tracked_company_specs():
+    """Company specs (name, industry and stage inputs) for every tracked company"""
+    for company in load_companies():
+        scraped_text, research_text = company_stage_inputs(company)
+        yield {
+            "company_name": company['name'],
+            "industry": company.get('industry'),
+            "scraped_content": scraped_text,
+            "ai_research": research_text
+        }
+
+def build_lead_rows(core_data):
+    """Lead matrix inputs: one row per selected persona of each tracked company, pointing at its distinct persona body"""
+    rows, persona_indexes, personas = [], [], []
+    body_indexes = {}
+    for spec in tracked_company_specs():
+        industry = spec['industry'] or 'Unknown Industry'
+        company_stage = determine_company_stage(spec['company_name'], industry, spec['scraped_content'], spec['ai_research'])
+        industry_category = determine_industry_category(industry)
+        for persona_key in dict.fromkeys(select_relevant_personas(industry, company_stage)):
+            combination = (persona_key, *core_data.combination(industry_category, company_stage))
+            if combination not in body_indexes:
+                body_indexes[combination] = len(personas)
+                personas.append(core_data.persona_body(persona_key, industry_category, company_stage))
+            persona = personas[body_indexes[combination]]
+            rows.append({
+                "company_name": spec['company_name'],
+                "industry": industry,
+                "company_stage": company_stage,
+                "industry_category": industry_category,
+                "persona_key": persona_key,
+                "title": persona["base_role"],
+                "department": persona["department"]
+            })
+            persona_indexes.append(body_indexes[combination])
+    return rows, persona_indexes, personas
+
+def get_lead_matrix():
+    """The portfolio lead matrix, rebuilt only when companies.json or the persona library changed"""
+    core_data = load_core_personas()
+    if not core_data:
+        raise Exception("Core personas not found")
+    companies_version = None
+    if os.path.exists(COMPANIES_FILE):
+        stat = os.stat(COMPANIES_FILE)
+        companies_version = (stat.st_mtime_ns, stat.st_size)
+    return lead_index.get((companies_version, core_data.mtime, core_data.loaded_at), lambda: build_lead_rows(core_data))
+
+def crm_persona_fields(core_data, persona_key, industry_category, company_stage):
+    """Company-independent CRM fields of one customized persona, memoized per combination"""
+    def build():
+        persona = core_data.persona_body(persona_key, industry_category, company_stage)
+        scores = score_persona(persona)
+        return {
+            "persona_key": persona_key,
+            "title": persona["base_role"],
+            "department": persona["department"],
+            "influence_level": persona["influence_level"],
+            "budget_authority": persona["budget_authority"],
+            "technical_expertise": persona["technical_expertise"],
+            "lead_score": scores["lead_score"],
+            "next_action": scores["next_action"],
+            "expansion_potential": scores["expansion_potential"],
+            "champion_likelihood": scores["champion_likelihood"],
+            "land_expand_strategy": persona["land_expand_strategy"],
+            "champion_indicators": persona["champion_indicators"],
+            "expansion_paths": persona["expansion_paths"],
+            "priorities": persona["priorities"],
+            "pain_points": persona["pain_points"],
+            "decision_criteria": persona["decision_criteria"],
+            "sales_approach": persona["sales_approach"]
+        }
+    return core_data.memoize(("crm", persona_key, *core_data.combination(industry_category, company_stage)), build)
+
+def crm_opportunity_fields(core_data, persona_key, industry_category, company_stage):
+    """Company-independent opportunity rows of one customized persona, memoized per combination"""
+    def build():
+        fields = crm_persona_fields(core_data, persona_key, industry_category, company_stage)
+        persona_fields = {"persona_key": persona_key, "title": fields["title"]}
+        opportunities = []
+        if fields["influence_level"] == "high" and fields["budget_authority"] == "high":
+            opportunities.append({**persona_fields, "opportunity_type": "primary_champion", "priority": "high",
+                                  "detail": f"Primary expansion target - {fields['land_expand_strategy']}"})
+        for indicator in fields["champion_indicators"]:
+            opportunities.append({**persona_fields, "opportunity_type": "champion_indicator", "priority": "needs_validation", "detail": indicator})
+        for path in fields["expansion_paths"]:
+            opportunities.append({**persona_fields, "opportunity_type": "expansion_path", "priority": "identified", "detail": path})
+        return tuple(opportunities)
+    return core_data.memoize(("opportunities", persona_key, *core_data.combination(industry_category, company_stage)), build)
+
+def persona_export_rows(companies, core_data, row_type="personas", report_format="text"):
+    """Yield (company fields, shared fields) per customized persona (or per opportunity, or one report) for each company spec.
     
-    # Budget authority scoring
-    if persona["budget_authority"] == "high":
-        score += 25
-    elif persona["budget_authority"] == "medium":
-        score += 15
-    else:
-        score += 5
+    companies is an iterable of {company_name, industry, company_stage?, scraped_content?,
+    ai_research?}; rows are produced one company at a time, so memory stays bounded. The
+    shared fields are memoized per persona combination and must not be modified.
+    """
+    for spec in companies:
+        company_name = spec['company_name']
+        industry = spec.get('industry') or 'Unknown Industry'
+        company_stage = spec.get('company_stage') or determine_company_stage(
+            company_name, industry, spec.get('scraped_content'), spec.get('ai_research')
+        )
+        industry_category = determine_industry_category(industry)
+        
+        if row_type == "reports":
+            relevant_personas = select_relevant_personas(industry, company_stage)
+            body = core_data.memoize(
+                ("report", report_format, *core_data.combination(industry_category, company_stage), tuple(relevant_personas)),
+                lambda: format_persona_report_body(
+                    [core_data.persona_body(key, industry_category, company_stage) for key in relevant_personas],
+                    industry_category, company_stage, core_data, report_format
+                )
+            )
+            yield {
+                "company_name": company_name,
+                "industry": industry,
+                "company_stage": company_stage,
+                "industry_category": industry_category,
+                "report": join_report(format_persona_report_header(company_name, industry, company_stage, report_format), body, report_format)
+            }, {}
+            continue
+        
+        # A persona selected twice for a company is exported once
+        for persona_key in dict.fromkeys(select_relevant_personas(industry, company_stage)):
+            company_fields = {
+                "company_name": company_name,
+                "industry": industry,
+                "company_stage": company_stage,
+                "persona_id": str(uuid.uuid4())
+            }
+            if row_type == "personas":
+                company_fields["industry_category"] = industry_category
+                yield company_fields, crm_persona_fields(core_data, persona_key, industry_category, company_stage)
+            else:
+                for opportunity in crm_opportunity_fields(core_data, persona_key, industry_category, company_stage):
+                    yield company_fields, opportunity
+
+def csv_cell(value):
+    """One CSV cell, quoted the way the csv module quotes minimally"""
+    value = "" if value is None else str(value)
+    if any(char in value for char in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def stream_export_rows(rows, fields, output_format, batch_size=500):
+    """Serialize (company fields, shared fields) rows as NDJSON or CSV, yielding a chunk every batch_size rows.
     
-    # Technical expertise scoring
-    if persona["technical_expertise"] == "high":
-        score += 20
-    elif persona["technical_expertise"] == "medium":
-        score += 15
-    else:
-        score += 10
+    Shared fields are serialized once per distinct memoized object and reused for every
+    company, so only the few per-company columns are encoded per row.
+    """
+    company_columns, shared_columns = fields
+    buffer = io.StringIO()
+    # id(shared) -> (shared, serialized); holding shared keeps its id from being reused
+    serialized = {}
     
-    # Department scoring
-    if "executive" in persona["department"].lower():
-        score += 15
-    elif "operations" in persona["department"].lower():
-        score += 10
+    def serialize_shared(shared):
+        if output_format == "csv":
+            cell_buffer = io.StringIO()
+            csv.writer(cell_buffer, lineterminator="").writerow([
+                "; ".join(shared[column]) if isinstance(shared[column], (list, tuple)) else shared[column]
+                for column in shared_columns
+            ])
+            return cell_buffer.getvalue()
+        return json.dumps({column: shared[column] for column in shared_columns})[1:]
     
-    return min(score, 100)  # Cap at 100
+    if output_format == "csv":
+        buffer.write(",".join(company_columns + shared_columns) + "\r\n")
+    
+    count = 0
+    for company_fields, shared in rows:
+        shared_cells = None
+        if shared_columns:
+            cached = serialized.get(id(shared))
+            if cached is None:
+                cached = serialized[id(shared)] = (shared, serialize_shared(shared))
+            shared_cells = cached[1]
+        if output_format == "csv":
+            cells = [csv_cell(company_fields[column]) for column in company_columns]
+            buffer.write(",".join(cells + [shared_cells] if shared_cells is not None else cells) + "\r\n")
+        else:
+            encoded = json.dumps({column: company_fields[column] for column in company_columns})
+            buffer.write((encoded[:-1] + ", " + shared_cells if shared_cells is not None else encoded) + "\n")
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def calculate_lead_score(persona):
+    """Calculate lead score based on persona characteristics"""
+    return score_persona(persona)["lead_score"]
 
 def determine_next_action(persona):
     """Determine the next action for this persona"""
-    if persona["influence_level"] == "high" and persona["budget_authority"] == "high":
-        return "schedule_executive_demo"
-    elif persona["influence_level"] == "high":
-        return "schedule_technical_demo"
-    elif "operations" in persona["department"].lower():
-        return "schedule_process_review"
-    else:
-        return "schedule_intro_call"
+    return score_persona(persona)["next_action"]
 
 def calculate_expansion_potential(persona):
     """Calculate expansion potential score"""
-    potential = 0
-    
-    # More expansion paths = higher potential
-    potential += len(persona["expansion_paths"]) * 10
-    
-    # Higher influence = higher expansion potential
-    if persona["influence_level"] == "high":
-        potential += 30
-    elif persona["influence_level"] == "medium":
-        potential += 20
-    
-    
-    # Operations roles have high expansion potential
-    if "operations" in persona["department"].lower():
-        potential += 20
-    
-    return min(potential, 100)
+    return score_persona(persona)["expansion_potential"]
 
 def calculate_champion_likelihood(persona):
     """Calculate likelihood of becoming a champion"""
-    likelihood = 50  # Base 50%
-    
-    # High influence + budget = more likely champion
-    if persona["influence_level"] == "high" and persona["budget_authority"] == "high":
-        likelihood += 25
-    
-    # Operations roles often become champions
-    if "operations" in persona["department"].lower():
-        likelihood += 15
-    
-    # Technical roles can become champions
-    if persona["technical_expertise"] == "high":
-        likelihood += 10
-    
-    return min(likelihood, 100)
+    return score_persona(persona)["champion_likelihood"]
+
+def is_reloader_parent():
+    """Whether this is the reloader's watcher process, which restarts the server but never serves requests"""
+    if is_running_from_reloader() or '--no-reload' in sys.argv:
+        return False
+    return '--reload' in sys.argv or get_debug_flag()
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    # Spawned extraction workers re-import the main module; hand over to server.py
+    # so they don't re-import (and re-initialize) this one
+    os.execv(sys.executable, [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py'), *sys.argv[1:]])
+elif PREWARM_ENABLED and not is_reloader_parent():
+    # Loaded by server.py or `flask run`: the process serving requests runs the pre-warm scheduler
+    prewarm_scheduler.start()
 
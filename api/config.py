@@ -33,6 +33,11 @@ class Config:
     PERPLEXITY_MAX_TOKENS = 4000
     PERPLEXITY_TEMPERATURE = 0.1
     PERPLEXITY_TOP_P = 0.9
+    
+    # Research store (stale-while-revalidate)
+    RESEARCH_CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'research')
+    RESEARCH_FRESH_SECONDS = int(os.getenv('RESEARCH_FRESH_SECONDS', 24 * 3600))
+    RESEARCH_STALE_SECONDS = int(os.getenv('RESEARCH_STALE_SECONDS', 7 * 24 * 3600))
 
 # Validate required configuration
 def validate_config():
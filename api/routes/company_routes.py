@@ -96,7 +96,8 @@ def research_company(company_name):
             return jsonify({"error": "Sales research prompt not found"}), 404
         
         # Get research from Perplexity
-        result = perplexity_service.research_company(company_name, prompt_template)
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        result = perplexity_service.research_company(company_name, prompt_template, refresh=refresh)
         
         if result.get("success"):
             return jsonify({
@@ -105,6 +106,7 @@ def research_company(company_name):
                 "research": result.get("content"),
                 "model": result.get("model", "unknown"),
                 "usage": result.get("usage", {}),
+                "cache": result.get("cache"),
                 "timestamp": datetime.now().isoformat()
             })
         else:
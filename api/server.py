@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Entry point for running api.py with the development server.
+
+PageExtractor's workers are spawned processes, and a spawned process re-imports
+its parent's main module. Starting the server from this module keeps that cheap:
+api.py, with everything it sets up at import time (data directories, the search
+index connection, the persona and taxonomy loads, ...), is only imported by the
+serving process, never by the workers.
+"""
+import os
+
+if __name__ == '__main__':
+    # Debug mode (and with it the reloader) unless FLASK_DEBUG=0
+    os.environ.setdefault('FLASK_DEBUG', '1')
+
+    # Importing api starts the pre-warm scheduler, except in the reloader's watcher process
+    from api import app
+    app.run(port=5000)
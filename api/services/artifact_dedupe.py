@@ -0,0 +1,110 @@
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+# Duplicate references kept on an entry; duplicate_count keeps counting past this
+MAX_DUPLICATE_REFS = 50
+
+def normalize_text(text: str) -> str:
+    """Lowercase with whitespace collapsed, so formatting-only differences hash the same"""
+    return " ".join((text or "").lower().split())
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> int:
+    """64-bit SimHash of the word shingles of text; similar texts differ in few bits"""
+    words = re.findall(r"\w+", normalize_text(text))
+    if not words:
+        return 0
+    shingles = [" ".join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))]
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little') for shingle in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    # Each bit is set where most shingle hashes have it set
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority, bitorder='little').tobytes(), 'little')
+
+def fingerprint(text: str) -> Dict[str, str]:
+    """Exact hash of the normalized text plus its SimHash, as stored on an entry"""
+    return {
+        "sha256": hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest(),
+        "simhash": f"{simhash(text):016x}"
+    }
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+def entry_fingerprint(entry: Dict[str, Any]) -> Dict[str, str]:
+    """An entry's fingerprint, computed and stored on it if it predates fingerprinting"""
+    if "fingerprint" not in entry:
+        entry["fingerprint"] = fingerprint(entry.get("content") or "")
+    return entry["fingerprint"]
+
+def find_duplicate(entries: List[Dict[str, Any]], fp: Dict[str, str], max_distance: int) -> Optional[Tuple[int, int]]:
+    """(index, SimHash distance) of the entry closest to fp within max_distance.
+
+    Exact matches come first, including text already collapsed into an entry
+    (its references keep the duplicate's hash).
+    """
+    target = int(fp["simhash"], 16)
+    best = None
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("content"):
+            continue
+        existing = entry_fingerprint(entry)
+        if existing["sha256"] == fp["sha256"]:
+            return index, 0
+        reference = next((ref for ref in entry.get("duplicates", ()) if ref.get("sha256") == fp["sha256"]), None)
+        if reference is not None:
+            return index, reference.get("distance", 0)
+        distance = hamming_distance(target, int(existing["simhash"], 16))
+        if distance <= max_distance and (best is None or distance < best[1]):
+            best = (index, distance)
+    return best
+
+def add_artifact(entries: List[Dict[str, Any]], entry: Dict[str, Any], max_distance: int) -> Tuple[Dict[str, Any], Optional[int]]:
+    """Append entry to entries unless a near-identical one is stored.
+
+    A duplicate is collapsed into the stored entry as a reference (id, created_at,
+    model, distance, sha256) and a duplicate_count. Returns the entry that holds the
+    content and the SimHash distance to it (None if entry was appended).
+    """
+    fp = entry_fingerprint(entry)
+    match = find_duplicate(entries, fp, max_distance)
+    if match is None:
+        entries.append(entry)
+        return entry, None
+
+    index, distance = match
+    canonical = entries[index]
+    canonical["duplicate_count"] = canonical.get("duplicate_count", 0) + 1 + entry.get("duplicate_count", 0)
+    references = canonical.setdefault("duplicates", [])
+    # Oldest first, so trimming keeps the latest generations (the ones a store may still serve)
+    references.extend(entry.get("duplicates", []))
+    references.append({
+        "id": entry.get("id"),
+        "created_at": entry.get("created_at"),
+        "model": entry.get("model"),
+        "distance": distance,
+        "sha256": fp["sha256"]
+    })
+    del references[:-MAX_DUPLICATE_REFS]
+    return canonical, distance
+
+def collapse_duplicates(entries: List[Dict[str, Any]], max_distance: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Entries with near-identical ones collapsed into the earliest, and the number removed"""
+    collapsed: List[Dict[str, Any]] = []
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get("content"):
+            add_artifact(collapsed, entry, max_distance)
+        else:
+            collapsed.append(entry)
+    return collapsed, len(entries) - len(collapsed)
+
+def similarity(distance: int) -> float:
+    """Share of SimHash bits two fingerprints agree on"""
+    return round(1 - distance / SIMHASH_BITS, 3)
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change what a page shows: prefixes, and exact (case-insensitive) names
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = frozenset(('gclid', 'fbclid', 'mc_cid', 'mc_eid', 'ref'))
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so that trivially different spellings of the same site compare equal"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or 'https'
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+
+    # Keep non-default ports only
+    netloc = host
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        netloc = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(k)
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+class CrawlCache:
+    """Crawl results keyed by normalized URL plus crawl options.
+
+    Entries live on disk under cache_dir so they survive restarts, with the
+    most recently used ones also kept in memory. Entries older than
+    ttl_seconds are treated as misses and their files removed; files nobody
+    reads again are swept at startup and at most once per ttl_seconds on put.
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: int, max_memory_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bypassed = 0
+        self.swept = 0
+        self._last_sweep = 0.0
+        self.sweep()
+
+    @staticmethod
+    def make_key(url: str, options: Dict[str, Any]) -> str:
+        """Cache key for a URL crawled with the given options"""
+        raw = json.dumps({"url": normalize_url(url), "options": options}, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, url: str, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached crawl, or None"""
+        key = self.make_key(url, options)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+
+        if entry is None:
+            entry = self._load(key)
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry["cached_ts"] > self.ttl_seconds:
+            with self._lock:
+                self.expired += 1
+                self.misses += 1
+                self._memory.pop(key, None)
+            self._remove(key)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, url: str, options: Dict[str, Any], value: Dict[str, Any]) -> None:
+        """Store a completed crawl"""
+        key = self.make_key(url, options)
+        entry = dict(value)
+        entry["url"] = normalize_url(url)
+        entry["options"] = options
+        entry["cached_ts"] = time.time()
+
+        try:
+            with open(self._path(key), 'w') as f:
+                json.dump(entry, f)
+        except IOError as e:
+            print(f"Error writing crawl cache entry: {e}")
+
+        with self._lock:
+            self._remember(key, entry)
+            sweep_due = time.time() - self._last_sweep > self.ttl_seconds
+        if sweep_due:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Remove cache files older than ttl_seconds"""
+        now = time.time()
+        self._last_sweep = now
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                if now - os.path.getmtime(os.path.join(self.cache_dir, name)) > self.ttl_seconds:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    removed += 1
+            except OSError:
+                # Removed concurrently or unreadable; the next sweep retries
+                continue
+        with self._lock:
+            self.swept += removed
+        return removed
+
+    def record_bypass(self) -> None:
+        """Count a lookup skipped because the caller forced a refresh"""
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "bypassed": self.bypassed,
+                "swept": self.swept,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len([name for name in os.listdir(self.cache_dir) if name.endswith('.json')]),
+                "ttl_seconds": self.ttl_seconds
+            }
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error reading crawl cache entry: {e}")
+            return None
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing crawl cache entry: {e}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
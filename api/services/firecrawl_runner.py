@@ -0,0 +1,124 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+from firecrawl import AsyncFirecrawlApp
+
+class PooledAsyncFirecrawlApp(AsyncFirecrawlApp):
+    """AsyncFirecrawlApp that sends every request through one shared, pooled aiohttp session.
+
+    The SDK opens a new ClientSession (and connection pool) per request; this
+    keeps connections alive across requests and jobs instead.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, api_url: Optional[str] = None, max_connections: int = 20):
+        super().__init__(api_key=api_key, api_url=api_url)
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session on first use, inside the owning event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+        return self._session
+
+    async def _async_request(
+            self,
+            method: str,
+            url: str,
+            headers: Dict[str, str],
+            data: Optional[Dict[str, Any]] = None,
+            retries: int = 3,
+            backoff_factor: float = 0.5) -> Dict[str, Any]:
+        """Same retry behaviour as the SDK, on the shared session"""
+        session = await self._get_session()
+        for attempt in range(retries):
+            try:
+                async with session.request(
+                    method=method, url=url, headers=headers, json=data
+                ) as response:
+                    if response.status == 502:
+                        await asyncio.sleep(backoff_factor * (2 ** attempt))
+                        continue
+                    if response.status >= 300:
+                        await self._handle_error(response, f"make {method} request")
+                    return await response.json()
+            except aiohttp.ClientError as e:
+                if attempt == retries - 1:
+                    raise e
+                await asyncio.sleep(backoff_factor * (2 ** attempt))
+        raise Exception("Max retries exceeded")
+
+    async def close(self) -> None:
+        """Close the shared session and its pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+class FirecrawlRunner:
+    """Runs Firecrawl SDK coroutines on one long-lived background event loop.
+
+    Sync callers (scrape jobs, request handlers) submit work with run(), so
+    loop setup and the client's connection pool are shared by every job.
+    """
+
+    def __init__(self, api_key: Optional[str], max_connections: int = 20):
+        self.api_key = api_key
+        self.max_connections = max_connections
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._app: Optional[AsyncFirecrawlApp] = None
+        self._lock = threading.Lock()
+
+    def run(self, func: Callable[[AsyncFirecrawlApp], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Run func(app) on the loop thread and wait for its result.
+
+        On timeout the coroutine is cancelled so it releases its connection.
+        """
+        loop, app = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(func(app), loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        """Close the shared client and stop the loop thread"""
+        with self._lock:
+            loop, app, thread = self._loop, self._app, self._thread
+            self._loop = self._app = self._thread = None
+
+        if loop is None:
+            return
+        if app is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(app.close(), loop).result(5)
+            except Exception as e:
+                print(f"Error closing Firecrawl client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    def _ensure_started(self):
+        """Start the loop thread and create the shared client on first use"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._run_loop, args=(loop,), name="firecrawl-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+
+            if self._app is None:
+                self._app = PooledAsyncFirecrawlApp(api_key=self.api_key, max_connections=self.max_connections)
+
+            return self._loop, self._app
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+        loop.close()
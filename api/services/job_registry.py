@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class JobRegistry:
+    """In-memory registry of scrape jobs with bounded retention of their results.
+
+    Completed results are kept in memory until they are older than
+    result_ttl_seconds or the resident results exceed max_result_bytes, at
+    which point the oldest are spilled to the on-disk scrape store and served
+    from there. Whole job records are dropped after record_ttl_seconds, along
+    with their spilled result files; spilled files left by a previous process
+    are removed once they are that old.
+
+    A job id can also be an alias of another job (see attach), so duplicate
+    submissions share one job; every lookup resolves aliases.
+
+    Batches of jobs are kept here too, and dropped once they are older than
+    record_ttl_seconds and none of their jobs is left.
+    """
+
+    def __init__(self, scraped_dir: str, result_ttl_seconds: int, max_result_bytes: int, record_ttl_seconds: int):
+        self.scraped_dir = scraped_dir
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_result_bytes = max_result_bytes
+        self.record_ttl_seconds = record_ttl_seconds
+
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        # Job ids with a result held in memory, oldest first
+        self.resident: "OrderedDict[str, int]" = OrderedDict()
+        self.resident_bytes = 0
+        self.spilled_results = 0
+        self.expired_jobs = 0
+
+        # Alias job id -> job id it is attached to
+        self.aliases: Dict[str, str] = {}
+        # Dedupe key -> job id of the latest job submitted under it
+        self.flights: Dict[str, str] = {}
+        self.deduplicated_jobs = 0
+
+        # Batch id -> {"job_ids": [...], ...}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.expired_batches = 0
+
+        # Guards every job and is notified whenever one changes
+        self.updates = threading.Condition(threading.RLock())
+        self.sweep_spilled()
+
+    def __contains__(self, job_id: str) -> bool:
+        with self.updates:
+            return self.resolve(job_id) in self.jobs
+
+    def __getitem__(self, job_id: str) -> Dict[str, Any]:
+        with self.updates:
+            return self.jobs[self.resolve(job_id)]
+
+    def __setitem__(self, job_id: str, job: Dict[str, Any]) -> None:
+        with self.updates:
+            job.setdefault("created_ts", time.time())
+            self.jobs[job_id] = job
+
+    def __len__(self) -> int:
+        with self.updates:
+            return len(self.jobs)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.updates:
+            return self.jobs.get(self.resolve(job_id))
+
+    def resolve(self, job_id: str) -> str:
+        """The id of the job that does the work for job_id"""
+        with self.updates:
+            return self.aliases.get(job_id, job_id)
+
+    def find_flight(self, key: str, completed_window_seconds: int, include_completed: bool = True) -> Optional[str]:
+        """Id of a queued or running job under key, or one completed within the window"""
+        with self.updates:
+            job = self.jobs.get(self.flights.get(key))
+            if not job:
+                return None
+            if job["status"] in ("pending", "running"):
+                return self.flights[key]
+            if (include_completed and job["status"] == "completed"
+                    and time.time() - job.get("result_stored_ts", 0) <= completed_window_seconds):
+                return self.flights[key]
+            return None
+
+    def start_flight(self, key: str, job_id: str) -> None:
+        """Make job_id the job that later submissions under key attach to"""
+        with self.updates:
+            self.flights[key] = job_id
+
+    def attach(self, alias: str, job_id: str) -> None:
+        """Make alias another id for job_id"""
+        with self.updates:
+            self.aliases[alias] = self.resolve(job_id)
+            self.deduplicated_jobs += 1
+
+    def detach(self, alias: str) -> None:
+        with self.updates:
+            self.aliases.pop(alias, None)
+
+    def add_batch(self, batch_id: str, batch: Dict[str, Any]) -> None:
+        with self.updates:
+            batch.setdefault("created_ts", time.time())
+            self.batches[batch_id] = batch
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self.updates:
+            return self.batches.get(batch_id)
+
+    def store_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Attach a completed result to a job and enforce the retention limits"""
+        size = len(json.dumps(result))
+        with self.updates:
+            job = self.jobs[job_id]
+            self._release(job_id)
+            job["result"] = result
+            job["result_bytes"] = size
+            job["result_stored_ts"] = time.time()
+            self.resident[job_id] = size
+            self.resident_bytes += size
+            self.evict()
+
+    def load_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's result from memory, or from disk if it was spilled"""
+        with self.updates:
+            job = self.jobs.get(self.resolve(job_id))
+            if not job:
+                return None
+            if job.get("result") is not None:
+                return job["result"]
+            result_path = job.get("result_path")
+
+        if result_path and os.path.exists(result_path):
+            try:
+                with open(result_path, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading spilled job result: {e}")
+        return None
+
+    def evict(self) -> None:
+        """Spill results past their TTL or over the byte budget, and drop expired job and batch records"""
+        now = time.time()
+        with self.updates:
+            for job_id in list(self.resident):
+                job = self.jobs[job_id]
+                over_budget = self.resident_bytes > self.max_result_bytes
+                expired = now - job["result_stored_ts"] > self.result_ttl_seconds
+                if not (over_budget or expired):
+                    break
+                self._spill(job_id, job)
+
+            for job_id, job in list(self.jobs.items()):
+                if job["status"] in ("pending", "running"):
+                    continue
+                if now - job["created_ts"] > self.record_ttl_seconds:
+                    self._release(job_id)
+                    self._remove_spilled(job)
+                    del self.jobs[job_id]
+                    self.expired_jobs += 1
+
+            # Drop aliases and dedupe keys of expired jobs
+            for alias, job_id in list(self.aliases.items()):
+                if job_id not in self.jobs:
+                    del self.aliases[alias]
+            for key, job_id in list(self.flights.items()):
+                if job_id not in self.jobs:
+                    del self.flights[key]
+            for batch_id, batch in list(self.batches.items()):
+                if (now - batch["created_ts"] > self.record_ttl_seconds
+                        and not any(self.resolve(job_id) in self.jobs for job_id in batch["job_ids"])):
+                    del self.batches[batch_id]
+                    self.expired_batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory gauges for the registry"""
+        self.evict()
+        with self.updates:
+            return {
+                "jobs": len(self.jobs),
+                "active_jobs": sum(1 for job in self.jobs.values() if job["status"] in ("pending", "running")),
+                "resident_results": len(self.resident),
+                "resident_result_bytes": self.resident_bytes,
+                "max_result_bytes": self.max_result_bytes,
+                "result_ttl_seconds": self.result_ttl_seconds,
+                "record_ttl_seconds": self.record_ttl_seconds,
+                "spilled_results": self.spilled_results,
+                "expired_jobs": self.expired_jobs,
+                "aliases": len(self.aliases),
+                "deduplicated_jobs": self.deduplicated_jobs,
+                "batches": len(self.batches),
+                "expired_batches": self.expired_batches
+            }
+
+    def _spill(self, job_id: str, job: Dict[str, Any]) -> None:
+        """Write a job's result to the scrape store and drop it from memory"""
+        company_dir = os.path.join(self.scraped_dir, job["company_name"].lower().replace(' ', '_'), "jobs")
+        os.makedirs(company_dir, exist_ok=True)
+
+        result_path = os.path.join(company_dir, f"{job_id}.json")
+        try:
+            with open(result_path, 'w') as f:
+                json.dump(job["result"], f)
+        except IOError as e:
+            # Keep the result resident rather than lose it
+            print(f"Error spilling job result: {e}")
+            return
+
+        self._release(job_id)
+        job["result"] = None
+        job["result_path"] = result_path
+        self.spilled_results += 1
+
+    def sweep_spilled(self) -> int:
+        """Remove spilled result files older than record_ttl_seconds (e.g. of jobs from before a restart)"""
+        removed = 0
+        cutoff = time.time() - self.record_ttl_seconds
+        if not os.path.isdir(self.scraped_dir):
+            return 0
+        for company_dir in os.listdir(self.scraped_dir):
+            jobs_dir = os.path.join(self.scraped_dir, company_dir, "jobs")
+            if not os.path.isdir(jobs_dir):
+                continue
+            for file_name in os.listdir(jobs_dir):
+                path = os.path.join(jobs_dir, file_name)
+                try:
+                    if file_name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError as e:
+                    print(f"Error removing spilled job result: {e}")
+        return removed
+
+    def _remove_spilled(self, job: Dict[str, Any]) -> None:
+        result_path = job.get("result_path")
+        if result_path:
+            try:
+                os.remove(result_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing spilled job result: {e}")
+
+    def _release(self, job_id: str) -> None:
+        """Stop counting a job's result towards the resident total"""
+        size = self.resident.pop(job_id, None)
+        if size is not None:
+            self.resident_bytes -= size
@@ -0,0 +1,163 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Level strings are encoded as indexes into the point tables; anything else counts as "low"
+LEVEL_CODES = {"low": 0, "medium": 1, "high": 2}
+
+# Points per level code (low, medium, high)
+LEAD_INFLUENCE_POINTS = np.array([10, 20, 30], dtype=np.int16)
+LEAD_BUDGET_POINTS = np.array([5, 15, 25], dtype=np.int16)
+LEAD_TECHNICAL_POINTS = np.array([10, 15, 20], dtype=np.int16)
+LEAD_EXECUTIVE_POINTS = 15
+LEAD_OPERATIONS_POINTS = 10
+
+EXPANSION_PATH_POINTS = 10
+EXPANSION_INFLUENCE_POINTS = np.array([0, 20, 30], dtype=np.int16)
+EXPANSION_OPERATIONS_POINTS = 20
+
+CHAMPION_BASE = 50
+CHAMPION_DECISION_MAKER_POINTS = 25
+CHAMPION_OPERATIONS_POINTS = 15
+CHAMPION_TECHNICAL_POINTS = 10
+
+SCORE_CAP = 100
+
+# Indexed by the next_action code returned by score_personas
+NEXT_ACTIONS = ("schedule_executive_demo", "schedule_technical_demo", "schedule_process_review", "schedule_intro_call")
+HIGH = LEVEL_CODES["high"]
+
+def encode_personas(personas: Iterable[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+    """Encode persona records into one compact array per scoring input"""
+    influence, budget, technical, executive, operations, paths = [], [], [], [], [], []
+    for persona in personas:
+        department = persona["department"].lower()
+        influence.append(LEVEL_CODES.get(persona["influence_level"], 0))
+        budget.append(LEVEL_CODES.get(persona["budget_authority"], 0))
+        technical.append(LEVEL_CODES.get(persona["technical_expertise"], 0))
+        executive.append("executive" in department)
+        operations.append("operations" in department)
+        paths.append(len(persona["expansion_paths"]))
+    return {
+        "influence": np.array(influence, dtype=np.int8),
+        "budget": np.array(budget, dtype=np.int8),
+        "technical": np.array(technical, dtype=np.int8),
+        "executive": np.array(executive, dtype=bool),
+        "operations": np.array(operations, dtype=bool),
+        "expansion_paths": np.array(paths, dtype=np.int16)
+    }
+
+def take_encoded(encoded: Dict[str, np.ndarray], indexes: np.ndarray) -> Dict[str, np.ndarray]:
+    """Rows of encoded at indexes (e.g. one row per company persona from the distinct personas)"""
+    return {name: values[indexes] for name, values in encoded.items()}
+
+def score_personas(encoded: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Lead score, expansion potential, champion likelihood and next action code for every encoded persona"""
+    influence, budget, technical = encoded["influence"], encoded["budget"], encoded["technical"]
+    executive, operations = encoded["executive"], encoded["operations"]
+    decision_maker = (influence == HIGH) & (budget == HIGH)
+
+    lead_score = (
+        LEAD_INFLUENCE_POINTS[influence] + LEAD_BUDGET_POINTS[budget] + LEAD_TECHNICAL_POINTS[technical]
+        + np.where(executive, LEAD_EXECUTIVE_POINTS, np.where(operations, LEAD_OPERATIONS_POINTS, 0))
+    )
+    expansion_potential = (
+        encoded["expansion_paths"] * EXPANSION_PATH_POINTS + EXPANSION_INFLUENCE_POINTS[influence]
+        + operations * EXPANSION_OPERATIONS_POINTS
+    )
+    champion_likelihood = (
+        CHAMPION_BASE + decision_maker * CHAMPION_DECISION_MAKER_POINTS
+        + operations * CHAMPION_OPERATIONS_POINTS + (technical == HIGH) * CHAMPION_TECHNICAL_POINTS
+    )
+    next_action = np.select([decision_maker, influence == HIGH, operations], [0, 1, 2], default=3).astype(np.int8)
+
+    return {
+        "lead_score": np.minimum(lead_score, SCORE_CAP).astype(np.int16),
+        "expansion_potential": np.minimum(expansion_potential, SCORE_CAP).astype(np.int16),
+        "champion_likelihood": np.minimum(champion_likelihood, SCORE_CAP).astype(np.int16),
+        "next_action": next_action
+    }
+
+def score_persona(persona: Mapping[str, Any]) -> Dict[str, Any]:
+    """Scores of a single persona as plain values"""
+    scores = score_personas(encode_personas([persona]))
+    return {
+        "lead_score": int(scores["lead_score"][0]),
+        "expansion_potential": int(scores["expansion_potential"][0]),
+        "champion_likelihood": int(scores["champion_likelihood"][0]),
+        "next_action": NEXT_ACTIONS[scores["next_action"][0]]
+    }
+
+class LeadMatrix:
+    """Scores of every persona of every company in a portfolio, for ranking.
+
+    rows holds per-row metadata (company, persona key, ...); each row points at
+    one of the distinct personas, which are encoded once.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], persona_indexes: List[int], personas: List[Mapping[str, Any]]):
+        self.rows = rows
+        if rows:
+            encoded = take_encoded(encode_personas(personas), np.array(persona_indexes, dtype=np.int32))
+            self.scores = score_personas(encoded)
+        else:
+            self.scores = {name: np.zeros(0, dtype=np.int16) for name in ("lead_score", "expansion_potential", "champion_likelihood", "next_action")}
+        # Rank by lead score, then champion likelihood, then expansion potential (each at most 100)
+        self.rank_key = (
+            self.scores["lead_score"].astype(np.int64) * 1_000_000
+            + self.scores["champion_likelihood"].astype(np.int64) * 1_000
+            + self.scores["expansion_potential"]
+        )
+
+    def top(self, k: int, mask: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """The k best-ranked rows (optionally among rows where mask is True), best first"""
+        candidates = np.arange(len(self.rows)) if mask is None else np.flatnonzero(mask)
+        k = min(k, len(candidates))
+        if k <= 0:
+            return []
+        # Equal leads keep portfolio order: earlier rows get the larger tiebreak
+        n = len(self.rows)
+        keys = self.rank_key[candidates] * n + (n - 1 - candidates)
+        if k < len(candidates):
+            picked = np.argpartition(-keys, k - 1)[:k]
+        else:
+            picked = np.arange(len(candidates))
+        ordered = candidates[picked[np.argsort(-keys[picked])]]
+        return [
+            dict(
+                self.rows[i],
+                lead_score=int(self.scores["lead_score"][i]),
+                expansion_potential=int(self.scores["expansion_potential"][i]),
+                champion_likelihood=int(self.scores["champion_likelihood"][i]),
+                next_action=NEXT_ACTIONS[self.scores["next_action"][i]]
+            )
+            for i in ordered
+        ]
+
+    def mask(self, field: str, value: str) -> np.ndarray:
+        """Rows whose metadata field equals value (case-insensitive)"""
+        value = value.lower()
+        return np.fromiter((str(row.get(field, "")).lower() == value for row in self.rows), dtype=bool, count=len(self.rows))
+
+class LeadIndex:
+    """Caches the portfolio LeadMatrix until its version changes.
+
+    build returns (rows, persona index per row, distinct personas); version is
+    anything that changes when the portfolio or persona library does.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[Hashable] = None
+        self._matrix: Optional[LeadMatrix] = None
+        self.builds = 0
+
+    def get(self, version: Hashable,
+            build: Callable[[], Tuple[List[Dict[str, Any]], List[int], List[Mapping[str, Any]]]]) -> LeadMatrix:
+        with self._lock:
+            if self._matrix is None or self._version != version:
+                self._matrix = LeadMatrix(*build())
+                self._version = version
+                self.builds += 1
+            return self._matrix
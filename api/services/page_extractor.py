@@ -0,0 +1,182 @@
+import concurrent.futures
+import concurrent.futures.process
+import multiprocessing
+import re
+import threading
+from html import unescape
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+# Elements that never carry page content
+BOILERPLATE_TAGS = frozenset({
+    'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe',
+    'nav', 'header', 'footer', 'aside', 'form', 'button', 'select'
+})
+BLOCK_TAGS = frozenset({
+    'p', 'div', 'section', 'article', 'main', 'ul', 'ol', 'table', 'tr',
+    'blockquote', 'pre', 'figure', 'figcaption', 'dl', 'dt', 'dd', 'br', 'hr'
+})
+VOID_TAGS = frozenset({'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'})
+HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+class _MarkdownConverter(HTMLParser):
+    """Converts HTML to markdown, dropping boilerplate elements and collecting title/description"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skip_depth = 0
+        self.in_title = False
+        self.title_parts: List[str] = []
+        self.description: Optional[str] = None
+        self.href: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'meta' and (attrs.get('name') or attrs.get('property') or '').lower() in ('description', 'og:description'):
+            self.description = self.description or (attrs.get('content') or '').strip() or None
+            return
+        if tag in VOID_TAGS and tag != 'br':
+            return
+        if tag in BOILERPLATE_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+
+        if tag == 'title':
+            self.in_title = True
+        elif tag in HEADING_LEVELS:
+            self.parts.append('\n\n' + '#' * HEADING_LEVELS[tag] + ' ')
+        elif tag == 'li':
+            self.parts.append('\n- ')
+        elif tag in ('strong', 'b'):
+            self.parts.append('**')
+        elif tag in ('em', 'i'):
+            self.parts.append('*')
+        elif tag == 'a':
+            self.href = attrs.get('href')
+            self.parts.append('[')
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n\n')
+
+    def handle_endtag(self, tag):
+        if tag in BOILERPLATE_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+            return
+        if self.skip_depth:
+            return
+
+        if tag == 'title':
+            self.in_title = False
+        elif tag in HEADING_LEVELS or tag in BLOCK_TAGS:
+            self.parts.append('\n\n')
+        elif tag in ('strong', 'b'):
+            self.parts.append('**')
+        elif tag in ('em', 'i'):
+            self.parts.append('*')
+        elif tag == 'a':
+            self.parts.append(f"]({self.href})" if self.href else ']')
+            self.href = None
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+        elif not self.skip_depth:
+            self.parts.append(data)
+
+def html_to_markdown(html: str) -> Dict[str, Optional[str]]:
+    """Convert an HTML page to markdown without its boilerplate; also returns its title and description"""
+    converter = _MarkdownConverter()
+    converter.feed(html)
+    converter.close()
+    title = ' '.join(''.join(converter.title_parts).split()) or None
+    return {
+        "markdown": ''.join(converter.parts),
+        "title": title,
+        "description": converter.description
+    }
+
+def normalize_markdown(text: str) -> str:
+    """Collapse whitespace and drop repeated paragraphs (cookie banners, repeated CTAs)"""
+    paragraphs = []
+    seen = set()
+    for paragraph in re.split(r'\n\s*\n', unescape(text)):
+        lines = [' '.join(line.split()) for line in paragraph.splitlines()]
+        paragraph = '\n'.join(line for line in lines if line)
+        # Empty links and emphasis left behind by stripped elements
+        paragraph = re.sub(r'\[\]\([^)]*\)|\*\*\s*\*\*', '', paragraph).strip()
+        if not paragraph or paragraph in ('-', '#'):
+            continue
+        key = paragraph.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        paragraphs.append(paragraph)
+    return '\n\n'.join(paragraphs)
+
+def extract_page(page: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Extract normalized markdown, title and description from one crawled page.
+
+    page has the raw 'markdown', 'html', 'title' and 'description' Firecrawl
+    returned; markdown is preferred and HTML is converted only when it is missing.
+    Runs in a worker process, so it only takes and returns plain data.
+    """
+    title = page.get('title')
+    description = page.get('description')
+    markdown = page.get('markdown')
+
+    if not markdown and page.get('html'):
+        converted = html_to_markdown(page['html'])
+        markdown = converted["markdown"]
+        title = title or converted["title"]
+        description = description or converted["description"]
+
+    return {
+        "markdown": normalize_markdown(markdown) if markdown else None,
+        "title": ' '.join(title.split()) if title else None,
+        "description": ' '.join(description.split()) if description else None
+    }
+
+class PageExtractor:
+    """Runs page extraction in a process pool so CPU-heavy pages do not hold the GIL.
+
+    The pool starts on first use. With max_workers=0 pages are extracted inline.
+    Workers are spawned rather than forked: the app process already runs
+    threads whose locks a forked child could inherit held.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def extract(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Optional[str]]]:
+        """Extract a list of pages, preserving order"""
+        if not pages:
+            return []
+        if self.max_workers <= 0:
+            return [extract_page(page) for page in pages]
+
+        try:
+            return list(self._ensure_started().map(extract_page, pages))
+        except concurrent.futures.process.BrokenProcessPool as e:
+            # A worker died; start a fresh pool next time and finish this batch inline
+            print(f"Page extraction pool failed: {e}")
+            with self._lock:
+                self._pool = None
+            return [extract_page(page) for page in pages]
+
+    def stop(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_started(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
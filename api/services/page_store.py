@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+class PageStore:
+    """Full-fidelity storage of crawled pages as compressed fixed-size chunks.
+
+    Chunks are content-addressed by page hash under pages_dir, so a page is
+    stored once no matter how many scrapes or companies reference it. Each
+    company has a manifest in its scrape directory listing its current pages.
+    """
+
+    def __init__(self, pages_dir: str, scraped_dir: str, chunk_size: int = 8000):
+        self.pages_dir = pages_dir
+        self.scraped_dir = scraped_dir
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        os.makedirs(self.pages_dir, exist_ok=True)
+
+    def store_page(self, content_hash: str, text: str) -> Dict[str, Any]:
+        """Store a page's full text unless it is already stored; returns its chunk layout"""
+        page_dir = self._page_dir(content_hash)
+        meta_path = os.path.join(page_dir, "page.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+        tmp_dir = f"{page_dir}.tmp-{threading.get_ident()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for index, chunk in enumerate(chunks):
+            with open(os.path.join(tmp_dir, f"{index}.z"), 'wb') as f:
+                f.write(zlib.compress(chunk.encode('utf-8')))
+
+        layout = {
+            "content_hash": content_hash,
+            "length": len(text),
+            "chunk_size": self.chunk_size,
+            "chunk_count": len(chunks)
+        }
+        with open(os.path.join(tmp_dir, "page.json"), 'w') as f:
+            json.dump(layout, f)
+
+        try:
+            os.makedirs(os.path.dirname(page_dir), exist_ok=True)
+            os.rename(tmp_dir, page_dir)
+        except OSError:
+            # Another writer stored the same page first
+            for name in os.listdir(tmp_dir):
+                os.remove(os.path.join(tmp_dir, name))
+            os.rmdir(tmp_dir)
+        return layout
+
+    def has_page(self, content_hash: str) -> bool:
+        return os.path.exists(os.path.join(self._page_dir(content_hash), "page.json"))
+
+    def read_chunks(self, content_hash: str, start: int = 0, end: Optional[int] = None) -> Optional[str]:
+        """Read chunks [start, end) of a page and return them as text"""
+        page_dir = self._page_dir(content_hash)
+        meta_path = os.path.join(page_dir, "page.json")
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path, 'r') as f:
+            layout = json.load(f)
+        end = layout["chunk_count"] if end is None else min(end, layout["chunk_count"])
+
+        parts = []
+        for index in range(max(start, 0), end):
+            with open(os.path.join(page_dir, f"{index}.z"), 'rb') as f:
+                parts.append(zlib.decompress(f.read()).decode('utf-8'))
+        return "".join(parts)
+
+    def save_manifest(self, company_name: str, pages: List[Dict[str, Any]]) -> None:
+        """Replace a company's manifest with its current pages"""
+        manifest = {
+            "company_name": company_name,
+            "updated_at": datetime.now().isoformat(),
+            "pages": pages
+        }
+        path = self._manifest_path(company_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            with open(path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+    def load_manifest(self, company_name: str) -> Optional[Dict[str, Any]]:
+        path = self._manifest_path(company_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading page manifest: {e}")
+            return None
+
+    def read_company_text(self, company_name: str, max_chars: int, page_types=("markdown", "html")) -> str:
+        """Concatenate a company's pages, reading only as many chunks as max_chars needs"""
+        manifest = self.load_manifest(company_name)
+        if not manifest:
+            return ""
+
+        parts = []
+        remaining = max_chars
+        for page in manifest["pages"]:
+            if remaining <= 0:
+                break
+            if page["type"] not in page_types:
+                continue
+            chunks_needed = -(-remaining // page["chunk_size"])
+            text = self.read_chunks(page["content_hash"], 0, chunks_needed) or ""
+            text = text[:remaining]
+            parts.append(text)
+            remaining -= len(text)
+        return "\n\n".join(parts)
+
+    def iter_company_chunks(self, company_name: str, page_types=("markdown", "html")) -> Iterator[str]:
+        """Yield a company's stored pages one chunk at a time, pages separated by a blank line"""
+        manifest = self.load_manifest(company_name)
+        if not manifest:
+            return
+        for page in manifest["pages"]:
+            if page["type"] not in page_types:
+                continue
+            for index in range(page["chunk_count"]):
+                text = self.read_chunks(page["content_hash"], index, index + 1)
+                if text is None:
+                    break
+                yield text
+            yield "\n\n"
+
+    def _page_dir(self, content_hash: str) -> str:
+        return os.path.join(self.pages_dir, content_hash[:2], content_hash)
+
+    def _manifest_path(self, company_name: str) -> str:
+        return os.path.join(self.scraped_dir, company_name.lower().replace(' ', '_'), "pages_manifest.json")
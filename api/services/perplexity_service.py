@@ -1,11 +1,13 @@
+import hashlib
 import requests
 from typing import Dict, Any, Optional
 from ..config import Config
+from .research_store import ResearchStore
 
 class PerplexityService:
     """Service for interacting with Perplexity API"""
     
-    def __init__(self):
+    def __init__(self, research_store: Optional[ResearchStore] = None):
         self.api_key = Config.PERPLEXITY_API_KEY
         self.base_url = Config.PERPLEXITY_BASE_URL
         self.model = Config.PERPLEXITY_MODEL
@@ -15,8 +17,23 @@ class PerplexityService:
         
         if not self.api_key:
             raise ValueError("PERPLEXITY_API_KEY is required")
+        
+        self.research_store = research_store or ResearchStore(
+            Config.RESEARCH_CACHE_DIR,
+            Config.RESEARCH_FRESH_SECONDS,
+            Config.RESEARCH_STALE_SECONDS
+        )
+    
+    def research_company(self, company_name: str, prompt_template: str, refresh: bool = False) -> Dict[str, Any]:
+        """Get company research, served from the research store while fresh or stale"""
+        key = hashlib.sha256(f"{prompt_template}\0{company_name}".encode('utf-8')).hexdigest()
+        return self.research_store.get(
+            company_name, key,
+            lambda: self.fetch_research(company_name, prompt_template),
+            refresh=refresh
+        )
     
-    def research_company(self, company_name: str, prompt_template: str) -> Dict[str, Any]:
+    def fetch_research(self, company_name: str, prompt_template: str) -> Dict[str, Any]:
         """Get company research from Perplexity API"""
         try:
             # Replace placeholder with company name
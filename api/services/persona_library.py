@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+PERSONA_FIELDS = (
+    "base_role", "department", "land_expand_strategy", "champion_indicators", "expansion_paths",
+    "core_priorities", "core_pain_points", "core_decision_criteria", "sales_approach",
+    "expansion_opportunities", "influence_level", "budget_authority", "technical_expertise"
+)
+MODIFIER_FIELDS = ("priority_additions", "pain_point_additions", "decision_criteria_additions", "land_expand_context")
+LEVELS = ("low", "medium", "high")
+
+# Modifier list -> the persona list it extends
+MERGED_FIELDS = (
+    ("priorities", "core_priorities", "priority_additions"),
+    ("pain_points", "core_pain_points", "pain_point_additions"),
+    ("decision_criteria", "core_decision_criteria", "decision_criteria_additions")
+)
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of parsed JSON: dicts become mapping proxies, lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Plain dict/list copy of a frozen value, for callers that modify or serialize it"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+class PersonaLibrarySnapshot:
+    """One validated, read-only version of the core persona file.
+
+    merged holds the priorities, pain points and decision criteria of every
+    (persona, industry category, company stage) combination, with None for
+    an unknown category or stage, so customizing a persona is a lookup.
+    Customized persona bodies, report text and CRM fields are memoized per
+    combination on the snapshot, so a reload drops them with the data they
+    came from.
+    """
+
+    def __init__(self, data: Dict[str, Any], mtime: float):
+        self.personas: Mapping[str, Mapping[str, Any]] = freeze(data["personas"])
+        self.industry_modifiers: Mapping[str, Mapping[str, Any]] = freeze(data["industry_modifiers"])
+        self.company_stage_modifiers: Mapping[str, Mapping[str, Any]] = freeze(data["company_stage_modifiers"])
+        self.mtime = mtime
+        self.loaded_at = datetime.now().isoformat()
+
+        merged = {}
+        for persona_key, persona in self.personas.items():
+            for industry_category in (*self.industry_modifiers, None):
+                for stage in (*self.company_stage_modifiers, None):
+                    modifiers = [
+                        self.industry_modifiers.get(industry_category),
+                        self.company_stage_modifiers.get(stage)
+                    ]
+                    merged[(persona_key, industry_category, stage)] = MappingProxyType({
+                        field: persona[core] + sum((modifier[additions] for modifier in modifiers if modifier), ())
+                        for field, core, additions in MERGED_FIELDS
+                    })
+        self.merged: Mapping[Tuple[str, Optional[str], Optional[str]], Mapping[str, Tuple[str, ...]]] = MappingProxyType(merged)
+
+        self._bodies: Dict[Tuple[str, Optional[str], Optional[str]], Mapping[str, Any]] = {}
+        self._memo: Dict[Tuple[Any, ...], Any] = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def combination(self, industry_category: Optional[str], company_stage: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """(industry category, stage) with anything the library has no modifiers for mapped to None"""
+        return (
+            industry_category if industry_category in self.industry_modifiers else None,
+            company_stage if company_stage in self.company_stage_modifiers else None
+        )
+
+    def persona_body(self, persona_key: str, industry_category: Optional[str], company_stage: Optional[str]) -> Mapping[str, Any]:
+        """Read-only customized persona (base fields plus merged lists) for one combination"""
+        key = (persona_key, *self.combination(industry_category, company_stage))
+        body = self._bodies.get(key)
+        if body is None:
+            self.memo_misses += 1
+            body = MappingProxyType({**self.personas[persona_key], **self.merged[key]})
+            # Concurrent misses build equal bodies; keep whichever landed first
+            body = self._bodies.setdefault(key, body)
+        else:
+            self.memo_hits += 1
+        return body
+
+    def memoize(self, key: Tuple[Any, ...], build: Callable[[], Any]) -> Any:
+        """Memoized value for key (e.g. report text), built on first use; values must not be modified"""
+        value = self._memo.get(key)
+        if value is None:
+            self.memo_misses += 1
+            value = self._memo.setdefault(key, build())
+        else:
+            self.memo_hits += 1
+        return value
+
+    def land_expand_context(self, industry_category: Optional[str], company_stage: Optional[str]) -> Tuple[str, str]:
+        """Industry and stage strategy text ("" where there is none)"""
+        industry_mod = self.industry_modifiers.get(industry_category, {})
+        stage_mod = self.company_stage_modifiers.get(company_stage, {})
+        return industry_mod.get("land_expand_context", ""), stage_mod.get("land_expand_context", "")
+
+def validate_library(data: Any) -> None:
+    """Raise ValueError describing the first problem with a parsed persona file"""
+    if not isinstance(data, dict):
+        raise ValueError("persona library must be a JSON object")
+    for section in ("personas", "industry_modifiers", "company_stage_modifiers"):
+        if not isinstance(data.get(section), dict) or not data[section]:
+            raise ValueError(f"'{section}' must be a non-empty object")
+
+    for persona_key, persona in data["personas"].items():
+        missing = [field for field in PERSONA_FIELDS if field not in persona]
+        if missing:
+            raise ValueError(f"persona '{persona_key}' is missing {', '.join(missing)}")
+        for field in ("champion_indicators", "expansion_paths", "core_priorities", "core_pain_points", "core_decision_criteria"):
+            if not isinstance(persona[field], list) or not all(isinstance(item, str) for item in persona[field]):
+                raise ValueError(f"persona '{persona_key}' field '{field}' must be a list of strings")
+        for field in ("influence_level", "budget_authority", "technical_expertise"):
+            if persona[field] not in LEVELS:
+                raise ValueError(f"persona '{persona_key}' field '{field}' must be one of {', '.join(LEVELS)}")
+
+    for section in ("industry_modifiers", "company_stage_modifiers"):
+        for name, modifier in data[section].items():
+            missing = [field for field in MODIFIER_FIELDS if field not in modifier]
+            if missing:
+                raise ValueError(f"{section} '{name}' is missing {', '.join(missing)}")
+            for field in MODIFIER_FIELDS[:3]:
+                if not isinstance(modifier[field], list) or not all(isinstance(item, str) for item in modifier[field]):
+                    raise ValueError(f"{section} '{name}' field '{field}' must be a list of strings")
+
+class PersonaLibrary:
+    """The core persona file, parsed and validated once and reloaded when it changes.
+
+    get() only stats the file; it is re-read when its modification time
+    changes. A file that fails to parse or validate is reported in stats()
+    and the previous snapshot keeps being served.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot: Optional[PersonaLibrarySnapshot] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.last_error: Optional[str] = None
+        self._failed_mtime: Optional[float] = None
+
+    def get(self) -> Optional[PersonaLibrarySnapshot]:
+        """Current snapshot, or None if no valid library has been loaded"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return self._snapshot
+
+        snapshot = self._snapshot
+        if (snapshot is None or snapshot.mtime != mtime) and mtime != self._failed_mtime:
+            with self._lock:
+                if (self._snapshot is None or self._snapshot.mtime != mtime) and mtime != self._failed_mtime:
+                    self._load(mtime)
+                snapshot = self._snapshot
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.get()
+        return {
+            "path": self.path,
+            "loaded": snapshot is not None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "loads": self.loads,
+            "personas": len(snapshot.personas) if snapshot else 0,
+            "merged_combinations": len(snapshot.merged) if snapshot else 0,
+            "memoized_personas": len(snapshot._bodies) if snapshot else 0,
+            "memoized_results": len(snapshot._memo) if snapshot else 0,
+            "memo_hits": snapshot.memo_hits if snapshot else 0,
+            "memo_misses": snapshot.memo_misses if snapshot else 0,
+            "last_error": self.last_error
+        }
+
+    def _load(self, mtime: float) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            validate_library(data)
+            self._snapshot = PersonaLibrarySnapshot(data, mtime)
+            self.loads += 1
+            self.last_error = None
+            self._failed_mtime = None
+        except (json.JSONDecodeError, IOError, ValueError) as e:
+            # Keep serving the previous version until the file is fixed
+            self.last_error = f"{type(e).__name__}: {e}"
+            self._failed_mtime = mtime
+            print(f"Error loading core personas: {self.last_error}")
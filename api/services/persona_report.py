@@ -0,0 +1,190 @@
+import io
+import json
+from typing import Any, Dict, List, Mapping, Sequence
+
+REPORT_FORMATS = ("text", "markdown", "json")
+
+# Generic modifier items left out of a persona's customized insights
+PRIORITY_BLACKLIST = frozenset([
+    'Cloud security', 'API integration', 'Scalability', 'Data privacy', 'Process standardization',
+    'Market expansion', 'Operational efficiency'
+])
+PAIN_POINT_BLACKLIST = frozenset([
+    'Data privacy concerns', 'Vendor lock-in risks', 'Integration complexity', 'Growing pains',
+    'Process inefficiencies', 'Scaling challenges'
+])
+DECISION_CRITERIA_BLACKLIST = frozenset([
+    'Cloud compliance', 'API ecosystem', 'Data sovereignty', 'Scalability', 'Ease of expansion',
+    'Process improvement'
+])
+INSIGHT_LIMIT = 5
+
+NEXT_STEPS = (
+    "Identify your current champion or primary contact",
+    "Use the customized insights to tailor your pitch",
+    "Focus on the expansion paths to grow your footprint",
+    "Leverage industry and stage context for positioning"
+)
+
+# Report layout per output format; {} fields are filled from the report model
+LAYOUTS = {
+    "text": {
+        "header": "STRATEGIC PERSONA ANALYSIS FOR {company_upper}\nIndustry: {industry} | Stage: {stage_title}\n\n",
+        "context_title": "STRATEGIC CONTEXT:\n",
+        "industry_context": "• Industry Focus: {}\n",
+        "stage_context": "• Stage Strategy: {}\n",
+        "roadmap": "LAND-AND-EXPAND ROADMAP:\nBased on market research and company analysis, here's your strategic approach:\n\n",
+        "persona": "PERSONA {number}: {role}\nDepartment: {department}\nLand & Expand Strategy: {land_expand_strategy}\n\n"
+                   "WHY THIS PERSONA MATTERS:\n• {sales_approach}\n• {expansion_opportunities}\n\n",
+        "champion_indicators": "CHAMPION INDICATORS:\n",
+        "expansion_paths": "EXPANSION PATHS:\n",
+        "insights": "CUSTOMIZED INSIGHTS:\nPriorities:\n",
+        "pain_points": "\nPain Points:\n",
+        "decision_criteria": "\nDecision Criteria:\n",
+        "persona_footer": "SALES APPROACH:\n{sales_approach}\n\nEXPANSION OPPORTUNITIES:\n{expansion_opportunities}\n\n"
+                          "INFLUENCE & AUTHORITY:\n• Influence Level: {influence_level}\n• Budget Authority: {budget_authority}\n"
+                          "• Technical Expertise: {technical_expertise}\n\n" + "-" * 60 + "\n\n",
+        "item": "• {}\n",
+        "section_end": "\n",
+        "recommendations": "STRATEGIC RECOMMENDATIONS:\nBased on this analysis:\n\n",
+        "primary_champion": "1. PRIMARY CHAMPION: {}\n   Start here - they have the influence and budget to drive adoption.\n\n",
+        "operational_champions": "2. OPERATIONAL CHAMPIONS: {}\n   These personas feel the daily pain and can demonstrate immediate value.\n\n",
+        "expansion_targets": "3. EXPANSION TARGETS: {}\n   Once you have champions, expand to these personas for broader adoption.\n\n",
+        "next_steps": "NEXT STEPS:\n",
+        "next_step": "{number}. {}\n",
+        "end": "\n"
+    },
+    "markdown": {
+        "header": "# Strategic Persona Analysis for {company}\n\n**Industry:** {industry} | **Stage:** {stage_title}\n\n",
+        "context_title": "## Strategic Context\n\n",
+        "industry_context": "- **Industry Focus:** {}\n",
+        "stage_context": "- **Stage Strategy:** {}\n",
+        "roadmap": "## Land-and-Expand Roadmap\n\nBased on market research and company analysis, here's your strategic approach:\n\n",
+        "persona": "### Persona {number}: {role}\n\n**Department:** {department}  \n**Land & Expand Strategy:** {land_expand_strategy}\n\n"
+                   "#### Why This Persona Matters\n\n- {sales_approach}\n- {expansion_opportunities}\n\n",
+        "champion_indicators": "#### Champion Indicators\n\n",
+        "expansion_paths": "#### Expansion Paths\n\n",
+        "insights": "#### Customized Insights\n\n**Priorities:**\n\n",
+        "pain_points": "\n**Pain Points:**\n\n",
+        "decision_criteria": "\n**Decision Criteria:**\n\n",
+        "persona_footer": "#### Sales Approach\n\n{sales_approach}\n\n#### Expansion Opportunities\n\n{expansion_opportunities}\n\n"
+                          "#### Influence & Authority\n\n- **Influence Level:** {influence_level}\n- **Budget Authority:** {budget_authority}\n"
+                          "- **Technical Expertise:** {technical_expertise}\n\n---\n\n",
+        "item": "- {}\n",
+        "section_end": "\n",
+        "recommendations": "## Strategic Recommendations\n\nBased on this analysis:\n\n",
+        "primary_champion": "1. **Primary champion:** {}  \n   Start here - they have the influence and budget to drive adoption.\n\n",
+        "operational_champions": "2. **Operational champions:** {}  \n   These personas feel the daily pain and can demonstrate immediate value.\n\n",
+        "expansion_targets": "3. **Expansion targets:** {}  \n   Once you have champions, expand to these personas for broader adoption.\n\n",
+        "next_steps": "## Next Steps\n\n",
+        "next_step": "{number}. {}\n",
+        "end": "\n"
+    }
+}
+
+# List items are written as one join per list: prefix + (suffix + prefix).join(items) + suffix
+ITEM_AFFIXES = {output_format: tuple(layout["item"].split("{}")) for output_format, layout in LAYOUTS.items()}
+
+def build_report_model(personas: Sequence[Mapping[str, Any]], industry_context: str = "", stage_context: str = "") -> Dict[str, Any]:
+    """The company-independent content of a persona report, shared by every output format"""
+    return {
+        "strategic_context": {"industry_focus": industry_context, "stage_strategy": stage_context},
+        "personas": [
+            {
+                "role": persona["base_role"],
+                "department": persona["department"],
+                "land_expand_strategy": persona["land_expand_strategy"],
+                "sales_approach": persona["sales_approach"],
+                "expansion_opportunities": persona["expansion_opportunities"],
+                "champion_indicators": list(persona.get("champion_indicators", ())),
+                "expansion_paths": list(persona.get("expansion_paths", ())),
+                "priorities": [p for p in persona.get("priorities", ()) if p not in PRIORITY_BLACKLIST][:INSIGHT_LIMIT],
+                "pain_points": [p for p in persona.get("pain_points", ()) if p not in PAIN_POINT_BLACKLIST][:INSIGHT_LIMIT],
+                "decision_criteria": [c for c in persona.get("decision_criteria", ()) if c not in DECISION_CRITERIA_BLACKLIST][:INSIGHT_LIMIT],
+                "influence_level": persona["influence_level"],
+                "budget_authority": persona["budget_authority"],
+                "technical_expertise": persona["technical_expertise"]
+            }
+            for persona in personas
+        ],
+        "recommendations": {
+            "primary_champion": next(
+                (p["base_role"] for p in personas if p["influence_level"] == "high" and p["budget_authority"] == "high"), None
+            ),
+            "operational_champions": [p["base_role"] for p in personas if "operations" in p["department"].lower()],
+            "expansion_targets": [
+                p["base_role"] for p in personas if p["influence_level"] == "medium" and p["budget_authority"] == "medium"
+            ]
+        },
+        "next_steps": list(NEXT_STEPS)
+    }
+
+def render_header(company_name: str, industry: str, company_stage: str, output_format: str = "text") -> str:
+    """The company-specific part of a report"""
+    if output_format == "json":
+        return json.dumps({"company_name": company_name, "industry": industry, "company_stage": company_stage})
+    return LAYOUTS[output_format]["header"].format(
+        company=company_name, company_upper=company_name.upper(), industry=industry, stage_title=company_stage.title()
+    )
+
+def render_body(model: Dict[str, Any], output_format: str = "text") -> str:
+    """Render a report model as text or markdown into one buffer, or as a JSON object"""
+    if output_format == "json":
+        return json.dumps(model)
+    layout = LAYOUTS[output_format]
+    out = io.StringIO()
+    write = out.write
+    prefix, suffix = ITEM_AFFIXES[output_format]
+    separator = suffix + prefix
+
+    def write_items(items: List[str]) -> None:
+        if items:
+            write(prefix + separator.join(items) + suffix)
+
+    context = model["strategic_context"]
+    if context["industry_focus"] or context["stage_strategy"]:
+        write(layout["context_title"])
+        if context["industry_focus"]:
+            write(layout["industry_context"].format(context["industry_focus"]))
+        if context["stage_strategy"]:
+            write(layout["stage_context"].format(context["stage_strategy"]))
+        write(layout["section_end"])
+
+    write(layout["roadmap"])
+    for number, persona in enumerate(model["personas"], 1):
+        write(layout["persona"].format(number=number, **persona))
+        write(layout["champion_indicators"])
+        write_items(persona["champion_indicators"])
+        write(layout["section_end"])
+        write(layout["expansion_paths"])
+        write_items(persona["expansion_paths"])
+        write(layout["section_end"])
+        write(layout["insights"])
+        write_items(persona["priorities"])
+        write(layout["pain_points"])
+        write_items(persona["pain_points"])
+        write(layout["decision_criteria"])
+        write_items(persona["decision_criteria"])
+        write(layout["section_end"])
+        write(layout["persona_footer"].format(**persona))
+
+    recommendations = model["recommendations"]
+    write(layout["recommendations"])
+    if recommendations["primary_champion"]:
+        write(layout["primary_champion"].format(recommendations["primary_champion"]))
+    if recommendations["operational_champions"]:
+        write(layout["operational_champions"].format(", ".join(recommendations["operational_champions"])))
+    if recommendations["expansion_targets"]:
+        write(layout["expansion_targets"].format(", ".join(recommendations["expansion_targets"])))
+
+    write(layout["next_steps"])
+    for number, step in enumerate(model["next_steps"], 1):
+        write(layout["next_step"].format(step, number=number))
+    write(layout["end"])
+    return out.getvalue()
+
+def join_report(header: str, body: str, output_format: str = "text") -> str:
+    """Combine a rendered header and body; JSON objects are merged into one"""
+    if output_format == "json":
+        return header[:-1] + ", " + body[1:]
+    return header + body
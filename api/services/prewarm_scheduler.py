@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+from datetime import datetime, time as dtime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+def parse_window(window: str):
+    """Parse an "HH:MM-HH:MM" local-time window; it may wrap past midnight"""
+    start, end = (dtime.fromisoformat(part.strip()) for part in window.split('-'))
+    return start, end
+
+class PrewarmScheduler:
+    """Refreshes stored research and generated content for a watchlist of accounts off-peak.
+
+    Once per occurrence of the daily window, every task is submitted for
+    every watchlist entry through submit (the scrape scheduler's background
+    class), so pre-warming never competes with interactive work for workers
+    or rate-limit budget. The watchlist and the last run live in one JSON file.
+    """
+
+    def __init__(self, watchlist_path: str, window: str,
+                 tasks: Dict[str, Callable[[str, str], Dict[str, Any]]],
+                 submit: Callable[[Callable[[], None]], Any],
+                 check_interval_seconds: int = 60):
+        self.watchlist_path = watchlist_path
+        self.window = window
+        self.start_time, self.end_time = parse_window(window)
+        self.tasks = tasks
+        self.submit = submit
+        self.check_interval_seconds = check_interval_seconds
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.current_run: Optional[Dict[str, Any]] = None
+
+    def list_watchlist(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._load()["companies"]
+
+    def add(self, company_name: str, industry: Optional[str] = None) -> Dict[str, Any]:
+        """Add a company to the watchlist, or update its industry"""
+        with self._lock:
+            state = self._load()
+            entry = next((c for c in state["companies"] if c["company_name"].lower() == company_name.lower()), None)
+            if entry is None:
+                entry = {"company_name": company_name, "added_at": datetime.now().isoformat()}
+                state["companies"].append(entry)
+            entry["industry"] = industry or entry.get("industry") or "Unknown Industry"
+            self._save(state)
+            return entry
+
+    def remove(self, company_name: str) -> bool:
+        with self._lock:
+            state = self._load()
+            remaining = [c for c in state["companies"] if c["company_name"].lower() != company_name.lower()]
+            if len(remaining) == len(state["companies"]):
+                return False
+            state["companies"] = remaining
+            self._save(state)
+            return True
+
+    def window_start(self, now: datetime) -> Optional[datetime]:
+        """Start of the window occurrence containing now, or None outside the window"""
+        today_start = datetime.combine(now.date(), self.start_time)
+        if self.start_time <= self.end_time:
+            return today_start if self.start_time <= now.time() < self.end_time else None
+        if now.time() >= self.start_time:
+            return today_start
+        if now.time() < self.end_time:
+            return today_start - timedelta(days=1)
+        return None
+
+    def run_now(self) -> Dict[str, Any]:
+        """Submit every task for every watchlist entry; returns the run's progress record"""
+        with self._lock:
+            state = self._load()
+            run = {
+                "started_at": datetime.now().isoformat(),
+                "companies": len(state["companies"]),
+                "submitted": 0,
+                "completed": 0,
+                "failed": 0,
+                "errors": []
+            }
+            self.current_run = run
+
+        for entry in state["companies"]:
+            for task_name, task in self.tasks.items():
+                self.submit(self._task_runner(run, task_name, task, entry["company_name"], entry.get("industry")))
+                run["submitted"] += 1
+        return run
+
+    def start(self) -> None:
+        """Start checking for the window in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="prewarm", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._load()
+            return {
+                "window": self.window,
+                "running": self._thread is not None,
+                "watchlist": len(state["companies"]),
+                "last_window_start": state.get("last_window_start"),
+                "tasks": list(self.tasks),
+                "last_run": dict(self.current_run, errors=self.current_run["errors"][-20:]) if self.current_run else None
+            }
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                window_start = self.window_start(datetime.now())
+                if window_start is not None:
+                    with self._lock:
+                        state = self._load()
+                        due = state.get("last_window_start") != window_start.isoformat()
+                        if due:
+                            state["last_window_start"] = window_start.isoformat()
+                            self._save(state)
+                    if due:
+                        self.run_now()
+            except Exception as e:
+                print(f"Error in prewarm scheduler: {e}")
+            self._stop.wait(self.check_interval_seconds)
+
+    def _task_runner(self, run: Dict[str, Any], task_name: str,
+                     task: Callable[[str, str], Dict[str, Any]], company_name: str, industry: Optional[str]):
+        def run_task():
+            try:
+                result = task(company_name, industry)
+                ok = bool(result and result.get("success"))
+            except Exception as e:
+                ok, result = False, {"content": str(e)}
+            with self._lock:
+                if ok:
+                    run["completed"] += 1
+                else:
+                    run["failed"] += 1
+                    run["errors"].append({
+                        "company_name": company_name,
+                        "task": task_name,
+                        "error": (result or {}).get("content", "Unknown error")[:200]
+                    })
+        return run_task
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.watchlist_path):
+            return {"companies": []}
+        try:
+            with open(self.watchlist_path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading prewarm watchlist: {e}")
+            return {"companies": []}
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        tmp_path = f"{self.watchlist_path}.tmp-{threading.get_ident()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.watchlist_path)
@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class TokenBucket:
+    """Request budget refilled continuously at rate_per_minute, holding at most one minute's worth.
+
+    Non-interactive callers may not take the last interactive_reserve share of
+    the bucket, so interactive requests still find budget during bulk work.
+    """
+
+    def __init__(self, rate_per_minute: float, interactive_reserve: float = 0.2):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = max(rate_per_minute, 1.0)
+        self.reserve = self.capacity * interactive_reserve
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.granted = 0
+        self.waited_seconds = 0.0
+
+    def try_take(self, interactive: bool) -> float:
+        """Take a token and return 0, or return how long to wait before trying again"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+        floor = 0.0 if interactive else self.reserve
+        if self.tokens - 1 >= floor:
+            self.tokens -= 1
+            self.granted += 1
+            return 0.0
+        return (floor + 1 - self.tokens) / self.rate_per_second
+
+class RateLimiter:
+    """Shared per-provider request budgets for every workload that calls a provider"""
+
+    def __init__(self, rates_per_minute: Dict[str, float], interactive_reserve: float = 0.2):
+        self.buckets = {
+            provider: TokenBucket(rate, interactive_reserve)
+            for provider, rate in rates_per_minute.items() if rate > 0
+        }
+        self._cond = threading.Condition()
+
+    def acquire(self, provider: str, priority: str = "interactive", timeout: Optional[float] = None) -> bool:
+        """Wait for one request of budget; returns False if none was available within timeout"""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return True
+
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            while True:
+                wait = bucket.try_take(priority == "interactive")
+                if wait == 0:
+                    bucket.waited_seconds += time.monotonic() - started
+                    return True
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                provider: {
+                    "requests_per_minute": round(bucket.rate_per_second * 60, 2),
+                    "available": round(min(bucket.capacity, bucket.tokens + (time.monotonic() - bucket.updated) * bucket.rate_per_second), 2),
+                    "interactive_reserve": round(bucket.reserve, 2),
+                    "granted": bucket.granted,
+                    "waited_seconds": round(bucket.waited_seconds, 2)
+                }
+                for provider, bucket in self.buckets.items()
+            }
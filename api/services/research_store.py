@@ -0,0 +1,184 @@
+import concurrent.futures
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+
+class ResearchStore:
+    """Research results served stale-while-revalidate.
+
+    A stored result younger than fresh_seconds is returned as is. Up to
+    stale_seconds it is still returned, and one background refresh is
+    started. Older or missing results are fetched while the caller waits.
+    Concurrent fetches of one key share a single upstream call. Results of
+    pinned companies are always served from the store and never refreshed.
+    """
+
+    def __init__(self, store_dir: str, fresh_seconds: int, stale_seconds: int,
+                 submit_background: Optional[Callable[[Callable[[], None]], Any]] = None):
+        self.store_dir = store_dir
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = max(stale_seconds, fresh_seconds)
+        # Runs background refreshes; a daemon thread each by default
+        self.submit_background = submit_background or (lambda fn: threading.Thread(target=fn, daemon=True).start())
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._queued: Set[str] = set()
+        self._lock = threading.Lock()
+        self.counts = {"fresh": 0, "stale": 0, "pinned": 0, "miss": 0, "refreshed": 0, "background_refreshes": 0}
+
+    def get(self, company_name: str, key: str, fetch: Callable[[], Dict[str, Any]],
+            refresh: bool = False, timeout: Optional[float] = None, source: str = "request") -> Dict[str, Any]:
+        """Return the research result for key, calling fetch() when it has to be (re)fetched.
+
+        The result carries a "cache" entry with how it was served, its age and
+        what stored it (source). refresh skips the stored result unless the
+        company is pinned.
+        """
+        entry = self._load(key)
+        pinned = self.is_pinned(company_name)
+
+        if entry is not None and (pinned or not refresh):
+            age = time.time() - entry["stored_ts"]
+            if pinned:
+                return self._served(entry, "pinned")
+            if age <= self.fresh_seconds:
+                return self._served(entry, "fresh")
+            if age <= self.stale_seconds:
+                self._refresh_in_background(company_name, key, fetch)
+                return self._served(entry, "stale")
+
+        status = "refreshed" if entry is not None else "miss"
+        with self._lock:
+            self.counts[status] += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = concurrent.futures.Future()
+
+        if owner:
+            self._run_fetch(company_name, key, fetch, future, source)
+        result = future.result(timeout)
+        return dict(result, cache={"status": status, "age_seconds": 0, "stored_at": datetime.now().isoformat(), "source": source})
+
+    def pin(self, company_name: str, pinned: bool = True) -> None:
+        """Pin (or unpin) a company's research so it is served as stored"""
+        with self._lock:
+            pins = self._load_pins()
+            if pinned:
+                pins.add(company_name.lower())
+            else:
+                pins.discard(company_name.lower())
+            with open(self._pins_path(), 'w') as f:
+                json.dump(sorted(pins), f, indent=2)
+
+    def is_pinned(self, company_name: str) -> bool:
+        with self._lock:
+            return company_name.lower() in self._load_pins()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counts,
+                "refreshing": len(self._inflight),
+                "queued_refreshes": len(self._queued),
+                "pinned_companies": len(self._load_pins()),
+                "fresh_seconds": self.fresh_seconds,
+                "stale_seconds": self.stale_seconds
+            }
+
+    def _served(self, entry: Dict[str, Any], status: str) -> Dict[str, Any]:
+        with self._lock:
+            self.counts[status] += 1
+        return dict(entry["result"], cache={
+            "status": status,
+            "age_seconds": int(time.time() - entry["stored_ts"]),
+            "stored_at": datetime.fromtimestamp(entry["stored_ts"]).isoformat(),
+            "source": entry.get("source", "request")
+        })
+
+    def _refresh_in_background(self, company_name: str, key: str, fetch: Callable[[], Dict[str, Any]]) -> None:
+        """Queue a refresh of key unless one is already queued or running.
+
+        The key is only claimed once the refresh starts, so a caller that has to
+        wait for a fetch never waits behind a refresh still in the queue.
+        """
+        with self._lock:
+            if key in self._inflight or key in self._queued:
+                return
+            self._queued.add(key)
+            self.counts["background_refreshes"] += 1
+
+        def refresh():
+            entry = self._load(key)
+            with self._lock:
+                self._queued.discard(key)
+                # Skip if a waiting caller fetched it while this was queued
+                if key in self._inflight or (entry is not None and time.time() - entry["stored_ts"] <= self.fresh_seconds):
+                    return
+                future = self._inflight[key] = concurrent.futures.Future()
+            try:
+                self._run_fetch(company_name, key, fetch, future, "refresh")
+            except Exception as e:
+                print(f"Error refreshing research for {company_name}: {e}")
+
+        try:
+            self.submit_background(refresh)
+        except Exception as e:
+            with self._lock:
+                self._queued.discard(key)
+            print(f"Error scheduling research refresh for {company_name}: {e}")
+
+    def _run_fetch(self, company_name: str, key: str, fetch: Callable[[], Dict[str, Any]],
+                   future: concurrent.futures.Future, source: str) -> None:
+        """Call fetch, store a successful result and hand it to everyone waiting on future"""
+        try:
+            result = fetch()
+            if result.get("success"):
+                self._save(company_name, key, result, source)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _save(self, company_name: str, key: str, result: Dict[str, Any], source: str) -> None:
+        entry = {"company_name": company_name, "stored_ts": time.time(), "source": source, "result": result}
+        tmp_path = f"{self._path(key)}.tmp-{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except IOError as e:
+            print(f"Error writing research store entry: {e}")
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error reading research store entry: {e}")
+            return None
+
+    def _load_pins(self) -> set:
+        if not os.path.exists(self._pins_path()):
+            return set()
+        try:
+            with open(self._pins_path(), 'r') as f:
+                return set(json.load(f))
+        except (json.JSONDecodeError, IOError):
+            return set()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}.json")
+
+    def _pins_path(self) -> str:
+        return os.path.join(self.store_dir, "pins.json")
@@ -0,0 +1,166 @@
+import concurrent.futures
+import contextvars
+import itertools
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+# Highest priority first
+PRIORITY_CLASSES = ("interactive", "batch", "background")
+
+# Priority class of the work running in the current context; request threads are interactive
+current_priority: contextvars.ContextVar = contextvars.ContextVar("current_priority", default="interactive")
+
+class _Task:
+    def __init__(self, future: concurrent.futures.Future, fn: Callable, args, kwargs, priority: str, caller: str):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.caller = caller
+
+class PriorityScheduler:
+    """Worker pool that starts queued work by priority class, sharing workers fairly between callers.
+
+    Within a class, the next task comes from the caller with the fewest tasks
+    running, so one caller's large batch cannot hold every worker while
+    another caller waits. reserved_workers are kept for interactive work, and
+    max_per_caller (0 = unlimited) caps how many tasks one caller runs at once.
+    """
+
+    def __init__(self, max_workers: int, reserved_workers: int = 1, max_per_caller: int = 0, name: str = "scheduler"):
+        self.max_workers = max_workers
+        self.reserved_workers = min(reserved_workers, max_workers - 1) if max_workers > 1 else 0
+        self.max_per_caller = max_per_caller
+        self.name = name
+
+        # Priority class -> caller -> queued tasks, callers in round-robin order
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Task]]"] = {priority: OrderedDict() for priority in PRIORITY_CLASSES}
+        self._tasks: Dict[concurrent.futures.Future, _Task] = {}
+        self._running_by_caller: Dict[str, int] = {}
+        self._running_by_priority: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._started = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._workers = []
+        self._shutdown = False
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def submit(self, fn: Callable, *args, priority: str = "interactive", caller: str = "anonymous", **kwargs) -> concurrent.futures.Future:
+        """Queue fn(*args, **kwargs); cancelling the returned future before it starts removes it"""
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        future = concurrent.futures.Future()
+        task = _Task(future, fn, args, kwargs, priority, caller)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            self._queues[priority].setdefault(caller, deque()).append(task)
+            self._tasks[future] = task
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"{self.name}_{next(self._counter)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+        return future
+
+    def promote(self, future: concurrent.futures.Future, priority: str) -> bool:
+        """Move a queued task up to a higher priority class; returns True if it moved"""
+        with self._cond:
+            task = self._tasks.get(future)
+            if task is None or PRIORITY_CLASSES.index(priority) >= PRIORITY_CLASSES.index(task.priority):
+                return False
+            self._queues[task.priority][task.caller].remove(task)
+            if not self._queues[task.priority][task.caller]:
+                del self._queues[task.priority][task.caller]
+            task.priority = priority
+            self._queues[priority].setdefault(task.caller, deque()).append(task)
+            self._cond.notify()
+            return True
+
+    def shutdown(self, cancel_futures: bool = True) -> None:
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                for task in self._tasks.values():
+                    task.future.cancel()
+                for queues in self._queues.values():
+                    queues.clear()
+                self._tasks.clear()
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and running tasks per priority class"""
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "reserved_interactive_workers": self.reserved_workers,
+                "max_per_caller": self.max_per_caller,
+                "classes": {
+                    priority: {
+                        "queued": sum(len(tasks) for tasks in self._queues[priority].values()),
+                        "running": self._running_by_priority[priority],
+                        "started": self._started[priority]
+                    }
+                    for priority in PRIORITY_CLASSES
+                },
+                "running_by_caller": dict(self._running_by_caller)
+            }
+
+    def _next_task(self) -> Optional[_Task]:
+        """Pick the next task to start, or None if nothing may start now"""
+        running = sum(self._running_by_priority.values())
+        for priority in PRIORITY_CLASSES:
+            # Non-interactive work leaves the reserved workers free
+            if priority != "interactive" and running >= self.max_workers - self.reserved_workers:
+                return None
+
+            queues = self._queues[priority]
+            eligible = [
+                caller for caller in queues
+                if not self.max_per_caller or self._running_by_caller.get(caller, 0) < self.max_per_caller
+            ]
+            if not eligible:
+                continue
+
+            # Fewest running first; ties keep round-robin order
+            caller = min(eligible, key=lambda c: self._running_by_caller.get(c, 0))
+            tasks = queues.pop(caller)
+            task = tasks.popleft()
+            if tasks:
+                queues[caller] = tasks
+            del self._tasks[task.future]
+            return task
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                task = None
+                while not self._shutdown:
+                    task = self._next_task()
+                    if task is not None:
+                        break
+                    self._cond.wait()
+                if task is None:
+                    return
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                self._running_by_caller[task.caller] = self._running_by_caller.get(task.caller, 0) + 1
+                self._running_by_priority[task.priority] += 1
+                self._started[task.priority] += 1
+
+            token = current_priority.set(task.priority)
+            try:
+                task.future.set_result(task.fn(*task.args, **task.kwargs))
+            except BaseException as e:
+                task.future.set_exception(e)
+            finally:
+                current_priority.reset(token)
+                with self._cond:
+                    self._running_by_caller[task.caller] -= 1
+                    if not self._running_by_caller[task.caller]:
+                        del self._running_by_caller[task.caller]
+                    self._running_by_priority[task.priority] -= 1
+                    self._cond.notify_all()
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+# Searchable columns of the full-text table, and their BM25 weights (a match in a company name outranks one in a page)
+SEARCH_FIELDS = ("company", "industry", "title", "body")
+FIELD_WEIGHTS = (10.0, 4.0, 5.0, 1.0)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    company TEXT NOT NULL COLLATE NOCASE,
+    kind TEXT NOT NULL,
+    url TEXT,
+    content_hash TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_kind_company ON documents (kind, company);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    {", ".join(SEARCH_FIELDS)}, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+# A quoted phrase or a bare term, optionally ending in * for a prefix match
+QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+def fts_query(query: str, fields: Optional[Iterable[str]] = None) -> str:
+    """FTS5 MATCH expression for a free-text query: every term must match.
+
+    Terms are quoted, so punctuation and FTS5 operators in user input are taken
+    literally; "quoted phrases", a trailing * (prefix) and OR are supported.
+    fields restricts the match to some of SEARCH_FIELDS.
+    """
+    terms = []
+    for phrase, word in QUERY_TOKEN.findall(query or ""):
+        if word == "OR" and terms and terms[-1] != "OR":
+            terms.append("OR")
+            continue
+        text = phrase if phrase else word.rstrip("*")
+        if not re.search(r"\w", text):
+            continue
+        prefix = "*" if word.endswith("*") else ""
+        terms.append('"' + text.replace('"', '""') + '"' + prefix)
+    if terms and terms[-1] == "OR":
+        terms.pop()
+    if not terms:
+        return ""
+    expression = " ".join(terms)
+    if fields:
+        columns = [field for field in fields if field in SEARCH_FIELDS]
+        if columns:
+            expression = "{" + " ".join(columns) + "} : (" + expression + ")"
+    return expression
+
+class SearchIndex:
+    """SQLite FTS5 index over company records, crawled pages and generated content.
+
+    Each document has a stable doc_id and a content hash; upserting a document
+    whose hash is unchanged is a no-op, so callers can re-submit everything they
+    write and only changed documents are re-indexed. Results are ranked by
+    BM25 with FIELD_WEIGHTS and come with a highlighted snippet.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript(SCHEMA)
+            self._db.execute(
+                "INSERT INTO documents_fts (documents_fts, rank) VALUES ('rank', ?)",
+                (f"bm25({', '.join(str(weight) for weight in FIELD_WEIGHTS)})",)
+            )
+        self.writes = 0
+
+    def upsert(self, doc_id: str, company: str, kind: str, body: str, title: str = "", industry: str = "",
+               url: Optional[str] = None, content_hash: Optional[str] = None) -> bool:
+        """Index a document, replacing any previous version; returns False if it was unchanged"""
+        if content_hash is None:
+            content_hash = hashlib.sha256("\0".join((company, industry or "", title or "", body or "")).encode('utf-8')).hexdigest()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id, content_hash FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row and row[1] == content_hash:
+                return False
+            if row:
+                self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+                self._db.execute(
+                    "UPDATE documents SET company = ?, kind = ?, url = ?, content_hash = ?, updated_at = ? WHERE id = ?",
+                    (company, kind, url, content_hash, datetime.now().isoformat(), row[0])
+                )
+                rowid = row[0]
+            else:
+                rowid = self._db.execute(
+                    "INSERT INTO documents (doc_id, company, kind, url, content_hash, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (doc_id, company, kind, url, content_hash, datetime.now().isoformat())
+                ).lastrowid
+            self._db.execute(
+                "INSERT INTO documents_fts (rowid, company, industry, title, body) VALUES (?, ?, ?, ?, ?)",
+                (rowid, company, industry or "", title or "", body or "")
+            )
+            self.writes += 1
+            return True
+
+    def content_hashes(self, kind: str, company: Optional[str] = None) -> Dict[str, str]:
+        """doc_id -> content hash of the indexed documents of kind (optionally of one company)"""
+        sql = "SELECT doc_id, content_hash FROM documents WHERE kind = ?"
+        params: List[Any] = [kind]
+        if company is not None:
+            sql += " AND company = ?"
+            params.append(company)
+        with self._lock:
+            return dict(self._db.execute(sql, params).fetchall())
+
+    def delete(self, doc_ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock, self._db:
+            for doc_id in doc_ids:
+                row = self._db.execute("SELECT id FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+                if row:
+                    self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+                    self._db.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+                    removed += 1
+        return removed
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, kind: Optional[str] = None,
+               company: Optional[str] = None, fields: Optional[Iterable[str]] = None,
+               snippet_tokens: int = 16) -> Dict[str, Any]:
+        """Best BM25 matches for query, with snippets, optionally filtered by kind, company and fields"""
+        started = time.time()
+        expression = fts_query(query, fields)
+        if not expression:
+            return {"query": query, "total": 0, "results": [], "took_ms": 0}
+
+        filters = ""
+        params: List[Any] = [expression]
+        if kind:
+            filters += " AND d.kind = ?"
+            params.append(kind)
+        if company:
+            filters += " AND d.company = ?"
+            params.append(company)
+        matches = f"FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid WHERE documents_fts MATCH ?{filters}"
+
+        with self._lock:
+            try:
+                total = self._db.execute(f"SELECT count(*) {matches}", params).fetchone()[0]
+                rows = self._db.execute(
+                    f"SELECT d.doc_id, d.company, d.kind, d.url, documents_fts.title, d.updated_at, rank, "
+                    f"snippet(documents_fts, -1, '<mark>', '</mark>', '…', ?) "
+                    f"{matches} ORDER BY rank LIMIT ? OFFSET ?",
+                    [snippet_tokens, *params, limit, offset]
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search query: {e}")
+
+        return {
+            "query": query,
+            "total": total,
+            "results": [
+                {
+                    "doc_id": doc_id,
+                    "company": company_name,
+                    "kind": doc_kind,
+                    "url": url,
+                    "title": title,
+                    "updated_at": updated_at,
+                    # FTS5 ranks are negative BM25 scores; report the positive score
+                    "score": round(-rank, 4),
+                    "snippet": snippet
+                }
+                for doc_id, company_name, doc_kind, url, title, updated_at, rank, snippet in rows
+            ],
+            "took_ms": round((time.time() - started) * 1000, 2)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = dict(self._db.execute("SELECT kind, count(*) FROM documents GROUP BY kind").fetchall())
+        return {
+            "path": self.db_path,
+            "documents": sum(kinds.values()),
+            "by_kind": kinds,
+            "writes": self.writes
+        }
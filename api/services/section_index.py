@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# A markdown heading line ("## Pain Points") or a line that is only bold text ("**Pain Points**:")
+HEADING_PATTERN = re.compile(r"^[ \t]*(?:(#{1,6})[ \t]+(.+?)[ \t#]*|\*\*(.+?)\*\*:?)[ \t]*$", re.MULTILINE)
+
+def slugify(name: str) -> str:
+    """Section slug: lowercase words joined by dashes, without numbering ("2. Pain Points" -> "pain-points")"""
+    name = re.sub(r"^\s*\d+[.)]\s*", "", name.lower()).replace("&", " and ")
+    return "-".join(re.findall(r"[a-z0-9]+", name))
+
+def parse_sections(content: str) -> List[Dict[str, Any]]:
+    """Split markdown into headed sections with character offsets into content.
+
+    start/end bound the section body (after its heading line); text before the
+    first heading is not a section. Bold-line headings count as level 3.
+    """
+    headings = list(HEADING_PATTERN.finditer(content or ""))
+    sections = []
+    for i, match in enumerate(headings):
+        name = (match.group(2) or match.group(3)).strip().strip("*").rstrip(":").strip()
+        slug = slugify(name)
+        if not slug:
+            continue
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(content)
+        start = min(match.end() + 1, end)
+        sections.append({
+            "name": name,
+            "slug": slug,
+            "level": len(match.group(1)) if match.group(1) else 3,
+            "heading_start": match.start(),
+            "start": start,
+            "end": end
+        })
+    return sections
+
+class SectionIndex:
+    """Per-company index of the headed sections of generated content.
+
+    Each company file keeps the latest content of every artifact kind (research,
+    market analysis, ...) with the offsets of its sections, so one section is
+    served by slicing rather than re-parsing. The indexes of the most recently
+    used companies are also kept in memory, and an artifact is only re-parsed
+    when its content changes.
+    """
+
+    def __init__(self, index_dir: str, max_memory_entries: int = 256):
+        self.index_dir = index_dir
+        self.max_memory_entries = max_memory_entries
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, company_name: str, kind: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Index content as the company's latest artifact of kind; returns False if it was already indexed"""
+        if not content:
+            return False
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        with self._lock:
+            index = self._load(company_name)
+            current = index["artifacts"].get(kind)
+            if current and current["content_hash"] == content_hash:
+                return False
+            index["artifacts"][kind] = {
+                "content_hash": content_hash,
+                "indexed_at": datetime.now().isoformat(),
+                "metadata": metadata or {},
+                "content": content,
+                "sections": parse_sections(content)
+            }
+            self._save(company_name, index)
+            return True
+
+    def list_sections(self, company_name: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Section names and sizes per artifact kind"""
+        with self._lock:
+            index = self._load(company_name)
+            return {
+                kind: [
+                    {"name": s["name"], "slug": s["slug"], "level": s["level"], "length": s["end"] - s["start"]}
+                    for s in artifact["sections"]
+                ]
+                for kind, artifact in index["artifacts"].items()
+            }
+
+    def get_sections(self, company_name: str, name: str, kinds: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Sections named name (matched by slug, then by slug suffix, e.g. "pain-points" in "customer-pain-points")"""
+        slug = slugify(name)
+        with self._lock:
+            index = self._load(company_name)
+            candidates = [
+                (kind, artifact, section)
+                for kind, artifact in index["artifacts"].items() if not kinds or kind in kinds
+                for section in artifact["sections"]
+            ]
+        matches = [c for c in candidates if c[2]["slug"] == slug] or [c for c in candidates if c[2]["slug"].endswith(slug)]
+        return [
+            {
+                "kind": kind,
+                "name": section["name"],
+                "slug": section["slug"],
+                "content": artifact["content"][section["start"]:section["end"]].strip(),
+                "indexed_at": artifact["indexed_at"]
+            }
+            for kind, artifact, section in matches
+        ]
+
+    def get_content(self, company_name: str, kind: str) -> str:
+        """The latest indexed content of kind for the company ("" if none)"""
+        with self._lock:
+            artifact = self._load(company_name)["artifacts"].get(kind)
+        return artifact["content"] if artifact else ""
+
+    def section_text(self, company_name: str, names: List[str], kinds: Optional[List[str]] = None, max_chars: int = 4000) -> str:
+        """The first section found for each of names, as "Name: text" paragraphs, within max_chars"""
+        parts = []
+        remaining = max_chars
+        for name in names:
+            found = self.get_sections(company_name, name, kinds)
+            if not found or remaining <= 0:
+                continue
+            part = f"{found[0]['name']}: {found[0]['content']}"[:remaining]
+            parts.append(part)
+            remaining -= len(part)
+        return "\n\n".join(parts)
+
+    def _load(self, company_name: str) -> Dict[str, Any]:
+        key = company_name.lower()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        index = {"company_name": company_name, "artifacts": {}}
+        path = self._path(company_name)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    index = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading section index: {e}")
+        self._cache[key] = index
+        while len(self._cache) > self.max_memory_entries:
+            self._cache.popitem(last=False)
+        return index
+
+    def _save(self, company_name: str, index: Dict[str, Any]) -> None:
+        path = self._path(company_name)
+        tmp_path = f"{path}.tmp-{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            print(f"Error writing section index: {e}")
+
+    def _path(self, company_name: str) -> str:
+        return os.path.join(self.index_dir, f"{company_name.lower().replace(' ', '_').replace('/', '_')}.json")
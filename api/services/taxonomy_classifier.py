@@ -0,0 +1,132 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+def trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex matching any of keywords, factored as a trie so each position is tried once.
+
+    Optional suffixes are greedy, so the longest keyword at a position wins.
+    """
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+class KeywordClassifier:
+    """Weighted keyword vote over text, with every keyword of every label matched in one pass.
+
+    labels maps each label to {keyword: weight}; keywords match case-insensitively
+    anywhere in the text. The label with the most weighted votes wins (ties go to
+    the label listed first), and confidence is its share of all votes. With no
+    votes the default label is returned with confidence 0.
+    """
+
+    def __init__(self, labels: Dict[str, Dict[str, float]], default: str):
+        self.labels = list(labels)
+        self.default = default
+        self.keywords: Dict[str, tuple] = {}
+        for label, keywords in labels.items():
+            for keyword, weight in keywords.items():
+                self.keywords[keyword.lower()] = (label, float(weight))
+        self.pattern = re.compile(trie_pattern(self.keywords)) if self.keywords else None
+        self.max_keyword_length = max((len(keyword) for keyword in self.keywords), default=0)
+
+    def classify(self, texts: Iterable[Optional[str]]) -> Dict[str, Any]:
+        """Classify the concatenation of texts (e.g. stored chunks), reading them one at a time.
+
+        The last few characters of each text are carried into the next, so a
+        keyword split across a chunk boundary still counts, once.
+        """
+        votes = {label: 0.0 for label in self.labels}
+        matches: Dict[str, int] = {}
+        carry = ""
+        for text in texts:
+            if not text or self.pattern is None:
+                continue
+            window = carry + text.lower()
+            for match in self.pattern.finditer(window):
+                # Matches wholly inside the carried prefix were counted with the previous text
+                if match.end() <= len(carry):
+                    continue
+                keyword = match.group(0)
+                label, weight = self.keywords[keyword]
+                votes[label] += weight
+                matches[keyword] = matches.get(keyword, 0) + 1
+            carry = window[-(self.max_keyword_length - 1):] if self.max_keyword_length > 1 else ""
+
+        total = sum(votes.values())
+        if total <= 0:
+            return {"label": self.default, "confidence": 0.0, "votes": votes, "matches": matches}
+        label = max(self.labels, key=lambda name: (votes[name], -self.labels.index(name)))
+        return {
+            "label": label,
+            "confidence": round(votes[label] / total, 3),
+            "votes": {name: round(value, 3) for name, value in votes.items()},
+            "matches": matches
+        }
+
+class TaxonomyClassifier:
+    """Keyword classifiers for each dimension of a taxonomy file, reloaded when the file changes.
+
+    The file maps each dimension (e.g. "company_stage") to {"default": label,
+    "labels": {label: {keyword: weight}}}. A file that fails to load keeps the
+    previous classifiers in use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._classifiers: Dict[str, KeywordClassifier] = {}
+        self._mtime: Optional[float] = None
+        self._failed_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self.last_error: Optional[str] = None
+
+    def classify(self, dimension: str, texts: Iterable[Optional[str]]) -> Dict[str, Any]:
+        classifier = self.get(dimension)
+        if classifier is None:
+            raise KeyError(f"Unknown taxonomy dimension: {dimension}")
+        return classifier.classify(texts)
+
+    def get(self, dimension: str) -> Optional[KeywordClassifier]:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        # _mtime is only set once its classifiers are installed, so a call during a load waits for it
+        if mtime is not None and mtime != self._mtime and mtime != self._failed_mtime:
+            with self._lock:
+                if mtime != self._mtime and mtime != self._failed_mtime:
+                    self._load(mtime)
+        return self._classifiers.get(dimension)
+
+    def _load(self, mtime: float) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                taxonomy = json.load(f)
+            classifiers = {}
+            for dimension, spec in taxonomy.items():
+                if spec["default"] not in spec["labels"]:
+                    raise ValueError(f"default of '{dimension}' is not one of its labels")
+                classifiers[dimension] = KeywordClassifier(spec["labels"], spec["default"])
+            self._classifiers = classifiers
+            self._mtime = mtime
+            self.last_error = None
+            self._failed_mtime = None
+        except (json.JSONDecodeError, IOError, KeyError, TypeError, ValueError, AttributeError) as e:
+            # Reported once; the previous classifiers stay in use until the file changes again
+            self.last_error = f"{type(e).__name__}: {e}"
+            self._failed_mtime = mtime
+            print(f"Error loading classification taxonomy: {self.last_error}")
@@ -0,0 +1,150 @@
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# What the current upstream call is being made for, outside a request (e.g. "scrape_job", "prewarm")
+current_endpoint: contextvars.ContextVar = contextvars.ContextVar("current_endpoint", default=None)
+
+ROLLUP_FIELDS = ("day", "endpoint", "company", "provider", "model", "prompt_name", "cache_status")
+
+class UsageLedger:
+    """Append-only ledger of upstream calls, one JSONL file per day.
+
+    record() only enqueues the entry; a background thread appends queued
+    entries in batches, so recording never blocks a request. If the queue is
+    full the entry is dropped and counted rather than waited for.
+    """
+
+    def __init__(self, ledger_dir: str, max_queue: int = 10000, flush_interval_seconds: float = 1.0):
+        self.ledger_dir = ledger_dir
+        self.flush_interval_seconds = flush_interval_seconds
+        os.makedirs(self.ledger_dir, exist_ok=True)
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._file_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, **entry: Any) -> None:
+        """Queue one ledger entry; ts and day are filled in"""
+        now = time.time()
+        entry.setdefault("ts", round(now, 3))
+        entry.setdefault("day", datetime.fromtimestamp(now).strftime("%Y-%m-%d"))
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Write everything queued so far"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(batch)
+
+    def rollup(self, group_by: str = "day", since: Optional[str] = None, until: Optional[str] = None,
+               filters: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Aggregate entries between the since/until days (YYYY-MM-DD, inclusive) by one field"""
+        if group_by not in ROLLUP_FIELDS:
+            raise ValueError(f"group_by must be one of {', '.join(ROLLUP_FIELDS)}")
+        self.flush()
+
+        groups: Dict[Any, Dict[str, Any]] = defaultdict(lambda: {
+            "calls": 0, "upstream_calls": 0, "cache_hits": 0, "errors": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+            "cost_usd": 0.0, "latency_ms_total": 0
+        })
+        for entry in self._entries(since, until):
+            if filters and any(str(entry.get(field)) != value for field, value in filters.items()):
+                continue
+            group = groups[entry.get(group_by)]
+            group["calls"] += 1
+            if entry.get("cache_status") in (None, "miss", "bypass"):
+                group["upstream_calls"] += 1
+                group["latency_ms_total"] += entry.get("latency_ms") or 0
+            else:
+                group["cache_hits"] += 1
+            if not entry.get("success", True):
+                group["errors"] += 1
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                group[field] += entry.get(field) or 0
+            group["cost_usd"] += entry.get("cost_usd") or 0.0
+
+        rows = []
+        for key, group in groups.items():
+            latency_total = group.pop("latency_ms_total")
+            group["avg_upstream_latency_ms"] = round(latency_total / group["upstream_calls"]) if group["upstream_calls"] else None
+            group["cost_usd"] = round(group["cost_usd"], 4)
+            rows.append({group_by: key, **group})
+        return sorted(rows, key=lambda row: (row["total_tokens"], row["calls"]), reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "files": len([name for name in os.listdir(self.ledger_dir) if name.endswith('.jsonl')])
+        }
+
+    def _entries(self, since: Optional[str], until: Optional[str]):
+        for name in sorted(os.listdir(self.ledger_dir)):
+            if not (name.startswith("usage-") and name.endswith(".jsonl")):
+                continue
+            day = name[len("usage-"):-len(".jsonl")]
+            if (since and day < since) or (until and day > until):
+                continue
+            with open(os.path.join(self.ledger_dir, name), 'r') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash; skip it
+                        continue
+
+    def _ensure_writer(self) -> None:
+        if self._writer is None:
+            with self._start_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="usage-ledger", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            # Let the next batch accumulate
+            time.sleep(self.flush_interval_seconds)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        by_day: Dict[str, List[str]] = defaultdict(list)
+        for entry in batch:
+            by_day[entry["day"]].append(json.dumps(entry))
+
+        with self._file_lock:
+            for day, lines in by_day.items():
+                try:
+                    with open(os.path.join(self.ledger_dir, f"usage-{day}.jsonl"), 'a') as f:
+                        f.write("\n".join(lines) + "\n")
+                    self.written += len(lines)
+                except IOError as e:
+                    self.dropped += len(lines)
+                    print(f"Error writing usage ledger: {e}")
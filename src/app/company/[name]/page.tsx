@@ -149,9 +149,11 @@ export default function CompanyPage() {
       setPersonaError(null)
       
       // Send minimal data - just company name and industry
+      // refresh: the button asks for a new generation, not the stored one
       const requestData = {
         company_name: company.name,
-        industry: company.industry
+        industry: company.industry,
+        refresh: true
       }
       
       console.log('Generating personas for:', company.name, 'in industry:', company.industry)
@@ -196,9 +198,11 @@ export default function CompanyPage() {
       setMarketAnalysisError(null)
       
       // Send minimal data - just company name and industry
+      // refresh: the button asks for a new generation, not the stored one
       const requestData = {
         company_name: company.name,
-        industry: company.industry
+        industry: company.industry,
+        refresh: true
       }
       
       console.log('Generating market analysis for:', company.name, 'in industry:', company.industry)
@@ -76,6 +76,7 @@ export interface PersonaGenerationRequest {
   industry: string
   scraped_content?: string
   ai_research?: string
+  refresh?: boolean
 }
 
 export interface PersonaGenerationResponse {